@@ -5,23 +5,38 @@ A Flask-based web application for real-time visualization of Vienna's public tra
 Features include live vehicle tracking, route display, and disruption alerts.
 """
 
+import atexit
 import os
 import json
 import logging
+import threading
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-from functools import wraps
+from typing import Dict, List, Optional, Any, Callable, Iterable, Sequence, Tuple
 
 from flask import Flask, render_template, jsonify, request, Response
-from flask_caching import Cache
 from flask_socketio import SocketIO, emit
-import requests
 
 # Import our custom modules
 from data_loader import data_loader
+from data_watcher import init_data_watcher, get_data_watcher
 from websocket_manager import init_websocket_manager, get_websocket_manager
 from disruption_alerts import disruption_monitor
+from gtfs_service import gtfs_service
+from monitor_parser import VehicleRecord, parse_monitor_payload
+from list_query import CursorError, ListQuery
+from prepared_responses import prepared_responses, variant_responses
+from rate_limiter import upstream_limiter
+from rbl_cache import rbl_cache
+from schedule_positions import schedule_positions
+from single_flight import SingleFlight, upstream_flights
+from route_geometry import GEOMETRY_COORDINATES, GEOMETRY_FORMATS, encode_geometry
+from spatial_index import (
+    build_nearest_station_index, build_route_index, parse_bbox, simplify_polyline, zoom_tolerance
+)
+from station_search import MAX_SEARCH_RESULTS, build_station_search_index, fold_name
+from upstream_client import upstream_client
+from vehicle_poller import init_vehicle_poller, get_vehicle_poller
 
 # Configure logging
 logging.basicConfig(
@@ -37,12 +52,6 @@ logger = logging.getLogger('wiener_linien')
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'wiener-linien-secret-key-2024'
-app.config['CACHE_TYPE'] = 'SimpleCache'
-app.config['CACHE_DEFAULT_TIMEOUT'] = 15
-
-# Initialize cache
-cache = Cache(app)
-
 # Initialize SocketIO for WebSocket support
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
@@ -52,110 +61,140 @@ websocket_manager = init_websocket_manager(socketio)
 # Start disruption monitoring
 disruption_monitor.start_monitoring()
 
-# API configuration
-API_BASE_URL = "https://www.wienerlinien.at/ogd_realtime"
-API_TIMEOUT = 10
-
-# Rate limiting - increased to avoid 403 errors
-last_api_call = {}
-RATE_LIMIT_SECONDS = 30  # Increased from 15 to 30 seconds
-
-# API headers to avoid 403 errors
-API_HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-    'Accept': 'application/json, text/plain, */*',
-    'Accept-Language': 'en-US,en;q=0.9',
-    'Accept-Encoding': 'gzip, deflate, br',
-    'Connection': 'keep-alive',
-    'Upgrade-Insecure-Requests': '1'
+# API configuration - number of RBLs sent as repeated 'rbl' params in a single monitor request
+MONITOR_BATCH_SIZE = 20
+
+# Maximum number of major stations kept in the vehicle polling rotation
+MAX_STATIONS_PER_REFRESH = 60
+
+# Background vehicle polling: seconds between ticks and the age after which
+# an RBL's departures are revalidated when a client asks for them
+VEHICLE_POLL_INTERVAL = 5
+VEHICLE_MAX_AGE_SECONDS = 30
+
+# Seconds between checks of the data directory for changed markdown files
+DATA_WATCH_INTERVAL = 5
+
+# Viewport queries - below STATION_DETAIL_MIN_ZOOM only these station types are
+# returned, and route polylines are thinned to about ROUTE_SIMPLIFY_PIXELS on screen
+STATION_DETAIL_MIN_ZOOM = 14
+LOW_ZOOM_STATION_TYPES = {'metro', 'ubahn', 'u-bahn', 'sbahn', 's-bahn'}
+ROUTE_SIMPLIFY_PIXELS = 2
+
+# Nearby station queries - default and maximum k, maximum radius in meters
+NEARBY_DEFAULT_K = 10
+NEARBY_MAX_K = 100
+NEARBY_MAX_RADIUS_M = 10000
+
+# Station search - default limit, maximum query length and time budget for fuzzy matches
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_QUERY_LENGTH = 100
+SEARCH_BUDGET_MS = 1.0
+
+# Scheduled departures per /api/stations/<id>/departures request
+DEPARTURES_DEFAULT_LIMIT = 10
+DEPARTURES_MAX_LIMIT = 50
+
+# Indexes built in the background at startup and after every data reload: name -> (dataset, build)
+WARM_DATASET_INDEXES = {
+    'stations_nearby': ('stations', build_nearest_station_index),
+    'stations_search': ('stations', build_station_search_index)
 }
 
-def rate_limit(func):
-    """Decorator to enforce rate limiting."""
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        func_name = func.__name__
-        current_time = time.time()
-        
-        if func_name in last_api_call:
-            time_since_last = current_time - last_api_call[func_name]
-            if time_since_last < RATE_LIMIT_SECONDS:
-                sleep_time = RATE_LIMIT_SECONDS - time_since_last
-                logger.debug(f"Rate limiting: sleeping for {sleep_time:.2f} seconds")
-                time.sleep(sleep_time)
-        
-        last_api_call[func_name] = time.time()
-        return func(*args, **kwargs)
-    return wrapper
+# Indexes derived from the datasets (spatial, search), keyed by index name as (dataset version, index)
+_dataset_indexes: Dict[str, Tuple[int, Any]] = {}
+# Concurrent requests for an index that is not built yet share one build
+_dataset_index_builds = SingleFlight()
 
-@rate_limit
 def fetch_vehicle_data(rbl_number: str) -> Optional[Dict[str, Any]]:
     """Fetch vehicle data from Wiener Linien API."""
-    try:
-        url = f"{API_BASE_URL}/monitor"
-        params = {'rbl': rbl_number}
-        
-        response = requests.get(url, params=params, timeout=API_TIMEOUT, headers=API_HEADERS)
-        response.raise_for_status()
-        
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"API request failed for RBL {rbl_number}: {e}")
-        return None
-    except Exception as e:
-        logger.error(f"Error processing API response for RBL {rbl_number}: {e}")
-        return None
+    return fetch_monitor_batch([rbl_number]).get(rbl_number)
 
-@rate_limit
-def fetch_traffic_info() -> Optional[Dict[str, Any]]:
-    """Fetch traffic information from Wiener Linien API."""
-    try:
-        url = f"{API_BASE_URL}/trafficInfo"
-        response = requests.get(url, timeout=API_TIMEOUT, headers=API_HEADERS)
-        response.raise_for_status()
-        
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching traffic info: {e}")
-        return None
-    except Exception as e:
-        logger.error(f"Error processing traffic info: {e}")
-        return None
+# Identical concurrent fetches share one upstream request. Coalescing runs
+# before rate limiting so that waiting callers do not use up tokens. Throttled
+# chunks return None; fetch_monitor_batch falls back to rbl_cache per RBL.
+@upstream_flights.coalesce('monitor')
+@upstream_limiter.limit('monitor', stale_fallback=False)
+def _fetch_monitor_chunk(rbl_numbers: List[str]) -> Optional[Dict[str, Any]]:
+    """Fetch monitor data for several RBLs in a single API request."""
+    return upstream_client.get_json('monitor', [('rbl', rbl) for rbl in rbl_numbers])
 
-@rate_limit
-def fetch_news() -> Optional[Dict[str, Any]]:
-    """Fetch news and announcements from Wiener Linien API."""
-    try:
-        url = f"{API_BASE_URL}/news"
-        response = requests.get(url, timeout=API_TIMEOUT, headers=API_HEADERS)
-        response.raise_for_status()
-        
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching news: {e}")
-        return None
-    except Exception as e:
-        logger.error(f"Error processing news: {e}")
-        return None
+def _get_monitor_rbl(monitor: Dict[str, Any]) -> str:
+    """Get the RBL number a monitor entry belongs to."""
+    attributes = monitor.get('locationStop', {}).get('properties', {}).get('attributes', {})
+    rbl = attributes.get('rbl')
+    return str(rbl) if rbl is not None else ''
 
-def _calculate_delay(departure_time):
-    """Calculate delay in minutes from departure time information."""
-    try:
-        planned_time = departure_time.get('timePlanned')
-        real_time = departure_time.get('timeReal')
-        
-        if planned_time and real_time:
-            # Parse ISO format times
-            planned = datetime.fromisoformat(planned_time.replace('Z', '+00:00'))
-            real = datetime.fromisoformat(real_time.replace('Z', '+00:00'))
-            
-            # Calculate delay in minutes
-            delay_seconds = (real - planned).total_seconds()
-            return int(delay_seconds / 60)
+def _split_monitor_response(data: Dict[str, Any], rbl_numbers: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Split a multi-RBL monitor response into one response per RBL."""
+    monitors = data.get('data', {}).get('monitors', []) if isinstance(data, dict) else []
+    
+    # Every requested RBL gets an entry, even if upstream had no departures for it
+    grouped = {rbl: [] for rbl in rbl_numbers}
+    for monitor in monitors:
+        rbl = _get_monitor_rbl(monitor)
+        if rbl in grouped:
+            grouped[rbl].append(monitor)
+        elif len(rbl_numbers) == 1:
+            # A single-RBL response belongs to that RBL even without the attribute
+            grouped[rbl_numbers[0]].append(monitor)
+        else:
+            logger.debug(f"Skipping monitor for unrequested RBL {rbl!r}")
+    
+    return {
+        rbl: {'data': {'monitors': rbl_monitors}, 'message': data.get('message', {})}
+        for rbl, rbl_monitors in grouped.items()
+    }
+
+def fetch_monitor_batch(rbl_numbers: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch monitor data for a set of RBLs using as few API requests as possible.
+    
+    Returns a mapping of RBL number to a monitor response shaped like a
+    single-RBL response. Responses younger than the RBL cache TTL are served
+    from the cache; RBLs whose request failed fall back to a recently expired
+    cached response and are missing from the result if there is none.
+    """
+    # Deduplicate while keeping the caller's order
+    unique_rbls = list(dict.fromkeys(str(rbl) for rbl in rbl_numbers if rbl))
+    results = {}
+    
+    missing = []
+    for rbl in unique_rbls:
+        cached = rbl_cache.get(rbl)
+        if cached is not None:
+            results[rbl] = cached
         else:
-            return 0
-    except Exception:
-        return 0
+            missing.append(rbl)
+    
+    for start in range(0, len(missing), MONITOR_BATCH_SIZE):
+        chunk = missing[start:start + MONITOR_BATCH_SIZE]
+        data = _fetch_monitor_chunk(chunk)
+        if data:
+            split = _split_monitor_response(data, chunk)
+            for rbl, rbl_data in split.items():
+                rbl_cache.put(rbl, rbl_data)
+            results.update(split)
+    
+    for rbl in missing:
+        if rbl not in results:
+            stale = rbl_cache.get_stale(rbl)
+            if stale is not None:
+                results[rbl] = stale
+    
+    rbl_cache.maybe_save()
+    logger.debug(f"Fetched monitor data for {len(results)}/{len(unique_rbls)} RBLs "
+                 f"({len(unique_rbls) - len(missing)} from cache)")
+    return results
+
+def _build_vehicle_entries(rbl: str, data: Dict[str, Any]) -> List[VehicleRecord]:
+    """Build vehicle records from the monitor response of a single RBL."""
+    return parse_monitor_payload(data, rbl)
+
+def _get_major_station_rbls() -> List[str]:
+    """Get the RBLs of the major stations kept in the vehicle polling rotation."""
+    all_stations = data_loader.load_stations()
+    major_stations = list(dict.fromkeys(s.rbl for s in all_stations if s.rbl and len(s.rbl) == 4))
+    return major_stations[:MAX_STATIONS_PER_REFRESH]
 
 def get_dummy_vehicles(vehicle_type: Optional[str] = None, line: Optional[str] = None) -> List[Dict[str, Any]]:
     """Generate dummy vehicle data for demonstration."""
@@ -271,6 +310,13 @@ def get_dummy_vehicles(vehicle_type: Optional[str] = None, line: Optional[str] =
     
     return dummy_vehicles
 
+def get_fallback_vehicles(vehicle_type: Optional[str] = None,
+                          line: Optional[str] = None) -> Tuple[List[Dict[str, Any]], str]:
+    """Get vehicles for when there is no realtime data: scheduled positions from GTFS, else dummy vehicles."""
+    if schedule_positions.is_available():
+        return schedule_positions.get_vehicles(vehicle_type, line), 'scheduled'
+    return get_dummy_vehicles(vehicle_type, line), 'dummy'
+
 @app.route('/')
 def index():
     """Main page route."""
@@ -286,110 +332,275 @@ def get_vehicles():
         
         logger.info(f"Fetching vehicles: type={vehicle_type}, line={line}, station={station}")
         
-        vehicles = []
-        successful_requests = 0
-        failed_requests = 0
+        # Read from the background snapshot; upstream is never called here
+        poller = get_vehicle_poller()
+        snapshot = poller.get_snapshot()
+        
+        # Only known RBLs may be added to the poller's watch set
+        if station and not data_loader.get_station_by_rbl(station):
+            return jsonify({'error': f'Unknown station: {station}'}), 400
         
-        # Get stations to query
-        stations_to_query = []
         if station:
-            # Query specific station
-            stations_to_query = [station]
+            # Make sure the station is polled and refresh it if missing or expired
+            poller.watch(station)
+            poller.revalidate_stale([station])
+            entries = [snapshot.entries[station]] if station in snapshot.entries else []
+            vehicles = snapshot.query(vehicle_type, line, [station])
+            successful_requests = len(entries)
+            failed_requests = 1 if station in snapshot.failed_rbls else 0
         else:
-            # Query major stations
-            all_stations = data_loader.load_stations()
-            major_stations = [s.rbl for s in all_stations if s.rbl and len(s.rbl) == 4]
-            stations_to_query = major_stations[:5]  # Limit to 5 stations
-        
-        # Fetch real vehicle data
-        for rbl in stations_to_query:
-            try:
-                data = fetch_vehicle_data(rbl)
-                if data and 'data' in data and 'monitors' in data['data']:
-                    for monitor in data['data']['monitors']:
-                        if 'lines' in monitor:
-                            for line_data in monitor['lines']:
-                                # Get line information
-                                line_name = line_data.get('name', '')
-                                line_type = line_data.get('type', 'unknown')
-                                
-                                # Process departures to get vehicle positions
-                                departures = line_data.get('departures', {}).get('departure', [])
-                                if not isinstance(departures, list):
-                                    departures = [departures] if departures else []
-                                
-                                for departure in departures:
-                                    if 'vehicle' in departure:
-                                        vehicle_info = departure['vehicle']
-                                        departure_time = departure.get('departureTime', {})
-                                        
-                                        # Create vehicle entry
-                                        vehicle_entry = {
-                                            'id': f"{line_name}_{rbl}_{len(vehicles)}",
-                                            'type': line_type.replace('pt', '').lower(),  # Convert ptTram to tram
-                                            'line': line_name,
-                                            'lat': monitor.get('locationStop', {}).get('geometry', {}).get('coordinates', [0, 0])[1],
-                                            'lng': monitor.get('locationStop', {}).get('geometry', {}).get('coordinates', [0, 0])[0],
-                                            'direction': vehicle_info.get('towards', ''),
-                                            'next_station': monitor.get('locationStop', {}).get('properties', {}).get('title', ''),
-                                            'delay': _calculate_delay(departure_time),
-                                            'timestamp': datetime.now().isoformat(),
-                                            'countdown': departure_time.get('countdown', 0),
-                                            'platform': vehicle_info.get('platform', ''),
-                                            'barrier_free': vehicle_info.get('barrierFree', False)
-                                        }
-                                        vehicles.append(vehicle_entry)
-                    successful_requests += 1
-                else:
-                    failed_requests += 1
-            except Exception as e:
-                logger.error(f"Error fetching data for RBL {rbl}: {e}")
-                failed_requests += 1
+            entries = snapshot.entries.values()
+            vehicles = snapshot.query(vehicle_type, line)
+            successful_requests = len(snapshot.entries)
+            failed_requests = len(snapshot.failed_rbls)
+        stale_requests = sum(1 for entry in entries if entry.stale_upstream)
         
-        # If no real vehicles found, add dummy vehicles
-        if not vehicles:
-            logger.info("No real vehicles found, adding dummy vehicles")
-            vehicles = get_dummy_vehicles(vehicle_type, line)
+        vehicles = [vehicle.to_dict() for vehicle in vehicles]
+        source = 'realtime'
         
-        # Filter vehicles based on parameters
-        if vehicle_type and vehicle_type != 'all':
-            vehicles = [v for v in vehicles if v['type'] == vehicle_type]
+        # If no real vehicles are available at all, estimate them from the schedule
+        if not vehicles and not snapshot.vehicles:
+            vehicles, source = get_fallback_vehicles(vehicle_type, line)
+            logger.info(f"No real vehicles found, using {len(vehicles)} {source} vehicles")
         
-        if line:
-            vehicles = [v for v in vehicles if v['line'] == line]
-        
-        logger.info(f"Returning {len(vehicles)} vehicles (successful requests: {successful_requests}, failed: {failed_requests})")
+        logger.info(f"Returning {len(vehicles)} vehicles from snapshot v{snapshot.version} "
+                    f"(successful requests: {successful_requests}, failed: {failed_requests}, stale: {stale_requests})")
         
         return jsonify({
             'vehicles': vehicles,
+            'source': source,
             'timestamp': datetime.now().isoformat(),
             'successful_requests': successful_requests,
-            'failed_requests': failed_requests
+            'failed_requests': failed_requests,
+            'stale_requests': stale_requests,
+            'snapshot_version': snapshot.version,
+            'snapshot_age_seconds': round((datetime.now() - snapshot.created_at).total_seconds(), 1)
         })
         
     except Exception as e:
         logger.error(f"Error in get_vehicles: {e}", exc_info=True)
         return jsonify({'error': 'Internal server error'}), 500
 
+def _serialize_lines() -> Dict[str, Any]:
+    """Build the /api/lines payload."""
+    line_data = []
+    for line in data_loader.load_lines():
+        line_data.append({
+            'name': line.name,
+            'type': line.type,
+            'color': line.color,
+            'description': line.description,
+            'frequency': line.frequency,
+            'operating_hours': line.operating_hours
+        })
+    
+    logger.info(f"Serialized {len(line_data)} lines")
+    return {'lines': line_data}
+
+# Field getters used for fields= projection; fields that are not requested are never built
+STATION_FIELDS = {
+    'name': lambda s: s.name,
+    'rbl': lambda s: s.rbl,
+    'type': lambda s: s.type,
+    'zone': lambda s: s.zone,
+    'lat': lambda s: s.lat,
+    'lng': lambda s: s.lng
+}
+
+ROUTE_FIELDS = {
+    'name': lambda r: r.line,
+    'type': lambda r: r.type,
+    'color': lambda r: r.color,
+    'description': lambda r: r.description,
+    'coordinates': lambda r: r.coordinates.tolist(),
+    'stops': lambda r: r.stops
+}
+
+DISRUPTION_FIELDS = {
+    'id': lambda d: d.id,
+    'line': lambda d: d.line,
+    'type': lambda d: d.type.value,
+    'severity': lambda d: d.severity.value,
+    'status': lambda d: d.status.value,
+    'title': lambda d: d.title,
+    'description': lambda d: d.description,
+    'affected_stations': lambda d: d.affected_stations,
+    'affected_lines': lambda d: d.affected_lines,
+    'start_time': lambda d: d.start_time.isoformat(),
+    'end_time': lambda d: d.end_time.isoformat() if d.end_time else None,
+    'created_at': lambda d: d.created_at.isoformat(),
+    'updated_at': lambda d: d.updated_at.isoformat()
+}
+
+def _station_key(station) -> str:
+    """Get the pagination key of a station."""
+    return f"{station.rbl}:{station.name}"
+
+def _route_key(route) -> str:
+    """Get the pagination key of a route."""
+    return route.line
+
+def _key_index_builder(key: Callable[[Any], str]) -> Callable[[Sequence[Any]], Dict[str, int]]:
+    """Get a builder of the pagination key -> position index of a dataset; the first item with a key wins."""
+    def build(items: Sequence[Any]) -> Dict[str, int]:
+        index = {}
+        for position, item in enumerate(items):
+            index.setdefault(key(item), position)
+        return index
+    return build
+
+def _serialize_stations(query: ListQuery = ListQuery(), bbox=None, zoom: Optional[int] = None) -> Dict[str, Any]:
+    """Build the /api/stations payload, optionally for a viewport, projection and page."""
+    stations, version = data_loader.get_dataset('stations')
+    mask = stations.bbox_mask(bbox) if bbox else None
+    if zoom is not None and zoom < STATION_DETAIL_MIN_ZOOM:
+        type_mask = stations.type_mask(LOW_ZOOM_STATION_TYPES)
+        mask = type_mask if mask is None else mask & type_mask
+    
+    # Cursors into the full list are resolved through a per-version key index instead of a scan
+    key_index = None
+    if mask is not None:
+        stations = stations.select(mask)
+    elif query.after is not None:
+        key_index = _get_dataset_index('stations_keys', stations, version, _key_index_builder(_station_key))
+    
+    station_data, next_cursor = query.apply(stations, STATION_FIELDS, _station_key, key_index)
+    
+    payload = {'stations': station_data}
+    if bbox or zoom is not None:
+        payload['viewport'] = _viewport_metadata(bbox, zoom, len(stations))
+    if query.limit is not None:
+        payload['next_cursor'] = next_cursor
+    
+    logger.info(f"Serialized {len(station_data)} stations")
+    return payload
+
+def _serialize_routes(line_filter: Optional[str] = None, query: ListQuery = ListQuery(),
+                      bbox=None, zoom: Optional[int] = None,
+                      geometry: str = GEOMETRY_COORDINATES) -> Dict[str, Any]:
+    """Build the /api/routes payload, optionally for a line, viewport, projection and page.
+    
+    Route polylines are thinned for the zoom level when one is given and
+    encoded in the requested geometry format.
+    """
+    routes, version = data_loader.get_dataset('routes')
+    key_index = None
+    if bbox:
+        index = _get_dataset_index('routes', routes, version, build_route_index)
+        routes = [routes[i] for i in index.query(bbox)]
+    elif query.after is not None and not line_filter:
+        key_index = _get_dataset_index('routes_keys', routes, version, _key_index_builder(_route_key))
+    if line_filter:
+        routes = [r for r in routes if r.line == line_filter]
+    
+    getters = ROUTE_FIELDS
+    if zoom is not None:
+        tolerance = zoom_tolerance(zoom, ROUTE_SIMPLIFY_PIXELS)
+        getters = dict(ROUTE_FIELDS, coordinates=lambda r: encode_geometry(
+            simplify_polyline(r.coordinates, tolerance), geometry))
+    elif geometry != GEOMETRY_COORDINATES:
+        getters = dict(ROUTE_FIELDS, coordinates=lambda r: encode_geometry(r.coordinates, geometry))
+    
+    route_data, next_cursor = query.apply(routes, getters, _route_key, key_index)
+    
+    payload = {'routes': route_data}
+    if geometry != GEOMETRY_COORDINATES:
+        payload['geometry'] = geometry
+    if bbox or zoom is not None:
+        payload['viewport'] = _viewport_metadata(bbox, zoom, len(routes))
+    if query.limit is not None:
+        payload['next_cursor'] = next_cursor
+    
+    logger.info(f"Serialized {len(route_data)} routes" + (f" for line {line_filter}" if line_filter else ""))
+    return payload
+
+def _get_dataset_index(name: str, items: Sequence[Any], version: int, build: Callable[[Any], Any]) -> Any:
+    """Get an index derived from a version of a dataset, rebuilding it when the version changed."""
+    cached = _dataset_indexes.get(name)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    
+    index = _dataset_index_builds.do((name, version), build, items)
+    cached = _dataset_indexes.get(name)
+    if cached is None or cached[0] < version:
+        _dataset_indexes[name] = (version, index)
+    return index
+
+def _warm_dataset_indexes():
+    """Build the indexes requests need first for the current datasets, so no request waits for them."""
+    try:
+        for name, (dataset, build) in WARM_DATASET_INDEXES.items():
+            items, version = data_loader.get_dataset(dataset)
+            start = time.perf_counter()
+            _get_dataset_index(name, items, version, build)
+            logger.info(f"Built {name} index for version {version} in {(time.perf_counter() - start) * 1000:.0f} ms")
+    except Exception as e:
+        logger.error(f"Error building dataset indexes: {e}", exc_info=True)
+
+def _start_index_warmup():
+    """Build the dataset indexes in a background thread."""
+    threading.Thread(target=_warm_dataset_indexes, name='index-warmup', daemon=True).start()
+
+def _reload_data():
+    """Reload the datasets, then rebuild their indexes in the background."""
+    data_loader.reload()
+    _start_index_warmup()
+
+def _load_schedule():
+    """Load the GTFS schedule, then build the scheduled position estimator from it."""
+    try:
+        gtfs_service.load_data()
+        if gtfs_service.has_schedule():
+            schedule_positions.build()
+    except Exception as e:
+        logger.error(f"Error loading GTFS schedule: {e}", exc_info=True)
+
+def _parse_nearby_args() -> Tuple[float, float, int, Optional[float]]:
+    """Read the lat, lng, k and radius query parameters. Raises ValueError if malformed."""
+    if request.args.get('lat') is None or request.args.get('lng') is None:
+        raise ValueError("lat and lng are required")
+    lat, lng = float(request.args['lat']), float(request.args['lng'])
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("lat/lng out of range")
+    
+    k = int(request.args.get('k', NEARBY_DEFAULT_K))
+    if not 1 <= k <= NEARBY_MAX_K:
+        raise ValueError(f"k must be between 1 and {NEARBY_MAX_K}")
+    
+    radius = request.args.get('radius')
+    if radius is not None:
+        radius = float(radius)
+        if not 0 < radius <= NEARBY_MAX_RADIUS_M:
+            raise ValueError(f"radius must be between 0 and {NEARBY_MAX_RADIUS_M} meters")
+    return lat, lng, k, radius
+
+def _parse_viewport_args() -> Tuple[Optional[Tuple[float, float, float, float]], Optional[int]]:
+    """Read the bbox and zoom query parameters. Raises ValueError if malformed."""
+    bbox = parse_bbox(request.args.get('bbox'))
+    zoom = request.args.get('zoom')
+    if zoom is not None:
+        zoom = int(zoom)
+        if not 0 <= zoom <= 22:
+            raise ValueError("zoom must be between 0 and 22")
+    return bbox, zoom
+
+def _viewport_metadata(bbox, zoom: Optional[int], total: int) -> Dict[str, Any]:
+    """Describe the viewport a response was built for."""
+    return {
+        'bbox': [bbox[1], bbox[0], bbox[3], bbox[2]] if bbox else None,
+        'zoom': zoom,
+        'total': total
+    }
+
 @app.route('/api/lines')
 def get_lines():
     """API endpoint for transport lines."""
     try:
-        lines = data_loader.load_lines()
-        line_data = []
-        
-        for line in lines:
-            line_data.append({
-                'name': line.name,
-                'type': line.type,
-                'color': line.color,
-                'description': line.description,
-                'frequency': line.frequency,
-                'operating_hours': line.operating_hours
-            })
-        
-        logger.info(f"Returning {len(line_data)} lines")
-        return jsonify({'lines': line_data})
+        data_loader.load_lines()
+        prepared = prepared_responses.get(
+            'lines', data_loader.get_dataset_version('lines'), _serialize_lines
+        )
+        return prepared.to_response(request)
         
     except Exception as e:
         logger.error(f"Error in get_lines: {e}", exc_info=True)
@@ -397,61 +608,182 @@ def get_lines():
 
 @app.route('/api/stations')
 def get_stations():
-    """API endpoint for stations."""
+    """API endpoint for stations, with optional viewport, fields= projection and pagination."""
     try:
-        stations = data_loader.load_stations()
-        station_data = []
-        
-        for station in stations:
-            station_data.append({
-                'name': station.name,
-                'rbl': station.rbl,
-                'type': station.type,
-                'zone': station.zone,
-                'lat': station.lat,
-                'lng': station.lng
-            })
+        bbox, zoom = _parse_viewport_args()
+        query = ListQuery.from_args(request.args, STATION_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
         
-        logger.info(f"Returning {len(station_data)} stations")
-        return jsonify({'stations': station_data})
+    try:
+        data_loader.load_stations()
+        version = data_loader.get_dataset_version('stations')
+        if bbox is None and zoom is None and query.is_default:
+            prepared = prepared_responses.get('stations', version, _serialize_stations)
+        else:
+            prepared = variant_responses.get(
+                ('stations', bbox, zoom, query.cache_key()), version,
+                lambda: _serialize_stations(query, bbox, zoom)
+            )
+        return prepared.to_response(request)
         
+    except CursorError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
     except Exception as e:
         logger.error(f"Error in get_stations: {e}", exc_info=True)
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/stations/nearby')
+def get_nearby_stations():
+    """API endpoint for the k stations closest to a point, optionally within a radius in meters."""
+    try:
+        lat, lng, k, radius = _parse_nearby_args()
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+    
+    try:
+        stations, version = data_loader.get_dataset('stations')
+        index = _get_dataset_index('stations_nearby', stations, version, build_nearest_station_index)
+        results = []
+        for position, distance in index.query(lat, lng, k=k, radius_m=radius):
+            station = {name: getter(stations[position]) for name, getter in STATION_FIELDS.items()}
+            station['distance_m'] = round(distance, 1)
+            results.append(station)
+        
+        return jsonify({
+            'stations': results,
+            'count': len(results),
+            'query': {'lat': lat, 'lng': lng, 'k': k, 'radius': radius},
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in get_nearby_stations: {e}", exc_info=True)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/stations/search')
+def search_stations():
+    """API endpoint for station name autocomplete."""
+    query = request.args.get('q', '').strip()
+    try:
+        if not fold_name(query):
+            raise ValueError("q is required")
+        if len(query) > SEARCH_MAX_QUERY_LENGTH:
+            raise ValueError(f"q must be at most {SEARCH_MAX_QUERY_LENGTH} characters")
+        limit = int(request.args.get('limit', SEARCH_DEFAULT_LIMIT))
+        if not 1 <= limit <= MAX_SEARCH_RESULTS:
+            raise ValueError(f"limit must be between 1 and {MAX_SEARCH_RESULTS}")
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+    
+    try:
+        stations, version = data_loader.get_dataset('stations')
+        index = _get_dataset_index('stations_search', stations, version, build_station_search_index)
+        start = time.perf_counter()
+        results = index.search(query, limit=limit, budget_ms=SEARCH_BUDGET_MS)
+        took_ms = (time.perf_counter() - start) * 1000
+        
+        return jsonify({
+            'query': query,
+            'results': results,
+            'count': len(results),
+            'took_ms': round(took_ms, 3)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in search_stations: {e}", exc_info=True)
+        return jsonify({'error': 'Internal server error'}), 500
+
+def _resolve_gtfs_stops(station_id: str) -> List[int]:
+    """Map a GTFS stop_id, a station RBL or a station name to GTFS stop positions."""
+    stops = gtfs_service.find_stops(station_id)
+    if not stops:
+        station = data_loader.get_station_by_rbl(station_id)
+        if station is not None:
+            stops = gtfs_service.find_stops(station.name)
+    return stops
+
+@app.route('/api/stations/<station_id>/departures')
+def get_station_departures(station_id):
+    """API endpoint for the next scheduled departures of a station, answered from the GTFS timetable."""
+    try:
+        limit = int(request.args.get('limit', DEPARTURES_DEFAULT_LIMIT))
+        if not 1 <= limit <= DEPARTURES_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {DEPARTURES_MAX_LIMIT}")
+        when = request.args.get('time')
+        when = datetime.fromisoformat(when) if when else datetime.now()
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+    
+    try:
+        if not gtfs_service.has_schedule():
+            return jsonify({'error': 'Schedule data not available'}), 503
+        
+        stops = _resolve_gtfs_stops(station_id)
+        if not stops:
+            return jsonify({'error': f'Unknown station: {station_id}'}), 404
+        
+        start = time.perf_counter()
+        departures = gtfs_service.get_departures(stops, when, limit)
+        took_ms = (time.perf_counter() - start) * 1000
+        
+        return jsonify({
+            'station': station_id,
+            'stops': [gtfs_service.stop_ids[stop] for stop in stops],
+            'departures': departures,
+            'count': len(departures),
+            'source': 'schedule',
+            'time': when.isoformat(),
+            'took_ms': round(took_ms, 3),
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in get_station_departures: {e}", exc_info=True)
+        return jsonify({'error': 'Internal server error'}), 500
+
 @app.route('/api/routes')
 def get_routes():
-    """API endpoint for routes."""
+    """API endpoint for routes, with optional viewport, geometry encoding, fields= projection and pagination."""
+    try:
+        bbox, zoom = _parse_viewport_args()
+        query = ListQuery.from_args(request.args, ROUTE_FIELDS)
+        geometry = request.args.get('geometry', GEOMETRY_COORDINATES)
+        if geometry not in GEOMETRY_FORMATS:
+            raise ValueError(f"geometry must be one of {', '.join(GEOMETRY_FORMATS)}")
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+    
     try:
         line_filter = request.args.get('line')
-        routes = data_loader.load_routes()
-        
-        if line_filter:
-            routes = [r for r in routes if r.line == line_filter]
-            logger.info(f"Returning route for line {line_filter}")
+        data_loader.load_routes()
+        version = data_loader.get_dataset_version('routes')
+        if bbox is None and zoom is None and query.is_default:
+            prepared = prepared_responses.get(
+                ('routes', line_filter, geometry), version,
+                lambda: _serialize_routes(line_filter, geometry=geometry)
+            )
         else:
-            logger.info(f"Returning {len(routes)} routes")
-        
-        route_data = []
-        for route in routes:
-            route_data.append({
-                'name': route.line,
-                'type': route.type,
-                'color': route.color,
-                'description': route.description,
-                'coordinates': route.coordinates,
-                'stops': route.stops
-            })
-        
-        return jsonify({'routes': route_data})
+            prepared = variant_responses.get(
+                ('routes', line_filter, bbox, zoom, query.cache_key(), geometry), version,
+                lambda: _serialize_routes(line_filter, query, bbox, zoom, geometry)
+            )
+        return prepared.to_response(request)
         
+    except CursorError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
     except Exception as e:
         logger.error(f"Error in get_routes: {e}", exc_info=True)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/disruptions')
 def get_disruptions():
-    """API endpoint for service disruptions."""
+    """API endpoint for service disruptions, with optional fields= projection and pagination."""
+    try:
+        query = ListQuery.from_args(request.args, DISRUPTION_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+    
     try:
         line_filter = request.args.get('line')
         severity_filter = request.args.get('severity')
@@ -465,27 +797,17 @@ def get_disruptions():
         else:
             disruptions = disruption_monitor.get_active_disruptions()
         
-        disruption_data = []
-        for disruption in disruptions:
-            disruption_data.append({
-                'id': disruption.id,
-                'line': disruption.line,
-                'type': disruption.type.value,
-                'severity': disruption.severity.value,
-                'status': disruption.status.value,
-                'title': disruption.title,
-                'description': disruption.description,
-                'affected_stations': disruption.affected_stations,
-                'affected_lines': disruption.affected_lines,
-                'start_time': disruption.start_time.isoformat(),
-                'end_time': disruption.end_time.isoformat() if disruption.end_time else None,
-                'created_at': disruption.created_at.isoformat(),
-                'updated_at': disruption.updated_at.isoformat()
-            })
+        disruption_data, next_cursor = query.apply(disruptions, DISRUPTION_FIELDS, lambda d: d.id)
+        
+        payload = {'disruptions': disruption_data}
+        if query.limit is not None:
+            payload['next_cursor'] = next_cursor
         
         logger.info(f"Returning {len(disruption_data)} disruptions")
-        return jsonify({'disruptions': disruption_data})
+        return jsonify(payload)
         
+    except CursorError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
     except Exception as e:
         logger.error(f"Error in get_disruptions: {e}", exc_info=True)
         return jsonify({'error': 'Internal server error'}), 500
@@ -513,6 +835,15 @@ def get_system_status():
             'vehicle_count': ws_manager.get_vehicle_count() if ws_manager else 0,
             'data_cache_status': data_loader.get_cache_status(),
             'last_api_check': disruption_monitor.last_check.isoformat() if disruption_monitor.last_check else None,
+            'rate_limits': upstream_limiter.get_status(),
+            'single_flight': upstream_flights.get_status(),
+            'prepared_responses': prepared_responses.get_status(),
+            'upstream_client': upstream_client.get_status(),
+            'rbl_cache': rbl_cache.get_status(),
+            'data_watcher': get_data_watcher().get_status() if get_data_watcher() else None,
+            'vehicle_poller': get_vehicle_poller().get_status() if get_vehicle_poller() else None,
+            'gtfs': gtfs_service.get_status(),
+            'scheduled_positions': schedule_positions.get_status(),
             'timestamp': datetime.now().isoformat()
         }
         return jsonify(status)
@@ -594,10 +925,15 @@ def handle_request_updates(data):
     client_id = request.sid
     
     if update_type in ['vehicles', 'all']:
-        # Send current vehicle data
-        vehicles = get_dummy_vehicles()
+        # Send current vehicle data from the snapshot
+        poller = get_vehicle_poller()
+        vehicles = [vehicle.to_dict() for vehicle in poller.get_snapshot().vehicles] if poller else []
+        source = 'realtime'
+        if not vehicles:
+            vehicles, source = get_fallback_vehicles()
         emit('vehicle_updates', {
             'vehicles': vehicles,
+            'source': source,
             'timestamp': datetime.now().isoformat()
         })
     
@@ -687,6 +1023,31 @@ def initialize_app():
     data_loader.load_lines()
     data_loader.load_stations()
     data_loader.load_routes()
+    _start_index_warmup()
+
+    # Load the GTFS schedule in the background; schedule endpoints answer 503 until it is ready
+    threading.Thread(target=_load_schedule, name='gtfs-loader', daemon=True).start()
+
+    # Warm the per-RBL response cache from the last run and persist it on shutdown
+    rbl_cache.load()
+    atexit.register(rbl_cache.save)
+    
+    # Hot-reload the datasets when the markdown data files change
+    init_data_watcher(
+        data_dir=data_loader.data_dir,
+        on_change=_reload_data,
+        interval=DATA_WATCH_INTERVAL
+    )
+    
+    # Start polling vehicle data in the background
+    init_vehicle_poller(
+        fetch_batch=fetch_monitor_batch,
+        build_vehicles=_build_vehicle_entries,
+        rbls_provider=_get_major_station_rbls,
+        rbls_per_tick=MONITOR_BATCH_SIZE,
+        poll_interval=VEHICLE_POLL_INTERVAL,
+        max_age=VEHICLE_MAX_AGE_SECONDS
+    )
 
 # Initialize the app immediately
 initialize_app()
@@ -0,0 +1,202 @@
+"""
+Benchmark suite for DataLoader.
+
+Generates synthetic datasets at fixed sizes with generate_dataset.py and
+records, for every size:
+
+- load time of load_lines, load_routes and load_stations when parsing the
+  markdown, when writing the compiled snapshot and when loading from it
+- peak traced memory of each cold load
+- latency of every get_* method, both the first call (which builds the
+  lookup indexes) and steady-state lookups
+
+Results can be stored as a baseline and later runs checked against it; a
+metric regresses when it is more than --tolerance times its baseline value
+(and above a small noise floor). Baselines are machine-specific, so save
+one on the machine you compare on.
+
+    python benchmarks/bench_data_loader.py
+    python benchmarks/bench_data_loader.py --sizes small medium large --save-baseline
+    python benchmarks/bench_data_loader.py --check
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_loader import DataLoader
+from generate_dataset import generate_dataset
+
+# name -> (stations, routes, coordinates per route)
+SIZES = {
+    'small': (1000, 100, 200),
+    'medium': (10000, 500, 400),
+    'large': (50000, 1000, 800)
+}
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'data_loader.json')
+
+# Differences below these are timer noise, never a regression
+NOISE_FLOOR = {'ms': 2.0, 'us': 2.0, 'kib': 256.0}
+
+LOAD_METHODS = ['load_lines', 'load_routes', 'load_stations']
+
+def lookup_cases(loader: DataLoader, rng: random.Random, count: int):
+    """Build (method, argument lists) for every get_* method, with arguments taken from the loaded data."""
+    lines, routes, stations = loader.load_lines(), loader.load_routes(), loader.load_stations()
+    sample_lines = [rng.choice(lines) for _ in range(count)]
+    sample_stations = [stations[rng.randrange(len(stations))] for _ in range(count)]
+    sample_routes = [rng.choice(routes) for _ in range(count)]
+    return [
+        ('get_state', [()]),
+        ('get_dataset', [('lines',), ('routes',), ('stations',)]),
+        ('get_dataset_version', [('lines',), ('routes',), ('stations',)]),
+        ('get_generation', [()]),
+        ('get_line_by_name', [(line.name,) for line in sample_lines]),
+        ('get_route_by_line', [(route.line,) for route in sample_routes]),
+        ('get_station_by_rbl', [(station.rbl,) for station in sample_stations]),
+        ('get_station_by_name', [(station.name,) for station in sample_stations]),
+        ('get_lines_by_type', [('Metro',), ('Tram',), ('Bus',), ('NightBus',)]),
+        ('get_stations_by_type', [('Metro',), ('Tram',), ('Bus',), ('NightBus',)]),
+        ('get_stations_by_zone', [('100',), ('200',)]),
+        ('get_cache_status', [()])
+    ]
+
+def time_load(data_dir: str, method: str, use_snapshots: bool, repeat: int) -> float:
+    """Time a load_* method on fresh loaders, with the datasets it depends on already loaded. Returns the best ms."""
+    best = float('inf')
+    for _ in range(repeat):
+        loader = DataLoader(data_dir, use_snapshots=use_snapshots)
+        if method == 'load_stations':
+            loader.load_routes()
+        start = time.perf_counter()
+        getattr(loader, method)()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def peak_memory(data_dir: str, method: str) -> float:
+    """Get the peak traced memory of a cold load_* call in KiB."""
+    loader = DataLoader(data_dir, use_snapshots=False)
+    if method == 'load_stations':
+        loader.load_routes()
+    tracemalloc.start()
+    getattr(loader, method)()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+def run_size(size: str, repeat: int, lookups: int) -> dict:
+    """Generate a dataset of a size and benchmark it. Returns metric name -> value."""
+    stations, routes, points = SIZES[size]
+    data_dir = tempfile.mkdtemp(prefix=f"wl-bench-{size}-")
+    results = {}
+    try:
+        start = time.perf_counter()
+        counts = generate_dataset(data_dir, stations, routes, points)
+        print(f"\n{size}: {counts['stations']} stations, {counts['routes']} routes, "
+              f"{counts['coordinates']} coordinates (generated in {time.perf_counter() - start:.1f} s)")
+        
+        print(f"{'method':<28}{'cold ms':>10}{'write ms':>10}{'hit ms':>10}{'peak KiB':>11}")
+        for method in LOAD_METHODS:
+            cold_ms = time_load(data_dir, method, False, repeat)
+            # Writing happens on the first snapshot-backed load, so every run starts without snapshots
+            write_ms = float('inf')
+            for _ in range(repeat):
+                shutil.rmtree(os.path.join(data_dir, '.snapshots'), ignore_errors=True)
+                write_ms = min(write_ms, time_load(data_dir, method, True, 1))
+            hit_ms = time_load(data_dir, method, True, repeat)
+            peak_kib = peak_memory(data_dir, method)
+            results.update({f"{method}.cold_ms": cold_ms, f"{method}.snapshot_write_ms": write_ms,
+                            f"{method}.snapshot_hit_ms": hit_ms, f"{method}.peak_kib": peak_kib})
+            print(f"{method:<28}{cold_ms:>10.1f}{write_ms:>10.1f}{hit_ms:>10.1f}{peak_kib:>11.0f}")
+        
+        loader = DataLoader(data_dir)
+        cases = lookup_cases(loader, random.Random(7), lookups)
+        print(f"{'method':<28}{'first ms':>10}{'mean us':>10}")
+        for method, arguments in cases:
+            func = getattr(loader, method)
+            start = time.perf_counter()
+            func(*arguments[0])
+            first_ms = (time.perf_counter() - start) * 1000
+            
+            calls = arguments * max(1, lookups // len(arguments))
+            start = time.perf_counter()
+            for args in calls:
+                func(*args)
+            mean_us = (time.perf_counter() - start) / len(calls) * 1e6
+            results.update({f"{method}.first_ms": first_ms, f"{method}.us": mean_us})
+            print(f"{method:<28}{first_ms:>10.3f}{mean_us:>10.2f}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+def check_regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """Compare results against a baseline. Returns (size, metric, baseline, current) of every regression."""
+    regressions = []
+    for size, metrics in results.items():
+        for metric, current in metrics.items():
+            expected = baseline.get(size, {}).get(metric)
+            if expected is None:
+                continue
+            # Metrics end in their unit: load_lines.cold_ms, load_lines.peak_kib, get_state.us
+            floor = NOISE_FLOOR[metric.rsplit('.', 1)[-1].rsplit('_', 1)[-1]]
+            if current > expected * tolerance and current - expected > floor:
+                regressions.append((size, metric, expected, current))
+    return regressions
+
+def main():
+    """Run the benchmark suite."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=['small', 'medium'],
+                        help='Dataset sizes to run')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per load')
+    parser.add_argument('--lookups', type=int, default=2000, help='Number of calls per get_* method')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline file')
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the baseline')
+    parser.add_argument('--check', action='store_true', help='Fail if a metric regressed against the baseline')
+    parser.add_argument('--tolerance', type=float, default=1.5, help='Allowed slowdown factor in --check')
+    parser.add_argument('--json', help='Also write the results to this file')
+    args = parser.parse_args()
+    
+    results = {size: run_size(size, args.repeat, args.lookups) for size in args.sizes}
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update({size: {metric: round(value, 3) for metric, value in metrics.items()}
+                         for size, metrics in results.items()})
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nSaved baseline for {', '.join(results)} to {args.baseline}")
+    
+    if args.check:
+        if not os.path.exists(args.baseline):
+            sys.exit(f"No baseline at {args.baseline}; run with --save-baseline first")
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = check_regressions(results, baseline, args.tolerance)
+        print()
+        if not regressions:
+            print(f"No regressions against {args.baseline} (tolerance {args.tolerance}x)")
+            return
+        for size, metric, expected, current in regressions:
+            print(f"REGRESSION {size} {metric}: {expected:.3f} -> {current:.3f} ({current / expected:.1f}x)")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Benchmark for GTFSService.
+
+Writes a synthetic GTFS feed shaped like the Wiener Linien feed (weekday,
+Saturday and Sunday services, trips every few minutes over the whole day,
+one shape per route and direction) and measures loading it and the
+schedule queries answered from it. Pass --gtfs to run against an extracted
+real feed instead.
+
+    python benchmarks/bench_gtfs.py
+    python benchmarks/bench_gtfs.py --routes 400 --trips 400 --stops 30
+    python benchmarks/bench_gtfs.py --gtfs ../scripts/gtfs_data/extracted
+"""
+import argparse
+import csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_viewport import best_of
+from gtfs_service import GTFSService
+from schedule_positions import SchedulePositionEstimator
+from stop_times_table import format_gtfs_time
+
+# (service kind, monday..sunday); every route gets its own service of each kind, as in the real feed
+SERVICES = [
+    ('weekday', '1111100'),
+    ('saturday', '0000010'),
+    ('sunday', '0000001')
+]
+
+def write_csv(path: str, header, rows):
+    """Write a GTFS CSV file."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+def build_feed(out_dir: str, routes: int, trips_per_route: int, stops_per_trip: int, seed: int = 42) -> int:
+    """Write a synthetic GTFS feed. Returns the number of stop times."""
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    
+    write_csv(os.path.join(out_dir, 'calendar.txt'),
+              ['service_id', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday',
+               'start_date', 'end_date'],
+              [[f"{kind}-{route}", *days, '20250101', '20251231']
+               for route in range(routes) for kind, days in SERVICES])
+    # Public holidays run the Sunday timetable
+    holidays = ['20250101', '20250106', '20250421', '20250501', '20251225', '20251226']
+    write_csv(os.path.join(out_dir, 'calendar_dates.txt'), ['service_id', 'date', 'exception_type'],
+              [row for route in range(routes) for day in holidays
+               for row in ([f"weekday-{route}", day, '2'], [f"sunday-{route}", day, '1'])])
+    
+    stop_count = max(stops_per_trip, routes * stops_per_trip // 3)
+    stops = [(f"at:49:{1000 + i}:0:1", f"Stop {i}", round(rng.uniform(48.12, 48.32), 6),
+              round(rng.uniform(16.18, 16.58), 6)) for i in range(stop_count)]
+    write_csv(os.path.join(out_dir, 'stops.txt'), ['stop_id', 'stop_name', 'stop_lat', 'stop_lon'], stops)
+    
+    route_rows, trip_rows, shape_rows = [], [], []
+    stop_time_count = 0
+    with open(os.path.join(out_dir, 'stop_times.txt'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['trip_id', 'arrival_time', 'departure_time', 'stop_id', 'stop_sequence'])
+        for route in range(routes):
+            route_id = f"route-{route}"
+            route_rows.append([route_id, str(route + 1), rng.choice([0, 1, 3])])
+            route_stops = rng.sample(stops, stops_per_trip)
+            hops = [rng.randint(60, 180) for _ in range(stops_per_trip - 1)]
+            for direction in (0, 1):
+                shape_id = f"{route_id}-{direction}"
+                ordered = route_stops if direction == 0 else route_stops[::-1]
+                shape_rows.extend([shape_id, lat, lng, sequence]
+                                  for sequence, (_, _, lat, lng) in enumerate(ordered, 1))
+            for trip in range(trips_per_route):
+                direction = trip % 2
+                service_id = f"{SERVICES[trip % len(SERVICES)][0]}-{route}"
+                trip_id = f"{route_id}-{trip}"
+                trip_rows.append([route_id, service_id, trip_id, f"Terminus {direction}", direction,
+                                  f"{route_id}-{direction}"])
+                ordered = route_stops if direction == 0 else route_stops[::-1]
+                seconds = 4 * 3600 + trip * (21 * 3600 // trips_per_route) + rng.randint(0, 120)
+                # The last trip of every route has a single timepoint, which leaves its other times missing
+                partially_timed = trip == trips_per_route - 1
+                for sequence, (stop_id, _, _, _) in enumerate(ordered, 1):
+                    time_text = '' if partially_timed and sequence > 1 else format_gtfs_time(seconds)
+                    writer.writerow([trip_id, time_text, time_text, stop_id, sequence])
+                    if sequence < len(ordered):
+                        seconds += hops[sequence - 1]
+                stop_time_count += len(ordered)
+    
+    write_csv(os.path.join(out_dir, 'routes.txt'), ['route_id', 'route_short_name', 'route_type'], route_rows)
+    write_csv(os.path.join(out_dir, 'trips.txt'),
+              ['route_id', 'service_id', 'trip_id', 'trip_headsign', 'direction_id', 'shape_id'], trip_rows)
+    write_csv(os.path.join(out_dir, 'shapes.txt'),
+              ['shape_id', 'shape_pt_lat', 'shape_pt_lon', 'shape_pt_sequence'], shape_rows)
+    return stop_time_count
+
+def scan_active_services(service: GTFSService, target: date) -> set:
+    """Get the active services by scanning every calendar entry and exception, as the service used to."""
+    active = {service_id for service_id, entry in service.calendar_entries.items()
+              if entry.start_date <= target <= entry.end_date and entry.days[target.weekday()]}
+    for service_id, day, exception_type in service.calendar_exceptions:
+        if day == target:
+            (active.add if exception_type == 1 else active.discard)(service_id)
+    return active
+
+def scan_trips_for_route(service: GTFSService, route_id: str, target: date) -> list:
+    """Get the trips of a route running on a date with full scans, as the service used to."""
+    active = service.get_active_services(target)
+    return [t for t in service.trips if t.route_id == route_id and t.service_id in active]
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--gtfs', help='Extracted GTFS feed to use instead of a synthetic one')
+    parser.add_argument('--routes', type=int, default=200, help='Synthetic feed: number of routes')
+    parser.add_argument('--trips', type=int, default=300, help='Synthetic feed: trips per route')
+    parser.add_argument('--stops', type=int, default=25, help='Synthetic feed: stops per trip')
+    parser.add_argument('--queries', type=int, default=2000, help='Number of queries per case')
+    args = parser.parse_args()
+    
+    gtfs_dir = args.gtfs
+    if gtfs_dir is None:
+        gtfs_dir = tempfile.mkdtemp(prefix='wl-gtfs-')
+        start = time.perf_counter()
+        count = build_feed(gtfs_dir, args.routes, args.trips, args.stops)
+        print(f"Feed: synthetic, {args.routes} routes x {args.trips} trips x {args.stops} stops = "
+              f"{count} stop times (written in {time.perf_counter() - start:.1f} s)")
+    else:
+        print(f"Feed: {gtfs_dir}")
+    
+    try:
+        # Memory is traced in a separate load, tracing slows loading down several times
+        tracemalloc.start()
+        GTFSService(gtfs_dir).load_data()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        service = GTFSService(gtfs_dir)
+        start = time.perf_counter()
+        service.load_data()
+        load_s = time.perf_counter() - start
+        stop_times = service.stop_times
+        print(f"Load: {load_s:.2f} s, peak traced {peak / 1e6:.0f} MB, "
+              f"{len(stop_times)} stop times in {stop_times.nbytes / 1e6:.1f} MB of columns")
+        
+        rng = random.Random(7)
+        trip_ids = [rng.choice(service.trips).trip_id for _ in range(args.queries)]
+        start_date = service.calendar.start_date or date.today()
+        dates = [start_date + timedelta(days=rng.randrange(max(service.calendar.day_count, 1)))
+                 for _ in range(args.queries)]
+        service_ids = [rng.choice(service.calendar.service_ids) if len(service.calendar) else ''
+                       for _ in range(args.queries)]
+        route_ids = [rng.choice(service.route_ids) if service.route_ids else '' for _ in range(args.queries)]
+        scan_queries = list(zip(route_ids, dates))[:max(1, args.queries // 20)]
+        stop_ids = [rng.choice(service.stop_ids) if service.stop_ids else '' for _ in range(args.queries)]
+        times = [datetime.combine(d, datetime.min.time()) + timedelta(seconds=rng.randrange(5 * 3600, 23 * 3600))
+                 for d in dates]
+        
+        print()
+        print(f"{'query':<28}{'us':>10}")
+        cases = [
+            ('get_trip_stop_times', lambda: [service.get_trip_stop_times(t) for t in trip_ids]),
+            ('get_trip_schedule', lambda: [service.get_trip_schedule(t) for t in trip_ids]),
+            ('active services (scan)', lambda: [scan_active_services(service, d) for d in dates]),
+            ('get_active_services', lambda: [service.get_active_services(d) for d in dates]),
+            ('is_service_active', lambda: [service.is_service_active(s, d) for s, d in zip(service_ids, dates)]),
+            ('route trips (scan)', lambda: [scan_trips_for_route(service, r, d) for r, d in scan_queries]),
+            ('get_trips_for_route', lambda: [service.get_trips_for_route(r, d) for r, d in zip(route_ids, dates)]),
+            ('get_trip_indices_for_route', lambda: [service.get_trip_indices_for_route(r, d)
+                                                    for r, d in zip(route_ids, dates)]),
+            ('get_departures (10)', lambda: [service.get_departures(service.find_stops(s), t, 10)
+                                             for s, t in zip(stop_ids, times)])
+        ]
+        for label, func in cases:
+            ms, results = best_of(func, 3)
+            print(f"{label:<28}{ms * 1000 / len(results):>10.2f}")
+        
+        # Full-network snapshots of scheduled vehicle positions
+        estimator = SchedulePositionEstimator(service)
+        estimator.estimate(times[0])
+        if np.any(np.diff(estimator.row_key) < 0):
+            sys.exit("Scheduled positions: row keys are not sorted")
+        snapshot_times = times[:max(1, args.queries // 20)]
+        print()
+        print(f"Scheduled positions: built in {estimator.build_ms:.0f} ms")
+        print(f"{'snapshot':<28}{'ms':>10}{'vehicles':>10}")
+        snapshot_cases = [
+            ('estimate', lambda t: len(estimator.estimate(t).trip)),
+            ('get_vehicles', lambda t: len(estimator.get_vehicles(when=t)))
+        ]
+        for label, func in snapshot_cases:
+            ms, counts = best_of(lambda: [func(t) for t in snapshot_times], 3)
+            print(f"{label:<28}{ms / len(counts):>10.2f}{sum(counts) / len(counts):>10.0f}")
+    finally:
+        if args.gtfs is None:
+            shutil.rmtree(gtfs_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Benchmark for the monitor response parser.
+
+Compares monitor_parser.parse_monitor_payload against the nested dict-based
+parsing previously done inline in get_vehicles. By default a large synthetic
+payload shaped like a multi-RBL monitor response is used; pass --payload to
+run against a recorded response saved from the monitor API instead.
+
+    python benchmarks/bench_monitor_parser.py
+    python benchmarks/bench_monitor_parser.py --payload recorded_monitor.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitor_parser import parse_monitor_payload, parse_timestamp
+
+LINE_TYPES = ['ptMetro', 'ptTram', 'ptBusCity', 'ptBusNight']
+
+def build_payload(monitors: int, lines_per_monitor: int, departures_per_line: int) -> dict:
+    """Build a synthetic monitor payload with realistic structure and timestamps."""
+    rng = random.Random(42)
+    base = datetime(2025, 5, 4, 22, 15)
+    payload_monitors = []
+    
+    for m in range(monitors):
+        lines = []
+        for l in range(lines_per_monitor):
+            departures = []
+            for d in range(departures_per_line):
+                planned = base + timedelta(minutes=2 * d + rng.randint(0, 3))
+                real = planned + timedelta(minutes=rng.choice([0, 0, 0, 1, 2, 5]))
+                departures.append({
+                    'departureTime': {
+                        'timePlanned': planned.strftime('%Y-%m-%dT%H:%M:%S.000+0200'),
+                        'timeReal': real.strftime('%Y-%m-%dT%H:%M:%S.000+0200'),
+                        'countdown': 2 * d
+                    },
+                    'vehicle': {
+                        'name': f"L{l}",
+                        'towards': f"Destination {l}",
+                        'direction': 'H',
+                        'platform': str(l % 2 + 1),
+                        'richtungsId': '1',
+                        'barrierFree': bool(d % 2),
+                        'realtimeSupported': True,
+                        'trafficjam': False,
+                        'type': LINE_TYPES[l % len(LINE_TYPES)],
+                        'linienId': 100 + l
+                    }
+                })
+            lines.append({
+                'name': f"L{l}",
+                'towards': f"Destination {l}",
+                'direction': 'H',
+                'richtungsId': '1',
+                'barrierFree': True,
+                'realtimeSupported': True,
+                'trafficjam': False,
+                'departures': {'departure': departures},
+                'type': LINE_TYPES[l % len(LINE_TYPES)],
+                'lineId': 100 + l
+            })
+        payload_monitors.append({
+            'locationStop': {
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [16.3 + m / 1000, 48.2 + m / 1000]},
+                'properties': {
+                    'name': str(60200000 + m),
+                    'title': f"Stop {m}",
+                    'municipality': 'Wien',
+                    'type': 'stop',
+                    'attributes': {'rbl': 4000 + m}
+                }
+            },
+            'lines': lines,
+            'attributes': {}
+        })
+    
+    return {'data': {'monitors': payload_monitors}, 'message': {'value': 'OK', 'messageCode': 1}}
+
+def legacy_parse(payload: dict, rbl: str) -> list:
+    """The per-departure dict building previously inlined in get_vehicles."""
+    def calculate_delay(departure_time):
+        try:
+            planned_time = departure_time.get('timePlanned')
+            real_time = departure_time.get('timeReal')
+            if planned_time and real_time:
+                planned = datetime.fromisoformat(planned_time.replace('Z', '+00:00'))
+                real = datetime.fromisoformat(real_time.replace('Z', '+00:00'))
+                return int((real - planned).total_seconds() / 60)
+            return 0
+        except Exception:
+            return 0
+    
+    vehicles = []
+    for monitor in payload['data']['monitors']:
+        if 'lines' in monitor:
+            for line_data in monitor['lines']:
+                line_name = line_data.get('name', '')
+                line_type = line_data.get('type', 'unknown')
+                departures = line_data.get('departures', {}).get('departure', [])
+                if not isinstance(departures, list):
+                    departures = [departures] if departures else []
+                for departure in departures:
+                    if 'vehicle' in departure:
+                        vehicle_info = departure['vehicle']
+                        departure_time = departure.get('departureTime', {})
+                        vehicles.append({
+                            'id': f"{line_name}_{rbl}_{len(vehicles)}",
+                            'type': line_type.replace('pt', '').lower(),
+                            'line': line_name,
+                            'lat': monitor.get('locationStop', {}).get('geometry', {}).get('coordinates', [0, 0])[1],
+                            'lng': monitor.get('locationStop', {}).get('geometry', {}).get('coordinates', [0, 0])[0],
+                            'direction': vehicle_info.get('towards', ''),
+                            'next_station': monitor.get('locationStop', {}).get('properties', {}).get('title', ''),
+                            'delay': calculate_delay(departure_time),
+                            'timestamp': datetime.now().isoformat(),
+                            'countdown': departure_time.get('countdown', 0),
+                            'platform': vehicle_info.get('platform', ''),
+                            'barrier_free': vehicle_info.get('barrierFree', False)
+                        })
+    return vehicles
+
+def measure(name: str, func, repeat: int):
+    """Run func repeatedly and report the best time and retained memory."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    
+    tracemalloc.start()
+    result = func()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    print(f"{name:<10} best {min(timings) * 1000:8.2f} ms   "
+          f"mean {sum(timings) / len(timings) * 1000:8.2f} ms   "
+          f"records {len(result):6d}   retained {retained / 1024:8.1f} KiB")
+    return min(timings)
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--payload', help='Path to a recorded monitor API response (JSON)')
+    parser.add_argument('--monitors', type=int, default=200, help='Synthetic payload: number of monitors')
+    parser.add_argument('--lines', type=int, default=4, help='Synthetic payload: lines per monitor')
+    parser.add_argument('--departures', type=int, default=10, help='Synthetic payload: departures per line')
+    parser.add_argument('--repeat', type=int, default=10, help='Number of timed runs')
+    args = parser.parse_args()
+    
+    if args.payload:
+        with open(args.payload, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        print(f"Payload: {args.payload}")
+    else:
+        payload = build_payload(args.monitors, args.lines, args.departures)
+        print(f"Payload: synthetic, {args.monitors} monitors x {args.lines} lines x {args.departures} departures")
+    
+    legacy = measure('legacy', lambda: legacy_parse(payload, '4000'), args.repeat)
+    parse_timestamp.cache_clear()
+    current = measure('parser', lambda: parse_monitor_payload(payload, '4000'), args.repeat)
+    print(f"Speedup: {legacy / current:.2f}x")
+
+if __name__ == "__main__":
+    main()
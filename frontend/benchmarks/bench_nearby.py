@@ -0,0 +1,99 @@
+"""
+Benchmark for nearest-station queries.
+
+Compares the grid-backed NearestNeighborIndex used by /api/stations/nearby
+against a vectorized full scan (StationTable.nearest) and a plain Python
+scan, for k-nearest and radius queries from random points in Vienna, and
+checks that the index returns the same stations as the full scan.
+
+    python benchmarks/bench_nearby.py
+    python benchmarks/bench_nearby.py --stations 50000 --queries 5000
+"""
+import argparse
+import heapq
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spatial_index import EARTH_RADIUS_M, build_nearest_station_index
+from station_table import StationTable
+
+# (label, k, radius in meters)
+QUERIES = [
+    ('k=1', 1, None),
+    ('k=10', 10, None),
+    ('k=50', 50, None),
+    ('k=10 r=300', 10, 300.0),
+    ('k=100 r=1000', 100, 1000.0)
+]
+
+def build_stations(count: int) -> StationTable:
+    """Build synthetic stops spread over Vienna, denser towards the center."""
+    rng = random.Random(42)
+    rows = []
+    for i in range(count):
+        lat = min(max(rng.gauss(48.208, 0.05), 48.12), 48.32)
+        lng = min(max(rng.gauss(16.373, 0.08), 16.18), 16.58)
+        rows.append((f"Stop {i}", str(10000 + i), rng.choice(['Tram', 'Bus', 'Bus']), '100', lat, lng))
+    return StationTable.from_rows(rows)
+
+def python_nearest(points, lat: float, lng: float, k: int, radius_m):
+    """Find the k nearest points with a plain Python scan."""
+    lat_rad, lng_rad = math.radians(lat), math.radians(lng)
+    cos_lat = math.cos(lat_rad)
+    distances = []
+    for position, (p_lat, p_lng, p_cos) in enumerate(points):
+        a = (math.sin((p_lat - lat_rad) / 2) ** 2
+             + cos_lat * p_cos * math.sin((p_lng - lng_rad) / 2) ** 2)
+        distance = 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0)))
+        if radius_m is None or distance <= radius_m:
+            distances.append((distance, position))
+    return [(position, distance) for distance, position in heapq.nsmallest(k, distances)]
+
+def time_queries(func, points) -> float:
+    """Run func for every query point and return the mean time in microseconds."""
+    start = time.perf_counter()
+    for lat, lng in points:
+        func(lat, lng)
+    return (time.perf_counter() - start) / len(points) * 1e6
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stations', type=int, default=10000, help='Number of synthetic stops')
+    parser.add_argument('--queries', type=int, default=2000, help='Number of query points per case')
+    parser.add_argument('--cell-size', type=float, default=250.0, help='Index cell size in meters')
+    args = parser.parse_args()
+    
+    stations = build_stations(args.stations)
+    start = time.perf_counter()
+    index = build_nearest_station_index(stations, args.cell_size)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"Stations: {len(stations)} synthetic stops, index build {build_ms:.1f} ms, cell {args.cell_size:.0f} m")
+    
+    rng = random.Random(7)
+    points = [(rng.uniform(48.15, 48.27), rng.uniform(16.25, 16.50)) for _ in range(args.queries)]
+    python_points = [(math.radians(s.lat), math.radians(s.lng), math.cos(math.radians(s.lat))) for s in stations]
+    python_queries = points[:max(1, args.queries // 20)]
+    
+    print()
+    print(f"{'query':<14}{'index us':>10}{'numpy us':>10}{'python us':>11}{'speedup':>9}{'match':>7}")
+    for label, k, radius in QUERIES:
+        index_us = time_queries(lambda lat, lng: index.query(lat, lng, k=k, radius_m=radius), points)
+        numpy_us = time_queries(lambda lat, lng: stations.nearest(lat, lng, k=k, max_distance_m=radius), points)
+        python_us = time_queries(lambda lat, lng: python_nearest(python_points, lat, lng, k, radius), python_queries)
+        
+        match = all(
+            [p for p, _ in index.query(lat, lng, k=k, radius_m=radius)]
+            == [p for p, _ in stations.nearest(lat, lng, k=k, max_distance_m=radius)]
+            for lat, lng in python_queries
+        )
+        print(f"{label:<14}{index_us:>10.1f}{numpy_us:>10.1f}{python_us:>11.1f}"
+              f"{numpy_us / index_us:>8.1f}x{'yes' if match else 'NO':>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark for the route geometry formats of /api/routes.
+
+Serializes the routes in every geometry= format and reports the JSON and
+gzip payload size, the time to encode them on the server and the time a
+client needs to parse the JSON and decode the geometry back into points.
+A synthetic network is used by default; pass --real to run against the
+markdown datasets in data/ instead.
+
+    python benchmarks/bench_route_geometry.py
+    python benchmarks/bench_route_geometry.py --routes 400 --points 600
+    python benchmarks/bench_route_geometry.py --real
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_viewport import best_of, build_network
+from route_geometry import (
+    GEOMETRY_COORDINATES, GEOMETRY_E6, GEOMETRY_FORMATS, GEOMETRY_POLYLINE, GEOMETRY_POLYLINE6,
+    decode_e6_deltas, decode_polyline, encode_geometry
+)
+
+def route_payload(routes, geometry: str) -> bytes:
+    """Serialize routes the way the API does."""
+    data = [{'name': r.line, 'type': r.type, 'color': r.color, 'description': r.description,
+             'coordinates': encode_geometry(r.coordinates, geometry), 'stops': r.stops}
+            for r in routes]
+    return json.dumps({'routes': data}, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+def client_decode(body: bytes, geometry: str) -> int:
+    """Parse a payload and decode every route back into points, as a client would. Returns the point count."""
+    points = 0
+    for route in json.loads(body)['routes']:
+        coordinates = route['coordinates']
+        if geometry == GEOMETRY_POLYLINE:
+            coordinates = decode_polyline(coordinates, 5)
+        elif geometry == GEOMETRY_POLYLINE6:
+            coordinates = decode_polyline(coordinates, 6)
+        elif geometry == GEOMETRY_E6:
+            coordinates = decode_e6_deltas(coordinates)
+        points += len(coordinates)
+    return points
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--real', action='store_true', help='Use the markdown datasets instead of synthetic data')
+    parser.add_argument('--routes', type=int, default=200, help='Synthetic network: number of routes')
+    parser.add_argument('--points', type=int, default=300, help='Synthetic network: points per route')
+    parser.add_argument('--repeat', type=int, default=10, help='Number of timed runs')
+    args = parser.parse_args()
+    
+    if args.real:
+        from data_loader import data_loader
+        routes = data_loader.load_routes()
+        print("Network: data/routes.md")
+    else:
+        _, routes = build_network(0, args.routes, args.points)
+        print(f"Network: synthetic, {args.routes} routes x {args.points} points")
+    
+    print()
+    print(f"{'geometry':<13}{'json KiB':>10}{'gzip KiB':>10}{'encode ms':>11}{'decode ms':>11}{'points':>9}")
+    baseline = None
+    for geometry in GEOMETRY_FORMATS:
+        encode_ms, body = best_of(lambda: route_payload(routes, geometry), args.repeat)
+        decode_ms, points = best_of(lambda: client_decode(body, geometry), args.repeat)
+        baseline = baseline or len(body)
+        print(f"{geometry:<13}{len(body) / 1024:>10.1f}{len(gzip.compress(body)) / 1024:>10.1f}"
+              f"{encode_ms:>11.2f}{decode_ms:>11.2f}{points:>9}"
+              + ('' if geometry == GEOMETRY_COORDINATES else f"   {baseline / len(body):.1f}x smaller"))
+
+if __name__ == "__main__":
+    main()
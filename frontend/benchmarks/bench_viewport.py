@@ -0,0 +1,165 @@
+"""
+Benchmark for viewport (bbox/zoom) queries on stations and routes.
+
+Compares payload size and latency of the full /api/stations and /api/routes
+payloads against city-wide and district-level viewports answered from the
+vectorized station table and the route grid index, and those queries against
+a linear scan. A synthetic
+network shaped like Vienna's is used by default; pass --real to run against
+the markdown datasets in data/ instead.
+
+    python benchmarks/bench_viewport.py
+    python benchmarks/bench_viewport.py --stations 20000 --routes 400
+    python benchmarks/bench_viewport.py --real
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_loader import Route, Station
+from spatial_index import build_route_index, parse_bbox, simplify_polyline, zoom_tolerance
+from station_table import StationTable
+
+# (label, bbox as west,south,east,north, zoom)
+VIEWPORTS = [
+    ('full', None, None),
+    ('city', '16.18,48.12,16.58,48.32', 12),
+    ('district', '16.355,48.200,16.385,48.215', 16)
+]
+
+# Mirrors app.STATION_DETAIL_MIN_ZOOM: below it only metro stations are sent
+STATION_DETAIL_MIN_ZOOM = 14
+
+def build_network(station_count: int, route_count: int, points_per_route: int):
+    """Build synthetic stations and routes spread over Vienna."""
+    rng = random.Random(42)
+    stations = []
+    for i in range(station_count):
+        stations.append(Station(
+            name=f"Station {i}",
+            rbl=str(1000 + i),
+            type=rng.choice(['Metro', 'Tram', 'Bus', 'Bus', 'Bus']),
+            zone='100',
+            lat=rng.uniform(48.12, 48.32),
+            lng=rng.uniform(16.18, 16.58)
+        ))
+    
+    routes = []
+    for i in range(route_count):
+        lat, lng = rng.uniform(48.12, 48.32), rng.uniform(16.18, 16.58)
+        d_lat, d_lng = rng.uniform(-0.0008, 0.0008), rng.uniform(-0.0012, 0.0012)
+        coordinates = []
+        for _ in range(points_per_route):
+            lat += d_lat + rng.uniform(-0.0002, 0.0002)
+            lng += d_lng + rng.uniform(-0.0003, 0.0003)
+            coordinates.append([round(lat, 6), round(lng, 6)])
+        routes.append(Route(
+            line=f"L{i}", type=rng.choice(['Metro', 'Tram', 'Bus']), color='#FF0000', length='',
+            stations=0, description=f"Line {i}", coordinates=coordinates, stops=[]
+        ))
+    return stations, routes
+
+def station_payload(stations) -> bytes:
+    """Serialize stations the way the API does."""
+    data = [{'name': s.name, 'rbl': s.rbl, 'type': s.type, 'zone': s.zone, 'lat': s.lat, 'lng': s.lng}
+            for s in stations]
+    return json.dumps({'stations': data}, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+def route_payload(routes, tolerance: float) -> bytes:
+    """Serialize routes the way the API does."""
+    data = [{'name': r.line, 'type': r.type, 'color': r.color, 'description': r.description,
+             'coordinates': simplify_polyline(r.coordinates, tolerance) if tolerance else r.coordinates.tolist(),
+             'stops': r.stops}
+            for r in routes]
+    return json.dumps({'routes': data}, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+def linear_scan(items, bbox, bounds) -> list:
+    """Filter items by bounding box without an index."""
+    min_lat, min_lng, max_lat, max_lng = bbox
+    matches = []
+    for item in items:
+        b = bounds(item)
+        if b and b[0] <= max_lat and b[2] >= min_lat and b[1] <= max_lng and b[3] >= min_lng:
+            matches.append(item)
+    return matches
+
+def route_bounds(route):
+    """Get the bounding box of a route's polyline."""
+    if not len(route.coordinates):
+        return None
+    (min_lat, min_lng), (max_lat, max_lng) = route.coordinates.min(axis=0), route.coordinates.max(axis=0)
+    return (min_lat, min_lng, max_lat, max_lng)
+
+def best_of(func, repeat: int):
+    """Run func repeatedly and return the best time in ms and the last result."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+def report(dataset: str, label: str, count: int, body: bytes, query_ms: float, scan_ms: float, total_ms: float):
+    """Print one result row."""
+    print(f"{dataset:<9}{label:<10}{count:>8}{len(body) / 1024:>12.1f}{len(gzip.compress(body)) / 1024:>11.1f}"
+          f"{query_ms:>10.3f}{scan_ms:>10.3f}{total_ms:>10.2f}")
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--real', action='store_true', help='Use the markdown datasets instead of synthetic data')
+    parser.add_argument('--stations', type=int, default=5000, help='Synthetic network: number of stations')
+    parser.add_argument('--routes', type=int, default=200, help='Synthetic network: number of routes')
+    parser.add_argument('--points', type=int, default=300, help='Synthetic network: points per route')
+    parser.add_argument('--repeat', type=int, default=20, help='Number of timed runs')
+    args = parser.parse_args()
+    
+    if args.real:
+        from data_loader import data_loader
+        stations, routes = data_loader.load_stations(), data_loader.load_routes()
+        print("Network: data/*.md")
+    else:
+        stations, routes = build_network(args.stations, args.routes, args.points)
+        print(f"Network: synthetic, {args.stations} stations, {args.routes} routes x {args.points} points")
+    
+    build_ms, station_table = best_of(lambda: StationTable.from_stations(stations), 1)
+    route_build_ms, route_index = best_of(lambda: build_route_index(routes), 1)
+    print(f"Index build: station table {build_ms:.1f} ms, routes {route_build_ms:.1f} ms")
+    print()
+    print(f"{'dataset':<9}{'viewport':<10}{'items':>8}{'json KiB':>12}{'gzip KiB':>11}"
+          f"{'index ms':>10}{'scan ms':>10}{'total ms':>10}")
+    
+    for label, bbox_arg, zoom in VIEWPORTS:
+        bbox = parse_bbox(bbox_arg)
+        tolerance = zoom_tolerance(zoom, 2) if zoom is not None else 0.0
+        
+        if bbox:
+            query_ms, positions = best_of(lambda: station_table.within_bbox(bbox), args.repeat)
+            scan_ms, _ = best_of(lambda: linear_scan(stations, bbox, lambda s: (s.lat, s.lng, s.lat, s.lng)), args.repeat)
+            selected = [stations[i] for i in positions]
+        else:
+            query_ms = scan_ms = 0.0
+            selected = stations
+        if zoom is not None and zoom < STATION_DETAIL_MIN_ZOOM:
+            selected = [s for s in selected if s.type == 'Metro']
+        total_ms, body = best_of(lambda: station_payload(selected), args.repeat)
+        report('stations', label, len(selected), body, query_ms, scan_ms, query_ms + total_ms)
+        
+        if bbox:
+            query_ms, positions = best_of(lambda: route_index.query(bbox), args.repeat)
+            scan_ms, _ = best_of(lambda: linear_scan(routes, bbox, route_bounds), args.repeat)
+            selected = [routes[i] for i in positions]
+        else:
+            query_ms = scan_ms = 0.0
+            selected = routes
+        total_ms, body = best_of(lambda: route_payload(selected, tolerance), args.repeat)
+        report('routes', label, len(selected), body, query_ms, scan_ms, query_ms + total_ms)
+
+if __name__ == "__main__":
+    main()
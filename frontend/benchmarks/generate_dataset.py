@@ -0,0 +1,222 @@
+"""
+Synthetic dataset generator for the markdown data files.
+
+Writes lines.md, stations.md, tramstations.md, busstations.md,
+nightbusstations.md and routes.md in the same format as frontend/data, at
+any size, so DataLoader can be exercised at GTFS scale. Station names are
+unique German-style street and square names, every route gets a polyline
+wandering across Vienna and its stops are real stations of the generated
+set placed on that polyline, so station enrichment from route stops works
+as it does with the real data.
+
+    python benchmarks/generate_dataset.py --out /tmp/wl-data --stations 50000 --routes 1000 --points 800
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+# (station file, station type, line type, share of the stations)
+MODES = [
+    ('stations.md', 'Metro', 'Metro', 0.02),
+    ('tramstations.md', 'Tram', 'Tram', 0.18),
+    ('busstations.md', 'Bus', 'Bus', 0.60),
+    ('nightbusstations.md', 'NightBus', 'NightBus', 0.20)
+]
+
+# Heading of each line type in lines.md and routes.md
+SECTION_TITLES = {
+    'Metro': ('Metro Lines (U-Bahn)', 'Metro Routes (U-Bahn)'),
+    'Tram': ('Tram Lines (Straßenbahn)', 'Tram Routes'),
+    'Bus': ('Bus Lines (Autobus)', 'Bus Routes'),
+    'NightBus': ('Night Bus Lines (Nachtbus)', 'Night Bus Routes')
+}
+
+COLORS = {'Metro': '#FF0000', 'Tram': '#CC0000', 'Bus': '#0066CC', 'NightBus': '#000066'}
+
+NAME_FIRST = [
+    'Alt', 'Am', 'Berg', 'Birken', 'Blumen', 'Brunnen', 'Burg', 'Donau', 'Eichen', 'Erd', 'Feld', 'Fichten',
+    'Garten', 'Gold', 'Grün', 'Hafen', 'Hain', 'Heiligen', 'Hoch', 'Hof', 'Kaiser', 'Kirchen', 'Klee', 'Königs',
+    'Lerchen', 'Linden', 'Markt', 'Mühl', 'Neu', 'Nord', 'Ober', 'Ost', 'Park', 'Rosen', 'Sand', 'Schloss',
+    'Schön', 'See', 'Sonnen', 'Süd', 'Tal', 'Tannen', 'Unter', 'Wald', 'Wasser', 'Weiden', 'Wein', 'West',
+    'Wiesen', 'Zirkus'
+]
+NAME_SECOND = [
+    'acker', 'anger', 'au', 'bach', 'berg', 'brunn', 'bühel', 'dorf', 'eck', 'feld', 'graben', 'grund',
+    'hain', 'heim', 'hof', 'hügel', 'kreuz', 'leiten', 'lust', 'mühle', 'ried', 'ring', 'see', 'stein',
+    'tal', 'tor', 'wald', 'wart', 'weg', 'wiese'
+]
+NAME_SUFFIX = [
+    'gasse', 'straße', 'platz', 'weg', 'brücke', 'markt', 'kirche', 'park', 'hof', 'zeile', 'allee', 'ring'
+]
+
+# Bounding box the network is spread over (min_lat, min_lng, max_lat, max_lng)
+VIENNA_BBOX = (48.12, 16.18, 48.32, 16.58)
+
+@dataclass
+class GeneratedStation:
+    """A generated station."""
+    name: str
+    rbl: int
+    type: str
+
+def station_names(count: int, rng: random.Random) -> List[str]:
+    """Generate unique station names, numbering repeats once the combinations run out."""
+    combinations = [f"{a}{b}{c}" for a, b, c in itertools.product(NAME_FIRST, NAME_SECOND, NAME_SUFFIX)]
+    rng.shuffle(combinations)
+    names = []
+    for round_number in itertools.count(1):
+        for name in combinations:
+            names.append(name if round_number == 1 else f"{name} {round_number}")
+            if len(names) == count:
+                return names
+    return names
+
+def line_names(line_type: str, count: int) -> List[str]:
+    """Generate line names in the style DataLoader derives the line type from."""
+    if line_type == 'Metro':
+        return [f"U{i}" for i in range(1, count + 1)]
+    if line_type == 'Tram':
+        return [str(i) for i in range(1, count + 1)]
+    if line_type == 'Bus':
+        return [f"{i}A" for i in range(1, count + 1)]
+    return [f"N{i}" for i in range(1, count + 1)]
+
+def generate_stations(count: int, rng: random.Random) -> Dict[str, List[GeneratedStation]]:
+    """Generate stations split across the modes."""
+    names = station_names(count, rng)
+    stations: Dict[str, List[GeneratedStation]] = {}
+    start = 0
+    for index, (_, station_type, _, share) in enumerate(MODES):
+        end = count if index == len(MODES) - 1 else start + int(round(count * share))
+        stations[station_type] = [
+            GeneratedStation(name=name, rbl=10000 + start + offset, type=station_type)
+            for offset, name in enumerate(names[start:end])
+        ]
+        start = end
+    return stations
+
+def generate_polyline(points: int, rng: random.Random) -> List[Tuple[float, float]]:
+    """Generate a polyline wandering across the city, bouncing off the bounding box."""
+    min_lat, min_lng, max_lat, max_lng = VIENNA_BBOX
+    lat, lng = rng.uniform(min_lat, max_lat), rng.uniform(min_lng, max_lng)
+    d_lat, d_lng = rng.uniform(-0.0006, 0.0006), rng.uniform(-0.0009, 0.0009)
+    coordinates = []
+    for _ in range(points):
+        d_lat = -d_lat if not min_lat <= lat + d_lat <= max_lat else d_lat
+        d_lng = -d_lng if not min_lng <= lng + d_lng <= max_lng else d_lng
+        lat += d_lat + rng.uniform(-0.0001, 0.0001)
+        lng += d_lng + rng.uniform(-0.00015, 0.00015)
+        coordinates.append((round(lat, 6), round(lng, 6)))
+    return coordinates
+
+def write_station_files(out_dir: str, stations: Dict[str, List[GeneratedStation]], per_section: int = 30):
+    """Write the four station files, grouping stations into numbered lists under ### headings."""
+    for filename, station_type, _, _ in MODES:
+        with open(os.path.join(out_dir, filename), 'w', encoding='utf-8') as f:
+            f.write(f"# Vienna {station_type} Stations\n\n*Synthetic dataset*\n\n## {station_type} Stations\n")
+            mode_stations = stations[station_type]
+            for section, start in enumerate(range(0, len(mode_stations), per_section), 1):
+                f.write(f"\n### Section {section}\n\n")
+                for number, station in enumerate(mode_stations[start:start + per_section], 1):
+                    f.write(f"{number}. **{station.name}** - RBL: {station.rbl}, Type: {station.type}, Zone: 100\n")
+
+def generate_dataset(out_dir: str, stations: int = 10000, routes: int = 1000, points: int = 500,
+                     stops_per_route: int = 30, seed: int = 42) -> Dict[str, int]:
+    """Write a synthetic dataset into out_dir. Returns the generated counts."""
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    
+    all_stations = generate_stations(stations, rng)
+    write_station_files(out_dir, all_stations)
+    
+    # Routes are split across the line types like the stations, at least one each
+    route_counts = {line_type: max(1, int(round(routes * share))) for _, _, line_type, share in MODES}
+    lines_md = ["# Vienna Public Transport Lines\n"]
+    routes_md = ["# Vienna Public Transport Routes\n"]
+    coordinate_count = 0
+    
+    for _, station_type, line_type, _ in MODES:
+        line_title, route_title = SECTION_TITLES[line_type]
+        lines_md.append(f"\n## {line_title}\n")
+        routes_md.append(f"\n## {route_title}\n")
+        pool = all_stations[station_type] or [s for group in all_stations.values() for s in group]
+        
+        for name in line_names(line_type, route_counts[line_type]):
+            polyline = generate_polyline(points, rng)
+            stop_count = min(stops_per_route, len(pool), points)
+            first = rng.randrange(len(pool))
+            stops = [pool[(first + i) % len(pool)] for i in range(stop_count)]
+            stop_points = [polyline[i * (points - 1) // max(stop_count - 1, 1)] for i in range(stop_count)]
+            terminus = f"{stops[0].name} ↔ {stops[-1].name}"
+            description = f"Synthetic {line_type.lower()} line {name}"
+            length = f"{points * 0.08:.1f} km"
+            color = COLORS[line_type]
+            
+            lines_md.append(
+                f"\n### {name} - {terminus}\n"
+                f"- **Type**: {line_type}\n"
+                f"- **Length**: {length}\n"
+                f"- **Stations**: {stop_count}\n"
+                f"- **Color**: {color}\n"
+                f"- **Description**: {description}\n"
+                f"- **Frequency**: Every {rng.randint(2, 15)}-{rng.randint(16, 30)} minutes\n"
+                f"- **Operating Hours**: 5:00 AM - 1:00 AM\n"
+            )
+            
+            coordinate_lines = [f"    [{lat:.6f}, {lng:.6f}]," for lat, lng in polyline]
+            coordinate_lines[-1] = coordinate_lines[-1].rstrip(',')
+            stop_lines = [
+                "    " + json.dumps({'name': stop.name, 'lat': lat, 'lng': lng, 'rbl': stop.rbl}, ensure_ascii=False) + ','
+                for stop, (lat, lng) in zip(stops, stop_points)
+            ]
+            stop_lines[-1] = stop_lines[-1].rstrip(',')
+            routes_md.append(
+                f"\n### {name} Route - {terminus}\n"
+                f"- **Line**: {name}\n"
+                f"- **Type**: {line_type}\n"
+                f"- **Color**: {color}\n"
+                f"- **Length**: {length}\n"
+                f"- **Stations**: {stop_count}\n"
+                f"- **Description**: {description}\n"
+                f"- **Coordinates**: [\n" + '\n'.join(coordinate_lines) + "\n  ]\n"
+                f"- **Stops**: [\n" + '\n'.join(stop_lines) + "\n  ]\n"
+            )
+            coordinate_count += len(polyline)
+    
+    with open(os.path.join(out_dir, 'lines.md'), 'w', encoding='utf-8') as f:
+        f.write(''.join(lines_md))
+    with open(os.path.join(out_dir, 'routes.md'), 'w', encoding='utf-8') as f:
+        f.write(''.join(routes_md))
+    
+    return {
+        'stations': sum(len(group) for group in all_stations.values()),
+        'lines': sum(route_counts.values()),
+        'routes': sum(route_counts.values()),
+        'coordinates': coordinate_count
+    }
+
+def main():
+    """Generate a dataset from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', required=True, help='Directory to write the markdown files to')
+    parser.add_argument('--stations', type=int, default=10000, help='Number of stations')
+    parser.add_argument('--routes', type=int, default=1000, help='Number of lines/routes')
+    parser.add_argument('--points', type=int, default=500, help='Coordinates per route')
+    parser.add_argument('--stops', type=int, default=30, help='Stops per route')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+    
+    if os.path.abspath(args.out) == os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data')):
+        sys.exit("Refusing to overwrite the real data directory")
+    
+    counts = generate_dataset(args.out, args.stations, args.routes, args.points, args.stops, args.seed)
+    print(f"Wrote {counts['stations']} stations, {counts['routes']} lines and routes "
+          f"with {counts['coordinates']} coordinates to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,56 @@ containing information about lines, stations, routes, and disruptions.
 import os
 import json
 import re
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from dataclasses import astuple, dataclass, field, replace
 from datetime import datetime, timedelta
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from dataset_snapshot import DatasetSnapshotStore
+from station_table import StationRow, StationTable
 
 logger = logging.getLogger(__name__)
 
+# Station files and the kind of stations each holds, in load order
+STATION_FILES = (
+    ('stations.md', 'metro'),
+    ('tramstations.md', 'tram'),
+    ('busstations.md', 'bus'),
+    ('nightbusstations.md', 'night bus')
+)
+
+# Source files each dataset is parsed from. Stations also depend on routes.md,
+# which provides their coordinates.
+LINE_SOURCES = ('lines.md',)
+STATION_SOURCES = tuple(filename for filename, _ in STATION_FILES) + ('routes.md',)
+ROUTE_SOURCES = ('routes.md',)
+
+STATION_ITEM_RE = re.compile(r'^\d+\.')
+STATION_NAME_RE = re.compile(r'\*\*([^*]+)\*\*')
+STATION_RBL_RE = re.compile(r'RBL:\s*(\d+)')
+STATION_TYPE_RE = re.compile(r'Type:\s*(\w+)')
+STATION_ZONE_RE = re.compile(r'Zone:\s*(\d+)')
+
+# Fields indexed per dataset as (unique fields, grouped fields)
+INDEXED_FIELDS = {
+    'lines': (('name',), ('type',)),
+    'stations': (('rbl', 'name'), ('type', 'zone')),
+    'routes': (('line',), ('type',))
+}
+
+def _snapshot_row(item: Any) -> Tuple:
+    """Get a dataclass item as a snapshot row, storing NumPy arrays as their raw bytes."""
+    return tuple(value.tobytes() if isinstance(value, np.ndarray) else value for value in astuple(item))
+
+def normalize_station_name(name: str) -> str:
+    """Normalize a station name for matching, ignoring case and extra whitespace."""
+    return ' '.join(name.split()).casefold()
+
 @dataclass
 class Station:
     """Represents a transport station/stop."""
@@ -46,8 +89,22 @@ class Route:
     length: str
     stations: int
     description: str
-    coordinates: List[List[float]]
+    coordinates: np.ndarray
     stops: List[Dict[str, Any]]
+    
+    def __post_init__(self):
+        """Store the polyline as one read-only (n, 2) float64 lat/lng array.
+        
+        Accepts nested lists, a flat [lat, lng, lat, lng, ...] sequence or the
+        raw array bytes stored in snapshots.
+        """
+        if isinstance(self.coordinates, bytes):
+            coordinates = np.frombuffer(self.coordinates, dtype=np.float64)
+        else:
+            coordinates = np.array(self.coordinates, dtype=np.float64)
+        coordinates = coordinates.reshape(-1, 2)
+        coordinates.flags.writeable = False
+        self.coordinates = coordinates
 
 @dataclass
 class Disruption:
@@ -62,17 +119,34 @@ class Disruption:
     end_time: Optional[datetime]
     status: str
 
+@dataclass(frozen=True)
+class DatasetState:
+    """Immutable set of loaded datasets.
+    
+    DataLoader never modifies a published state; it builds a new one and
+    swaps the reference, so a reader that took a state sees it whole.
+    """
+    generation: int = 0
+    lines: Optional[List[Line]] = None
+    stations: Optional[StationTable] = None
+    routes: Optional[List[Route]] = None
+    disruptions: Optional[List[Disruption]] = None
+    versions: Dict[str, int] = field(default_factory=lambda: {'lines': 0, 'stations': 0, 'routes': 0})
+    last_loaded: Dict[str, datetime] = field(default_factory=dict)
+
 class DataLoader:
     """Main data loader class for parsing structured data files."""
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", use_snapshots: bool = True):
         """Initialize the data loader with the data directory path."""
         self.data_dir = data_dir
-        self._lines_cache = None
-        self._stations_cache = None
-        self._routes_cache = None
-        self._disruptions_cache = None
-        self._last_loaded = {}
+        self.snapshots = DatasetSnapshotStore(data_dir) if use_snapshots else None
+        self._state = DatasetState()
+        # Serializes writers; readers only read self._state and never take it
+        self._write_lock = threading.RLock()
+        self._indexes = {}
+        # Parse time in ms of each station file in the last cold parse
+        self.station_file_timings: Dict[str, float] = {}
     
     def _get_file_path(self, filename: str) -> str:
         """Get the full path to a data file."""
@@ -91,6 +165,63 @@ class DataLoader:
             logger.error(f"Error reading file {file_path}: {e}")
             return ""
     
+    def _publish(self, **datasets: List[Any]) -> DatasetState:
+        """Publish a new state with the given datasets replaced. Callers must hold the write lock."""
+        state = self._state
+        versions = dict(state.versions)
+        last_loaded = dict(state.last_loaded)
+        for dataset, items in datasets.items():
+            versions[dataset] += 1
+            if items:
+                last_loaded[dataset] = datetime.now()
+        
+        new_state = replace(state, generation=state.generation + 1, versions=versions,
+                            last_loaded=last_loaded, **datasets)
+        self._state = new_state
+        return new_state
+    
+    def get_state(self) -> DatasetState:
+        """Get the current dataset state."""
+        return self._state
+    
+    def get_dataset(self, dataset: str) -> Tuple[Sequence[Any], int]:
+        """Get a dataset ('lines', 'stations' or 'routes') together with its version.
+        
+        Both come from the same state, so derived data can safely be cached
+        under the returned version.
+        """
+        while True:
+            state = self._state
+            items = getattr(state, dataset)
+            if items is not None:
+                return items, state.versions[dataset]
+            getattr(self, f"load_{dataset}")()
+    
+    def _load_dataset(self, dataset: str, sources: tuple, item_class: type,
+                      parse: Callable[[], Sequence[Any]]) -> Sequence[Any]:
+        """Load a dataset from its compiled snapshot, parsing the markdown only if a source changed.
+        
+        item_class is either a dataclass, whose instances are stored as tuples,
+        or a table class with from_rows() and rows().
+        """
+        if self.snapshots is None:
+            return parse()
+        
+        is_table = hasattr(item_class, 'from_rows')
+        rows = self.snapshots.load(dataset, sources)
+        if rows is not None:
+            try:
+                return item_class.from_rows(rows) if is_table else [item_class(*row) for row in rows]
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Snapshot rows for {dataset} do not match {item_class.__name__}: {e}")
+        
+        fingerprints = self.snapshots.fingerprints(sources)
+        items = parse()
+        if items:
+            rows = items.rows() if is_table else [_snapshot_row(item) for item in items]
+            self.snapshots.save(dataset, fingerprints, rows)
+        return items
+    
     def _parse_markdown_sections(self, content: str) -> List[Dict[str, Any]]:
         """Parse markdown content into structured sections."""
         sections = []
@@ -114,7 +245,7 @@ class DataLoader:
                     'content': ''
                 }
                 current_lines = []
-                
+            
             elif line.startswith('### '):
                 # Save previous section
                 if current_section:
@@ -128,7 +259,7 @@ class DataLoader:
                     'content': ''
                 }
                 current_lines = []
-                
+            
             else:
                 current_lines.append(line)
         
@@ -187,7 +318,7 @@ class DataLoader:
                 frequency=properties.get('Frequency', ''),
                 operating_hours=properties.get('Operating Hours', '')
             )
-            
+        
         except Exception as e:
             logger.error(f"Error parsing line info: {e}")
             return None
@@ -212,53 +343,62 @@ class DataLoader:
             return match.group(1).strip(), match.group(2).strip()
         return None, None
     
-    def _parse_station_data(self, content: str) -> List[Station]:
-        """Parse station data from markdown content."""
-        stations = []
-        sections = self._parse_markdown_sections(content)
+    def _parse_station_lines(self, lines: Iterable[str]) -> List[Station]:
+        """Parse station data from markdown lines in a single pass.
         
-        for section in sections:
-            if section['level'] == 3:  # Individual station sections
-                station_data = self._extract_station_info(section)
-                if station_data:
-                    stations.extend(station_data)
-        
-        return stations
-    
-    def _extract_station_info(self, section: Dict[str, Any]) -> List[Station]:
-        """Extract station information from a section."""
+        Stations are the numbered list items of level 3 (###) sections.
+        """
         stations = []
-        content = section['content']
+        level = 0
         
-        # Parse numbered station list
-        for line in content.split('\n'):
-            if line.strip() and re.match(r'^\d+\.', line):
+        for line in lines:
+            line = line.strip()
+            if line.startswith('## '):
+                level = 2
+            elif line.startswith('### '):
+                level = 3
+            elif level == 3 and STATION_ITEM_RE.match(line):
                 station = self._parse_station_line(line)
                 if station:
                     stations.append(station)
         
         return stations
     
+    def _parse_station_file(self, filename: str) -> Tuple[List[Station], float]:
+        """Stream a station file through the parser. Returns the stations and the parse time in ms."""
+        start = time.perf_counter()
+        file_path = self._get_file_path(filename)
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                stations = self._parse_station_lines(f)
+        except FileNotFoundError:
+            logger.error(f"Data file not found: {file_path}")
+            stations = []
+        except Exception as e:
+            logger.error(f"Error reading file {file_path}: {e}")
+            stations = []
+        return stations, (time.perf_counter() - start) * 1000
+    
     def _parse_station_line(self, line: str) -> Optional[Station]:
         """Parse a station line in the format '1. **Name** - RBL: XXXX, Type: X, Zone: X'."""
         try:
             # Extract station name
-            name_match = re.search(r'\*\*([^*]+)\*\*', line)
+            name_match = STATION_NAME_RE.search(line)
             if not name_match:
                 return None
             
             name = name_match.group(1).strip()
             
             # Extract RBL
-            rbl_match = re.search(r'RBL:\s*(\d+)', line)
+            rbl_match = STATION_RBL_RE.search(line)
             rbl = rbl_match.group(1) if rbl_match else ''
             
             # Extract type
-            type_match = re.search(r'Type:\s*(\w+)', line)
+            type_match = STATION_TYPE_RE.search(line)
             station_type = type_match.group(1) if type_match else 'Unknown'
             
             # Extract zone
-            zone_match = re.search(r'Zone:\s*(\d+)', line)
+            zone_match = STATION_ZONE_RE.search(line)
             zone = zone_match.group(1) if zone_match else '100'
             
             return Station(
@@ -267,7 +407,7 @@ class DataLoader:
                 type=station_type,
                 zone=zone
             )
-            
+        
         except Exception as e:
             logger.error(f"Error parsing station line: {e}")
             return None
@@ -323,7 +463,7 @@ class DataLoader:
                 elif in_coordinates and line.startswith('['):
                     coords = self._parse_coordinate_line(line)
                     if coords:
-                        coordinates.append(coords)
+                        coordinates.extend(coords)
                 elif in_stops and line.startswith('{'):
                     stop = self._parse_stop_line(line)
                     if stop:
@@ -339,7 +479,7 @@ class DataLoader:
                 coordinates=coordinates,
                 stops=stops
             )
-            
+        
         except Exception as e:
             logger.error(f"Error parsing route info: {e}")
             return None
@@ -347,8 +487,8 @@ class DataLoader:
     def _parse_coordinate_line(self, line: str) -> Optional[List[float]]:
         """Parse a coordinate line in the format '[lat, lng]'."""
         try:
-            # Remove comments and extract coordinates
-            line = re.sub(r'//.*$', '', line).strip()
+            # Remove comments and the separating comma, then extract coordinates
+            line = re.sub(r'//.*$', '', line).strip().rstrip(',')
             if line.startswith('[') and line.endswith(']'):
                 coords_str = line[1:-1]
                 coords = [float(x.strip()) for x in coords_str.split(',')]
@@ -368,116 +508,76 @@ class DataLoader:
             logger.error(f"Error parsing stop line: {e}")
         return None
     
+    def _parse_lines_file(self) -> List[Line]:
+        """Parse lines.md."""
+        content = self._read_file('lines.md')
+        return self._parse_line_data(content) if content else []
+    
     def load_lines(self, force_reload: bool = False) -> List[Line]:
         """Load all transport lines from the data file."""
-        if not force_reload and self._lines_cache is not None:
-            return self._lines_cache
+        lines = self._state.lines
+        if not force_reload and lines is not None:
+            return lines
         
-        content = self._read_file('lines.md')
-        if content:
-            self._lines_cache = self._parse_line_data(content)
-            self._last_loaded['lines'] = datetime.now()
-            logger.info(f"Loaded {len(self._lines_cache)} lines")
-        else:
-            self._lines_cache = []
-        
-        return self._lines_cache
+        with self._write_lock:
+            lines = self._state.lines
+            if force_reload or lines is None:
+                lines = self._load_dataset('lines', LINE_SOURCES, Line, self._parse_lines_file)
+                self._publish(lines=lines)
+                if lines:
+                    logger.info(f"Loaded {len(lines)} lines")
+        return lines
     
-    def load_stations(self, force_reload: bool = False) -> List[Station]:
+    def load_stations(self, force_reload: bool = False) -> StationTable:
         """Load station data from all station files."""
-        if not force_reload and self._stations_cache is not None:
-            return self._stations_cache
+        all_stations = self._state.stations
+        if not force_reload and all_stations is not None:
+            return all_stations
         
+        with self._write_lock:
+            all_stations = self._state.stations
+            if force_reload or all_stations is None:
+                routes = self.load_routes()
+                all_stations = self._load_dataset('stations', STATION_SOURCES, StationTable,
+                                                  lambda: self._parse_station_table(routes))
+                self._publish(stations=all_stations)
+                logger.info(f"Total stations loaded: {len(all_stations)}")
+        return all_stations
+    
+    def _parse_station_table(self, routes: List[Route]) -> StationTable:
+        """Parse all station files into a column-oriented station table."""
+        return StationTable.from_stations(self._parse_station_files(routes))
+    
+    def _parse_station_files(self, routes: List[Route]) -> List[Station]:
+        """Parse all station files concurrently and populate station coordinates from the routes."""
         logger.info("Loading stations from all station files...")
         
-        all_stations = []
+        with ThreadPoolExecutor(max_workers=len(STATION_FILES), thread_name_prefix='station-files') as executor:
+            results = list(executor.map(lambda station_file: self._parse_station_file(station_file[0]),
+                                        STATION_FILES))
         
-        # Load from main stations.md (metro stations)
-        stations_content = self._read_file("stations.md")
-        if stations_content:
-            metro_stations = self._parse_station_data(stations_content)
-            all_stations.extend(metro_stations)
-            logger.info(f"Loaded {len(metro_stations)} metro stations")
-        
-        # Load from tramstations.md
-        tram_content = self._read_file("tramstations.md")
-        if tram_content:
-            tram_stations = self._parse_station_data(tram_content)
-            all_stations.extend(tram_stations)
-            logger.info(f"Loaded {len(tram_stations)} tram stations")
-        
-        # Load from busstations.md
-        bus_content = self._read_file("busstations.md")
-        if bus_content:
-            bus_stations = self._parse_station_data(bus_content)
-            all_stations.extend(bus_stations)
-            logger.info(f"Loaded {len(bus_stations)} bus stations")
-        
-        # Load from nightbusstations.md
-        nightbus_content = self._read_file("nightbusstations.md")
-        if nightbus_content:
-            nightbus_stations = self._parse_station_data(nightbus_content)
-            all_stations.extend(nightbus_stations)
-            logger.info(f"Loaded {len(nightbus_stations)} night bus stations")
+        all_stations = []
+        timings = {}
+        for (filename, kind), (stations, elapsed_ms) in zip(STATION_FILES, results):
+            all_stations.extend(stations)
+            timings[filename] = round(elapsed_ms, 2)
+            if stations:
+                logger.info(f"Loaded {len(stations)} {kind} stations from {filename} in {elapsed_ms:.1f} ms")
+        self.station_file_timings = timings
         
         # Populate coordinates for stations that don't have them
-        self._populate_station_coordinates(all_stations)
-        
-        self._stations_cache = all_stations
-        self._last_loaded['stations'] = datetime.now()
-        
-        logger.info(f"Total stations loaded: {len(all_stations)}")
+        self._populate_station_coordinates(all_stations, routes)
         return all_stations
     
-    def _populate_station_coordinates(self, stations: List[Station]):
-        """Populate station coordinates from routes data."""
+    def _populate_station_coordinates(self, stations: List[Station], routes: List[Route]):
+        """Populate station coordinates from the stops of the parsed routes."""
         try:
-            # Load routes to get coordinate data
-            routes_content = self._read_file('routes.md')
-            routes_sections = self._parse_markdown_sections(routes_content)
-            
-            # Create a mapping of station names to coordinates
-            station_coords = {}
-            
-            for section in routes_sections:
-                if section['level'] == 3:  # Individual route sections
-                    content = section['content']
-                    
-                    # Extract stops data
-                    for line in content.split('\n'):
-                        if line.strip().startswith('{"name":'):
-                            # Parse stop data
-                            try:
-                                # Simple JSON parsing for stop data
-                                line = line.strip().rstrip(',')
-                                if line.endswith(']'):
-                                    continue
-                                
-                                # Extract name, lat, lng, rbl from the line
-                                name_match = re.search(r'"name":\s*"([^"]+)"', line)
-                                lat_match = re.search(r'"lat":\s*([\d.]+)', line)
-                                lng_match = re.search(r'"lng":\s*([\d.]+)', line)
-                                rbl_match = re.search(r'"rbl":\s*(\d+)', line)
-                                
-                                if name_match and lat_match and lng_match:
-                                    name = name_match.group(1)
-                                    lat = float(lat_match.group(1))
-                                    lng = float(lng_match.group(1))
-                                    rbl = rbl_match.group(1) if rbl_match else ''
-                                    
-                                    station_coords[name] = {
-                                        'lat': lat,
-                                        'lng': lng,
-                                        'rbl': rbl
-                                    }
-                            except Exception as e:
-                                logger.debug(f"Error parsing stop line: {e}")
-                                continue
+            stop_coordinates = self._build_stop_coordinate_index(routes)
             
             # Update stations with coordinates
             for station in stations:
-                if station.name in station_coords:
-                    coords = station_coords[station.name]
+                coords = stop_coordinates.get(normalize_station_name(station.name))
+                if coords:
                     station.lat = coords['lat']
                     station.lng = coords['lng']
                     # Update RBL if not set
@@ -488,10 +588,31 @@ class DataLoader:
                     station.lat, station.lng = self._get_approximate_coordinates(station)
             
             logger.info(f"Populated coordinates for {len(stations)} stations")
-            
+        
         except Exception as e:
             logger.error(f"Error populating station coordinates: {e}")
     
+    def _build_stop_coordinate_index(self, routes: List[Route]) -> Dict[str, Dict[str, Any]]:
+        """Build a normalized stop name -> {lat, lng, rbl} index from the route stops.
+        
+        Built from the already parsed routes, so routes.md is never parsed a
+        second time for station enrichment. Later routes win when a stop name
+        appears more than once.
+        """
+        index = {}
+        for route in routes:
+            for stop in route.stops:
+                name, lat, lng = stop.get('name'), stop.get('lat'), stop.get('lng')
+                if not name or lat is None or lng is None:
+                    continue
+                rbl = stop.get('rbl')
+                index[normalize_station_name(name)] = {
+                    'lat': float(lat),
+                    'lng': float(lng),
+                    'rbl': str(rbl) if rbl is not None else ''
+                }
+        return index
+    
     def _get_approximate_coordinates(self, station: Station) -> tuple[float, float]:
         """Get approximate coordinates for stations without exact data."""
         # Vienna center coordinates
@@ -507,72 +628,132 @@ class DataLoader:
         
         return (vienna_center[0] + lat_offset, vienna_center[1] + lng_offset)
     
+    def _parse_routes_file(self) -> List[Route]:
+        """Parse routes.md."""
+        content = self._read_file('routes.md')
+        return self._parse_route_data(content) if content else []
+    
     def load_routes(self, force_reload: bool = False) -> List[Route]:
         """Load all routes from the data file."""
-        if not force_reload and self._routes_cache is not None:
-            return self._routes_cache
+        routes = self._state.routes
+        if not force_reload and routes is not None:
+            return routes
         
-        content = self._read_file('routes.md')
-        if content:
-            self._routes_cache = self._parse_route_data(content)
-            self._last_loaded['routes'] = datetime.now()
-            logger.info(f"Loaded {len(self._routes_cache)} routes")
-        else:
-            self._routes_cache = []
+        with self._write_lock:
+            routes = self._state.routes
+            if force_reload or routes is None:
+                routes = self._load_dataset('routes', ROUTE_SOURCES, Route, self._parse_routes_file)
+                self._publish(routes=routes)
+                if routes:
+                    logger.info(f"Loaded {len(routes)} routes")
+        return routes
+    
+    def reload(self) -> DatasetState:
+        """Rebuild every dataset from the data files and publish them in one atomic swap.
+        
+        The new datasets are built while readers keep using the current state,
+        which stays in place if the rebuild fails.
+        """
+        with self._write_lock:
+            lines = self._load_dataset('lines', LINE_SOURCES, Line, self._parse_lines_file)
+            routes = self._load_dataset('routes', ROUTE_SOURCES, Route, self._parse_routes_file)
+            stations = self._load_dataset('stations', STATION_SOURCES, StationTable,
+                                          lambda: self._parse_station_table(routes))
+            state = self._publish(lines=lines, stations=stations, routes=routes)
         
-        return self._routes_cache
+        logger.info(f"Reloaded data as generation {state.generation}: {len(lines)} lines, "
+                    f"{len(stations)} stations, {len(routes)} routes")
+        return state
+    
+    def _get_indexes(self, dataset: str) -> Dict[str, Dict[Any, Any]]:
+        """Get the lookup indexes of a dataset, building them once per dataset version.
+        
+        Unique fields map a value to the first item that has it; grouped fields
+        map the lowercased value to the list of items that have it.
+        """
+        items, version = self.get_dataset(dataset)
+        cached = self._indexes.get(dataset)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        unique_fields, grouped_fields = INDEXED_FIELDS[dataset]
+        indexes = {}
+        for field in unique_fields:
+            index = {}
+            for item in items:
+                index.setdefault(getattr(item, field), item)
+            indexes[field] = index
+        for field in grouped_fields:
+            index = {}
+            for item in items:
+                index.setdefault(str(getattr(item, field)).lower(), []).append(item)
+            indexes[field] = index
+        
+        # Publish with a single assignment so readers see either the old or the new indexes
+        self._indexes[dataset] = (version, indexes)
+        logger.debug(f"Built {dataset} indexes for version {version}")
+        return indexes
     
     def get_line_by_name(self, line_name: str) -> Optional[Line]:
         """Get a specific line by name."""
-        lines = self.load_lines()
-        for line in lines:
-            if line.name == line_name:
-                return line
-        return None
+        return self._get_indexes('lines')['name'].get(line_name)
     
-    def get_station_by_rbl(self, rbl: str) -> Optional[Station]:
+    def get_station_by_rbl(self, rbl: str) -> Optional[StationRow]:
         """Get a specific station by RBL number."""
-        stations = self.load_stations()
-        for station in stations:
-            if station.rbl == rbl:
-                return station
-        return None
+        return self._get_indexes('stations')['rbl'].get(rbl)
+    
+    def get_station_by_name(self, name: str) -> Optional[StationRow]:
+        """Get a specific station by name."""
+        return self._get_indexes('stations')['name'].get(name)
     
     def get_route_by_line(self, line_name: str) -> Optional[Route]:
         """Get a specific route by line name."""
-        routes = self.load_routes()
-        for route in routes:
-            if route.line == line_name:
-                return route
-        return None
+        return self._get_indexes('routes')['line'].get(line_name)
     
     def get_lines_by_type(self, line_type: str) -> List[Line]:
         """Get all lines of a specific type."""
-        lines = self.load_lines()
-        return [line for line in lines if line.type.lower() == line_type.lower()]
+        return list(self._get_indexes('lines')['type'].get(line_type.lower(), ()))
     
-    def get_stations_by_type(self, station_type: str) -> List[Station]:
+    def get_stations_by_type(self, station_type: str) -> List[StationRow]:
         """Get all stations of a specific type."""
-        stations = self.load_stations()
-        return [station for station in stations if station.type.lower() == station_type.lower()]
+        return list(self._get_indexes('stations')['type'].get(station_type.lower(), ()))
+    
+    def get_stations_by_zone(self, zone: str) -> List[StationRow]:
+        """Get all stations in a specific fare zone."""
+        return list(self._get_indexes('stations')['zone'].get(str(zone).lower(), ()))
+    
+    def get_dataset_version(self, dataset: str) -> int:
+        """Get the version of a dataset ('lines', 'stations' or 'routes').
+        
+        The version changes every time the dataset is (re)loaded, so it can be
+        used to invalidate anything derived from the data.
+        """
+        return self._state.versions[dataset]
+    
+    def get_generation(self) -> int:
+        """Get the generation of the current state, bumped on every publish."""
+        return self._state.generation
     
     def clear_cache(self):
         """Clear all cached data."""
-        self._lines_cache = None
-        self._stations_cache = None
-        self._routes_cache = None
-        self._disruptions_cache = None
-        self._last_loaded = {}
+        with self._write_lock:
+            state = self._state
+            self._state = DatasetState(generation=state.generation + 1, versions=dict(state.versions))
         logger.info("Data cache cleared")
     
     def get_cache_status(self) -> Dict[str, Any]:
         """Get the status of cached data."""
+        state = self._state
         return {
-            'lines_loaded': self._lines_cache is not None,
-            'stations_loaded': self._stations_cache is not None,
-            'routes_loaded': self._routes_cache is not None,
-            'disruptions_loaded': self._disruptions_cache is not None,
-            'last_loaded': self._last_loaded
+            'lines_loaded': state.lines is not None,
+            'stations_loaded': state.stations is not None,
+            'routes_loaded': state.routes is not None,
+            'disruptions_loaded': state.disruptions is not None,
+            'last_loaded': state.last_loaded,
+            'generation': state.generation,
+            'versions': dict(state.versions),
+            'station_file_timings': dict(self.station_file_timings),
+            'snapshots': self.snapshots.get_status() if self.snapshots is not None else None
         }
 
 # Global data loader instance
@@ -0,0 +1,136 @@
+"""
+Data File Watcher for Wiener Linien Live Map
+
+This module watches the markdown data directory and hot-reloads the datasets
+when a file is added, removed or modified. It polls file sizes and mtimes, so
+it works everywhere without extra dependencies, and waits until a change has
+settled before reloading so half-written files are not picked up.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# filename -> (size, mtime_ns)
+Signature = Dict[str, Tuple[int, int]]
+
+class DataFileWatcher:
+    """Polls a data directory and calls on_change once its files changed and settled."""
+    
+    def __init__(self, data_dir: str, on_change: Callable[[], Any],
+                 interval: float = 5.0, extensions: Tuple[str, ...] = ('.md',)):
+        """Initialize the watcher."""
+        self.data_dir = data_dir
+        self.on_change = on_change
+        self.interval = interval
+        self.extensions = extensions
+        
+        self.running = False
+        self.watch_thread = None
+        self._stop = threading.Event()
+        self._applied = self._signature()
+        self._pending: Optional[Signature] = None
+        self.stats = {'checks': 0, 'reloads': 0, 'errors': 0}
+        self.last_reload: Optional[float] = None
+    
+    def _signature(self) -> Signature:
+        """Get the size and mtime of every watched file."""
+        signature = {}
+        try:
+            with os.scandir(self.data_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.endswith(self.extensions):
+                        stat = entry.stat()
+                        signature[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            pass
+        return signature
+    
+    def check(self) -> bool:
+        """Check for changes once. Returns True if a reload was triggered.
+        
+        A change is only acted on when two consecutive checks see the same
+        signature, so files that are still being written are not loaded.
+        """
+        self.stats['checks'] += 1
+        current = self._signature()
+        if current == self._applied:
+            self._pending = None
+            return False
+        if current != self._pending:
+            self._pending = current
+            return False
+        
+        changed = sorted(
+            name for name in set(current) | set(self._applied)
+            if current.get(name) != self._applied.get(name)
+        )
+        logger.info(f"Data files changed: {', '.join(changed)}, reloading")
+        try:
+            self.on_change()
+        except Exception as e:
+            # Keep the old signature so the reload is retried on the next check
+            self.stats['errors'] += 1
+            logger.error(f"Error reloading data files: {e}", exc_info=True)
+            return False
+        
+        self._applied = current
+        self._pending = None
+        self.stats['reloads'] += 1
+        self.last_reload = time.time()
+        return True
+    
+    def start(self):
+        """Start watching in the background."""
+        if not self.running:
+            self.running = True
+            self._stop.clear()
+            self.watch_thread = threading.Thread(target=self._watch_loop, daemon=True)
+            self.watch_thread.start()
+            logger.info(f"Watching {self.data_dir} for data file changes every {self.interval}s")
+    
+    def stop(self):
+        """Stop watching."""
+        self.running = False
+        self._stop.set()
+        if self.watch_thread:
+            self.watch_thread.join(timeout=5)
+        logger.info("Data file watcher stopped")
+    
+    def _watch_loop(self):
+        """Main watch loop."""
+        while self.running and not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Error in data file watcher: {e}")
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get watcher status."""
+        return {
+            'running': self.running,
+            'data_dir': self.data_dir,
+            'interval_seconds': self.interval,
+            'watched_files': len(self._applied),
+            'last_reload': self.last_reload,
+            **self.stats
+        }
+
+# Global data file watcher instance
+data_watcher = None
+
+def init_data_watcher(**kwargs) -> DataFileWatcher:
+    """Initialize and start the global data file watcher."""
+    global data_watcher
+    data_watcher = DataFileWatcher(**kwargs)
+    data_watcher.start()
+    return data_watcher
+
+def get_data_watcher() -> Optional[DataFileWatcher]:
+    """Get the global data file watcher instance."""
+    return data_watcher
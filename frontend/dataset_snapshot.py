@@ -0,0 +1,138 @@
+"""
+Dataset Snapshots for Wiener Linien Live Map
+
+This module stores the parsed markdown datasets as compiled snapshots next to
+the data files, so a new process can load them without re-running the
+markdown parsers. Every snapshot records the size, mtime and SHA-256 of its
+source files and is only used while those sources are unchanged.
+
+A snapshot file holds two marshal records: a small header with the source
+fingerprints, followed by the dataset rows as plain tuples. The header is
+checked before the rows are read.
+"""
+
+import hashlib
+import logging
+import marshal
+import os
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump when the row layout of a dataset or the markdown parsers change
+SNAPSHOT_FORMAT = 3
+
+# (size, mtime_ns, sha256) of a source file, or None if it does not exist
+Fingerprint = Optional[Tuple[int, int, str]]
+
+def _sha256(path: str) -> str:
+    """Hash a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class DatasetSnapshotStore:
+    """Reads and writes compiled dataset snapshots keyed by their source files."""
+    
+    def __init__(self, data_dir: str, snapshot_dir: Optional[str] = None):
+        """Initialize the store. Snapshots default to a .snapshots directory inside data_dir."""
+        self.data_dir = data_dir
+        self.snapshot_dir = snapshot_dir or os.path.join(data_dir, '.snapshots')
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0}
+    
+    def _snapshot_path(self, dataset: str) -> str:
+        """Get the snapshot file of a dataset."""
+        return os.path.join(self.snapshot_dir, f"{dataset}.snap")
+    
+    def fingerprint(self, filename: str) -> Fingerprint:
+        """Get the fingerprint of a source file."""
+        path = os.path.join(self.data_dir, filename)
+        try:
+            stat = os.stat(path)
+            return (stat.st_size, stat.st_mtime_ns, _sha256(path))
+        except FileNotFoundError:
+            return None
+    
+    def fingerprints(self, sources: Sequence[str]) -> Dict[str, Fingerprint]:
+        """Get the fingerprints of several source files."""
+        return {filename: self.fingerprint(filename) for filename in sources}
+    
+    def _source_matches(self, filename: str, recorded: Fingerprint) -> bool:
+        """Check a source file against its recorded fingerprint, hashing only if the mtime changed."""
+        path = os.path.join(self.data_dir, filename)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return recorded is None
+        if recorded is None or stat.st_size != recorded[0]:
+            return False
+        if stat.st_mtime_ns == recorded[1]:
+            return True
+        # Touched but possibly unchanged (e.g. after a checkout)
+        return _sha256(path) == recorded[2]
+    
+    def load(self, dataset: str, sources: Sequence[str]) -> Optional[List[Tuple]]:
+        """Load the rows of a dataset snapshot, or None if it is missing or out of date."""
+        path = self._snapshot_path(dataset)
+        try:
+            with open(path, 'rb') as f:
+                header = marshal.load(f)
+                if (not isinstance(header, dict)
+                        or header.get('format') != SNAPSHOT_FORMAT
+                        or header.get('python') != tuple(sys.version_info[:2])
+                        or header.get('dataset') != dataset
+                        or sorted(header.get('sources', {})) != sorted(sources)):
+                    self.stats['misses'] += 1
+                    return None
+                for filename, recorded in header['sources'].items():
+                    if not self._source_matches(filename, recorded):
+                        logger.info(f"Snapshot for {dataset} is out of date: {filename} changed")
+                        self.stats['misses'] += 1
+                        return None
+                rows = marshal.load(f)
+        except FileNotFoundError:
+            self.stats['misses'] += 1
+            return None
+        except (OSError, EOFError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+            self.stats['misses'] += 1
+            return None
+        
+        self.stats['hits'] += 1
+        logger.info(f"Loaded {len(rows)} {dataset} from snapshot")
+        return rows
+    
+    def save(self, dataset: str, fingerprints: Dict[str, Fingerprint], rows: List[Tuple]) -> bool:
+        """Write a dataset snapshot atomically.
+        
+        The fingerprints must be taken before the sources were parsed, so a
+        source that changes during parsing invalidates the snapshot.
+        """
+        header = {
+            'format': SNAPSHOT_FORMAT,
+            'python': tuple(sys.version_info[:2]),
+            'dataset': dataset,
+            'sources': fingerprints
+        }
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.snapshot_dir, prefix=f".{dataset}_", suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                marshal.dump(header, f)
+                marshal.dump(rows, f)
+            os.replace(temp_path, self._snapshot_path(dataset))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not write {dataset} snapshot: {e}")
+            return False
+        
+        self.stats['writes'] += 1
+        logger.info(f"Wrote {dataset} snapshot with {len(rows)} rows")
+        return True
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get snapshot counters."""
+        return {'snapshot_dir': self.snapshot_dir, **self.stats}
@@ -11,10 +11,13 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 from enum import Enum
-import requests
 import threading
 import time
 
+from rate_limiter import upstream_limiter
+from single_flight import upstream_flights
+from upstream_client import upstream_client
+
 logger = logging.getLogger(__name__)
 
 class DisruptionSeverity(Enum):
@@ -65,6 +68,18 @@ class DisruptionAlert:
     url: Optional[str] = None
     contact_info: Optional[str] = None
 
+@upstream_flights.coalesce('trafficInfo')
+@upstream_limiter.limit('trafficInfo')
+def fetch_traffic_info() -> Optional[Dict[str, Any]]:
+    """Fetch traffic information from Wiener Linien API."""
+    return upstream_client.get_json('trafficInfo')
+
+@upstream_flights.coalesce('news')
+@upstream_limiter.limit('news')
+def fetch_news() -> Optional[Dict[str, Any]]:
+    """Fetch news and announcements from Wiener Linien API."""
+    return upstream_client.get_json('news')
+
 class DisruptionMonitor:
     """Monitors and tracks service disruptions."""
     
@@ -77,10 +92,6 @@ class DisruptionMonitor:
         self.last_check = None
         self.check_interval = 60  # Check every 60 seconds
         
-        # API configuration
-        self.api_base_url = "https://www.wienerlinien.at/ogd_realtime"
-        self.api_timeout = 10
-        
         # Alert thresholds
         self.severity_thresholds = {
             DisruptionSeverity.LOW: 5,      # 5 minutes delay
@@ -123,12 +134,12 @@ class DisruptionMonitor:
         """Check for new disruptions from the API."""
         try:
             # Fetch traffic information from Wiener Linien API
-            traffic_info = self._fetch_traffic_info()
+            traffic_info = fetch_traffic_info()
             if traffic_info:
                 self._process_traffic_info(traffic_info)
             
             # Fetch news and announcements
-            news_info = self._fetch_news()
+            news_info = fetch_news()
             if news_info:
                 self._process_news_info(news_info)
             
@@ -137,34 +148,6 @@ class DisruptionMonitor:
         except Exception as e:
             logger.error(f"Error checking disruptions: {e}")
     
-    def _fetch_traffic_info(self) -> Optional[Dict[str, Any]]:
-        """Fetch traffic information from the API."""
-        try:
-            url = f"{self.api_base_url}/trafficInfo"
-            response = requests.get(url, timeout=self.api_timeout)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching traffic info: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Error processing traffic info: {e}")
-            return None
-    
-    def _fetch_news(self) -> Optional[Dict[str, Any]]:
-        """Fetch news and announcements from the API."""
-        try:
-            url = f"{self.api_base_url}/news"
-            response = requests.get(url, timeout=self.api_timeout)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching news: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Error processing news: {e}")
-            return None
-    
     def _process_traffic_info(self, traffic_info: Dict[str, Any]):
         """Process traffic information and extract disruptions."""
         try:
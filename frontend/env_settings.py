@@ -0,0 +1,27 @@
+"""
+Environment Settings for Wiener Linien Live Map
+
+This module reads numeric settings from WL_* environment variables, falling
+back to the default (with a warning) when a value is malformed.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment."""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        logger.warning(f"Invalid value for {name}, using default {default}")
+        return default
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment."""
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        logger.warning(f"Invalid value for {name}, using default {default}")
+        return default
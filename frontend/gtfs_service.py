@@ -3,11 +3,21 @@ GTFS Service for handling GTFS data processing.
 """
 import os
 import csv
-from datetime import datetime, date
-from typing import Dict, List, Optional, Set, Tuple
+import sys
+import threading
+from array import array
+from datetime import datetime, date, timedelta
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
 from dataclasses import dataclass
 import logging
 
+import numpy as np
+
+from service_calendar import CalendarException, ServiceCalendar
+from station_table import EARTH_RADIUS_M
+from station_search import fold_name
+from stop_times_table import StopDepartures, StopTimesTable, TripStopTimes, format_gtfs_time, parse_gtfs_time
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -29,6 +39,36 @@ class GTFSTrip:
     block_id: str
     shape_id: str
 
+@dataclass
+class GTFSRoute:
+    """Represents a GTFS route."""
+    route_id: str
+    route_short_name: str
+    route_long_name: str
+    route_type: int
+
+@dataclass
+class GTFSStop:
+    """Represents a GTFS stop."""
+    stop_id: str
+    stop_name: str
+    stop_lat: Optional[float]
+    stop_lon: Optional[float]
+
+def _group_index(keys: np.ndarray, group_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Group positions by an integer key in [0, group_count); negative keys are left out.
+    
+    Returns (positions, offsets): the positions with key k are
+    positions[offsets[k]:offsets[k + 1]], in ascending order.
+    """
+    valid = np.flatnonzero(keys >= 0)
+    positions = valid[np.argsort(keys[valid], kind='stable')].astype(np.int32)
+    offsets = np.zeros(group_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys[valid], minlength=group_count), out=offsets[1:])
+    positions.flags.writeable = False
+    offsets.flags.writeable = False
+    return positions, offsets
+
 class GTFSService:
     """Service for handling GTFS data processing."""
     
@@ -36,26 +76,82 @@ class GTFSService:
         """Initialize with path to extracted GTFS directory."""
         self.gtfs_dir = gtfs_dir
         self.calendar_entries: Dict[str, GTFSDateRange] = {}
+        self.calendar_exceptions: List[CalendarException] = []
+        self.calendar: Optional[ServiceCalendar] = None
         self.trips: List[GTFSTrip] = []
+        # trip_id -> position in self.trips
+        self.trip_index: Dict[str, int] = {}
+        # route_id -> position in self.route_ids; per trip, the route and calendar.service_ids position (-1 if unknown)
+        self.route_ids: List[str] = []
+        self.route_index: Dict[str, int] = {}
+        self.trip_route = np.zeros(0, dtype=np.int32)
+        self.trip_service = np.zeros(0, dtype=np.int32)
+        # Per trip, the position in self.shape_ids of its shape (-1 if it has none)
+        self.trip_shape = np.zeros(0, dtype=np.int32)
+        # Trip positions grouped by route and by service (see _group_index)
+        self._route_trips = (np.zeros(0, dtype=np.int32), np.zeros(1, dtype=np.int64))
+        self._service_trips = (np.zeros(0, dtype=np.int32), np.zeros(1, dtype=np.int64))
+        # calendar day -> read-only mask over self.trips of the trips running that day
+        self._active_trips: Dict[int, np.ndarray] = {}
+        self.routes: Dict[str, GTFSRoute] = {}
+        self.stops: Dict[str, GTFSStop] = {}
+        # Stop ids of stops.txt, then of stops only found in stop_times.txt, and their positions
+        self.stop_ids: List[str] = []
+        self.stop_index: Dict[str, int] = {}
+        # Folded stop name -> stop positions
+        self.stops_by_name: Dict[str, List[int]] = {}
+        # Shape points of shape i are shape_lat/shape_lon[shape_offsets[i]:shape_offsets[i + 1]],
+        # with shape_dist the distance in meters along the shape from its first point
+        self.shape_ids: List[str] = []
+        self.shape_index: Dict[str, int] = {}
+        self.shape_offsets = np.zeros(1, dtype=np.int64)
+        self.shape_lat = np.zeros(0, dtype=np.float64)
+        self.shape_lon = np.zeros(0, dtype=np.float64)
+        self.shape_dist = np.zeros(0, dtype=np.float64)
+        self.stop_times: Optional[StopTimesTable] = None
+        self.stop_departures: Optional[StopDepartures] = None
+        self._load_lock = threading.Lock()
         self._loaded = False
     
     def load_data(self) -> None:
         """Load all GTFS data into memory."""
         if self._loaded:
             return
+        
+        with self._load_lock:
+            if self._loaded:
+                return
             
-        logger.info("Loading GTFS data...")
-        self._load_calendar()
-        self._load_trips()
-        self._loaded = True
-        logger.info(f"GTFS data loaded: {len(self.calendar_entries)} calendar entries, {len(self.trips)} trips")
+            logger.info("Loading GTFS data...")
+            self._load_calendar()
+            self._load_calendar_dates()
+            self.calendar = ServiceCalendar(self.calendar_entries, self.calendar_exceptions)
+            self._load_routes()
+            self._load_trips()
+            self._load_shapes()
+            self._build_trip_indexes()
+            self._load_stops()
+            self._load_stop_times()
+            if self.stop_times is not None:
+                self.stop_departures = StopDepartures(self.stop_times, len(self.stop_ids))
+            self._loaded = True
+            logger.info(f"GTFS data loaded: {len(self.calendar_entries)} calendar entries, {len(self.trips)} trips, "
+                        f"{len(self.stop_times) if self.stop_times is not None else 0} stop times")
+    
+    def is_loaded(self) -> bool:
+        """Check whether load_data has finished, without loading."""
+        return self._loaded
+    
+    def has_schedule(self) -> bool:
+        """Check whether stop times are loaded, i.e. schedule queries can return anything."""
+        return self._loaded and self.stop_times is not None and len(self.stop_times) > 0
     
     def _load_calendar(self) -> None:
         """Load calendar.txt data."""
         calendar_path = os.path.join(self.gtfs_dir, 'calendar.txt')
         
         try:
-            with open(calendar_path, 'r', encoding='utf-8') as f:
+            with open(calendar_path, 'r', encoding='utf-8-sig') as f:
                 reader = csv.DictReader(f)
                 for row in reader:
                     try:
@@ -85,12 +181,96 @@ class GTFSService:
         except Exception as e:
             logger.error(f"Error loading calendar data: {e}")
     
+    def _load_calendar_dates(self) -> None:
+        """Load calendar_dates.txt exceptions."""
+        calendar_dates_path = os.path.join(self.gtfs_dir, 'calendar_dates.txt')
+        
+        try:
+            with open(calendar_dates_path, 'r', encoding='utf-8-sig') as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    try:
+                        self.calendar_exceptions.append((
+                            row['service_id'],
+                            datetime.strptime(row['date'], '%Y%m%d').date(),
+                            int(row['exception_type'])
+                        ))
+                    except (KeyError, ValueError) as e:
+                        logger.warning(f"Invalid calendar date entry: {row}. Error: {e}")
+                        continue
+            
+            logger.info(f"Loaded {len(self.calendar_exceptions)} calendar date exceptions")
+            
+        except FileNotFoundError:
+            logger.info(f"calendar_dates.txt not found in {self.gtfs_dir}")
+        except Exception as e:
+            logger.error(f"Error loading calendar dates data: {e}")
+    
+    def _load_routes(self) -> None:
+        """Load routes.txt data."""
+        routes_path = os.path.join(self.gtfs_dir, 'routes.txt')
+        
+        try:
+            with open(routes_path, 'r', encoding='utf-8-sig') as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    try:
+                        route = GTFSRoute(
+                            route_id=row['route_id'],
+                            route_short_name=row.get('route_short_name', ''),
+                            route_long_name=row.get('route_long_name', ''),
+                            route_type=int(row.get('route_type') or 3)
+                        )
+                        self.routes[route.route_id] = route
+                    except (KeyError, ValueError) as e:
+                        logger.warning(f"Invalid route entry: {row}. Error: {e}")
+                        continue
+            
+            logger.info(f"Loaded {len(self.routes)} routes")
+            
+        except FileNotFoundError:
+            logger.warning(f"routes.txt not found in {self.gtfs_dir}")
+        except Exception as e:
+            logger.error(f"Error loading routes data: {e}")
+    
+    def _load_stops(self) -> None:
+        """Load stops.txt data and index the stops by position and name."""
+        stops_path = os.path.join(self.gtfs_dir, 'stops.txt')
+        
+        try:
+            with open(stops_path, 'r', encoding='utf-8-sig') as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    try:
+                        stop = GTFSStop(
+                            stop_id=sys.intern(row['stop_id']),
+                            stop_name=row.get('stop_name', ''),
+                            stop_lat=float(row['stop_lat']) if row.get('stop_lat') else None,
+                            stop_lon=float(row['stop_lon']) if row.get('stop_lon') else None
+                        )
+                    except (KeyError, ValueError) as e:
+                        logger.warning(f"Invalid stop entry: {row}. Error: {e}")
+                        continue
+                    if stop.stop_id in self.stops:
+                        continue
+                    self.stops[stop.stop_id] = stop
+                    self.stop_index[stop.stop_id] = len(self.stop_ids)
+                    self.stops_by_name.setdefault(fold_name(stop.stop_name), []).append(len(self.stop_ids))
+                    self.stop_ids.append(stop.stop_id)
+            
+            logger.info(f"Loaded {len(self.stops)} stops")
+            
+        except FileNotFoundError:
+            logger.warning(f"stops.txt not found in {self.gtfs_dir}")
+        except Exception as e:
+            logger.error(f"Error loading stops data: {e}")
+    
     def _load_trips(self) -> None:
         """Load trips.txt data."""
         trips_path = os.path.join(self.gtfs_dir, 'trips.txt')
         
         try:
-            with open(trips_path, 'r', encoding='utf-8') as f:
+            with open(trips_path, 'r', encoding='utf-8-sig') as f:
                 reader = csv.DictReader(f)
                 for row in reader:
                     try:
@@ -103,6 +283,7 @@ class GTFSService:
                             block_id=row.get('block_id', ''),
                             shape_id=row.get('shape_id', '')
                         )
+                        self.trip_index.setdefault(trip.trip_id, len(self.trips))
                         self.trips.append(trip)
                     except (KeyError, ValueError) as e:
                         logger.warning(f"Invalid trip entry: {row}. Error: {e}")
@@ -115,45 +296,321 @@ class GTFSService:
         except Exception as e:
             logger.error(f"Error loading trips data: {e}")
     
-    def get_active_services(self, target_date: Optional[date] = None) -> Set[str]:
-        """Get set of service_ids that are active on the given date."""
+    def _load_shapes(self) -> None:
+        """Load shapes.txt into flat coordinate arrays grouped by shape."""
+        shapes_path = os.path.join(self.gtfs_dir, 'shapes.txt')
+        shape_column, sequence_column = array('i'), array('q')
+        lat_column, lon_column = array('d'), array('d')
+        
+        try:
+            with open(shapes_path, 'r', encoding='utf-8-sig', newline='') as f:
+                reader = csv.reader(f)
+                header = {name.strip(): i for i, name in enumerate(next(reader))}
+                shape_col, lat_col, lon_col, sequence_col = (
+                    header[name] for name in ('shape_id', 'shape_pt_lat', 'shape_pt_lon', 'shape_pt_sequence')
+                )
+                
+                for row in reader:
+                    try:
+                        shape = self.shape_index.get(row[shape_col])
+                        if shape is None:
+                            shape = self.shape_index[row[shape_col]] = len(self.shape_ids)
+                            self.shape_ids.append(sys.intern(row[shape_col]))
+                        point = (float(row[lat_col]), float(row[lon_col]), int(row[sequence_col]))
+                    except (IndexError, ValueError) as e:
+                        logger.warning(f"Invalid shape entry: {row}. Error: {e}")
+                        continue
+                    shape_column.append(shape)
+                    lat_column.append(point[0])
+                    lon_column.append(point[1])
+                    sequence_column.append(point[2])
+            
+        except FileNotFoundError:
+            logger.info(f"shapes.txt not found in {self.gtfs_dir}")
+            return
+        except KeyError as e:
+            logger.error(f"shapes.txt is missing column {e}")
+            return
+        except Exception as e:
+            logger.error(f"Error loading shapes data: {e}")
+            return
+        
+        shapes = np.asarray(shape_column, dtype=np.int32)
+        order = np.lexsort((np.asarray(sequence_column), shapes))
+        shapes = shapes[order]
+        self.shape_lat = np.asarray(lat_column)[order]
+        self.shape_lon = np.asarray(lon_column)[order]
+        self.shape_offsets = np.zeros(len(self.shape_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(shapes, minlength=len(self.shape_ids)), out=self.shape_offsets[1:])
+        
+        # Equirectangular segment lengths are accurate to well under a meter at city scale
+        lat_rad, lon_rad = np.radians(self.shape_lat), np.radians(self.shape_lon)
+        d_north = np.diff(lat_rad)
+        d_east = np.diff(lon_rad) * np.cos((lat_rad[1:] + lat_rad[:-1]) / 2)
+        steps = EARTH_RADIUS_M * np.hypot(d_north, d_east)
+        steps[np.diff(shapes) != 0] = 0
+        self.shape_dist = np.concatenate(([0.0], np.cumsum(steps)))[:len(shapes)]
+        self.shape_dist -= self.shape_dist[np.repeat(self.shape_offsets[:-1], np.diff(self.shape_offsets))]
+        for column in (self.shape_offsets, self.shape_lat, self.shape_lon, self.shape_dist):
+            column.flags.writeable = False
+        
+        logger.info(f"Loaded {len(self.shape_ids)} shapes with {len(self.shape_lat)} points")
+    
+    def _build_trip_indexes(self) -> None:
+        """Build the route -> trips and service -> trips index arrays."""
+        for trip in self.trips:
+            if trip.route_id not in self.route_index:
+                self.route_index[trip.route_id] = len(self.route_ids)
+                self.route_ids.append(trip.route_id)
+        
+        service_index = self.calendar.service_index
+        self.trip_route = np.fromiter((self.route_index[t.route_id] for t in self.trips),
+                                      dtype=np.int32, count=len(self.trips))
+        self.trip_service = np.fromiter((service_index.get(t.service_id, -1) for t in self.trips),
+                                        dtype=np.int32, count=len(self.trips))
+        self.trip_shape = np.fromiter((self.shape_index.get(t.shape_id, -1) for t in self.trips),
+                                      dtype=np.int32, count=len(self.trips))
+        self._route_trips = _group_index(self.trip_route, len(self.route_ids))
+        self._service_trips = _group_index(self.trip_service, len(self.calendar))
+        self._active_trips = {}
+        
+        unknown = int((self.trip_service < 0).sum())
+        if unknown:
+            logger.warning(f"{unknown} trips reference services missing from the calendar")
+        logger.info(f"Indexed {len(self.trips)} trips by {len(self.route_ids)} routes and {len(self.calendar)} services")
+    
+    def _load_stop_times(self) -> None:
+        """Load stop_times.txt into a columnar StopTimesTable.
+        
+        Rows are read with a plain csv.reader into compact int arrays, so the
+        millions of rows of a full feed never exist as dicts.
+        """
+        stop_times_path = os.path.join(self.gtfs_dir, 'stop_times.txt')
+        trip_column, stop_column, sequence_column = array('i'), array('i'), array('q')
+        arrival_column, departure_column = array('i'), array('i')
+        # Every time of day appears thousands of times; parse each string once
+        times: Dict[str, int] = {}
+        skipped = 0
+        
+        try:
+            with open(stop_times_path, 'r', encoding='utf-8-sig', newline='') as f:
+                reader = csv.reader(f)
+                header = {name.strip(): i for i, name in enumerate(next(reader))}
+                trip_col, stop_col, sequence_col, arrival_col, departure_col = (
+                    header[name] for name in ('trip_id', 'stop_id', 'stop_sequence', 'arrival_time', 'departure_time')
+                )
+                
+                for row in reader:
+                    try:
+                        trip = self.trip_index.get(row[trip_col])
+                        if trip is None:
+                            skipped += 1
+                            continue
+                        stop_id = row[stop_col]
+                        stop = self.stop_index.get(stop_id)
+                        if stop is None:
+                            stop = self.stop_index[stop_id] = len(self.stop_ids)
+                            self.stop_ids.append(sys.intern(stop_id))
+                        arrival = times.get(row[arrival_col])
+                        if arrival is None:
+                            arrival = times[row[arrival_col]] = parse_gtfs_time(row[arrival_col])
+                        departure = times.get(row[departure_col])
+                        if departure is None:
+                            departure = times[row[departure_col]] = parse_gtfs_time(row[departure_col])
+                        sequence = int(row[sequence_col])
+                    except (IndexError, ValueError) as e:
+                        logger.warning(f"Invalid stop time entry: {row}. Error: {e}")
+                        continue
+                    trip_column.append(trip)
+                    stop_column.append(stop)
+                    sequence_column.append(sequence)
+                    arrival_column.append(arrival)
+                    departure_column.append(departure)
+            
+            self.stop_times = StopTimesTable(trip_column, stop_column, sequence_column,
+                                             arrival_column, departure_column, len(self.trips))
+            if skipped:
+                logger.warning(f"Skipped {skipped} stop times of unknown trips")
+            logger.info(f"Loaded {len(self.stop_times)} stop times for {len(self.stop_ids)} stops "
+                        f"({self.stop_times.nbytes / 1e6:.1f} MB)")
+            
+        except FileNotFoundError:
+            logger.warning(f"stop_times.txt not found in {self.gtfs_dir}")
+        except KeyError as e:
+            logger.error(f"stop_times.txt is missing column {e}")
+        except Exception as e:
+            logger.error(f"Error loading stop times data: {e}")
+    
+    def get_active_services(self, target_date: Optional[date] = None) -> FrozenSet[str]:
+        """Get set of service_ids that are active on the given date.
+        
+        Answered from the compiled service calendar, with calendar_dates.txt
+        exceptions applied, and memoized per date.
+        """
         if not self._loaded:
             self.load_data()
-            
-        target = target_date or date.today()
-        weekday = target.weekday()  # 0 = Monday, 6 = Sunday
         
-        active_services = set()
+        return self.calendar.active_services(target_date or date.today())
+    
+    def get_active_service_mask(self, target_date: Optional[date] = None) -> np.ndarray:
+        """Get a read-only boolean array over calendar.service_ids of the services active on the given date."""
+        if not self._loaded:
+            self.load_data()
         
-        for service_id, entry in self.calendar_entries.items():
-            if entry.start_date <= target <= entry.end_date and entry.days[weekday]:
-                active_services.add(service_id)
+        return self.calendar.active_mask(target_date or date.today())
+    
+    def is_service_active(self, service_id: str, target_date: Optional[date] = None) -> bool:
+        """Check whether a service runs on the given date."""
+        if not self._loaded:
+            self.load_data()
         
-        # TODO: Apply calendar_dates.txt exceptions
+        return self.calendar.is_active(service_id, target_date or date.today())
+    
+    def get_active_trip_mask(self, target_date: Optional[date] = None) -> np.ndarray:
+        """Get a read-only boolean array over trips of the trips whose service runs on the given date."""
+        if not self._loaded:
+            self.load_data()
         
-        return active_services
+        target = target_date or date.today()
+        day = self.calendar.day_of(target)
+        mask = self._active_trips.get(day) if day is not None else None
+        if mask is None:
+            mask = np.zeros(len(self.trips), dtype=bool)
+            service_positions, service_offsets = self._service_trips
+            for service in np.flatnonzero(self.calendar.active_mask(target)).tolist():
+                mask[service_positions[service_offsets[service]:service_offsets[service + 1]]] = True
+            mask.flags.writeable = False
+            if day is not None:
+                self._active_trips[day] = mask
+        return mask
+    
+    def get_trip_indices_for_route(self, route_id: str, date_filter: Optional[date] = None) -> np.ndarray:
+        """Get the positions in self.trips of a route's trips, optionally only those running on a date."""
+        if not self._loaded:
+            self.load_data()
+        
+        route = self.route_index.get(route_id)
+        if route is None:
+            return np.zeros(0, dtype=np.int32)
+        positions, offsets = self._route_trips
+        route_trips = positions[offsets[route]:offsets[route + 1]]
+        if date_filter:
+            return route_trips[self.get_active_trip_mask(date_filter)[route_trips]]
+        return route_trips
     
     def get_trips_for_route(self, route_id: str, date_filter: Optional[date] = None) -> List[GTFSTrip]:
         """Get all trips for a specific route, optionally filtered by date."""
+        trips = self.trips
+        return [trips[i] for i in self.get_trip_indices_for_route(route_id, date_filter).tolist()]
+    
+    def find_stops(self, stop_id_or_name: str) -> List[int]:
+        """Get the positions of the stop with a stop_id, or else of all stops (platforms) with a name."""
         if not self._loaded:
             self.load_data()
-            
-        if date_filter:
-            active_services = self.get_active_services(date_filter)
-            return [t for t in self.trips 
-                   if t.route_id == route_id and t.service_id in active_services]
         
-        return [t for t in self.trips if t.route_id == route_id]
+        stop = self.stop_index.get(stop_id_or_name)
+        if stop is not None:
+            return [stop]
+        return list(self.stops_by_name.get(fold_name(stop_id_or_name), ()))
     
-    def get_trip_schedule(self, trip_id: str) -> List[Dict]:
-        """Get the schedule for a specific trip."""
+    def get_departures(self, stops: Iterable[int], when: Optional[datetime] = None,
+                       limit: int = 10) -> List[Dict[str, Any]]:
+        """Get the next scheduled departures from a set of stops at or after a time.
+        
+        Trips of the previous service day are included, since GTFS times past
+        24:00:00 belong to the day the trip started on. Each stop's timetable
+        is searched by bisection and filtered by the trips running that day.
+        """
         if not self._loaded:
             self.load_data()
-            
-        # TODO: Implement using stop_times.txt
-        return []
+        
+        when = when or datetime.now()
+        timetable = self.stop_departures
+        if timetable is None or limit <= 0:
+            return []
+        
+        candidates = []
+        for days_back in (0, 1):
+            service_date = when.date() - timedelta(days=days_back)
+            midnight = datetime.combine(service_date, datetime.min.time(), tzinfo=when.tzinfo)
+            after = int((when - midnight).total_seconds())
+            trip_mask = self.get_active_trip_mask(service_date)
+            for stop in stops:
+                for position in timetable.next_departures(stop, after, trip_mask, limit).tolist():
+                    candidates.append((midnight + timedelta(seconds=int(timetable.times[position])),
+                                       position, service_date))
+        candidates.sort(key=lambda candidate: candidate[:2])
+        
+        departures = []
+        for departure_time, position, service_date in candidates[:limit]:
+            row = int(timetable.rows[position])
+            trip = self.trips[int(timetable.trips[position])]
+            route = self.routes.get(trip.route_id)
+            stop_id = self.stop_ids[int(self.stop_times.stop[row])]
+            stop = self.stops.get(stop_id)
+            departures.append({
+                'line': route.route_short_name if route else trip.route_id,
+                'route_id': trip.route_id,
+                'route_type': route.route_type if route else None,
+                'trip_id': trip.trip_id,
+                'headsign': trip.trip_headsign,
+                'direction_id': trip.direction_id,
+                'stop_id': stop_id,
+                'stop_name': stop.stop_name if stop else None,
+                'departure_time': format_gtfs_time(int(timetable.times[position])),
+                'departure': departure_time.isoformat(),
+                'service_date': service_date.isoformat(),
+                'countdown': max(0, int((departure_time - when).total_seconds() // 60))
+            })
+        return departures
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get the load state and sizes of the GTFS data."""
+        return {
+            'loaded': self._loaded,
+            'gtfs_dir': self.gtfs_dir,
+            'services': len(self.calendar) if self.calendar is not None else 0,
+            'routes': len(self.routes),
+            'trips': len(self.trips),
+            'stops': len(self.stop_ids),
+            'stop_times': len(self.stop_times) if self.stop_times is not None else 0,
+            'stop_times_mb': round(self.stop_times.nbytes / 1e6, 1) if self.stop_times is not None else 0,
+            'timetables_mb': round(self.stop_departures.nbytes / 1e6, 1) if self.stop_departures is not None else 0
+        }
+    
+    def get_trip_stop_times(self, trip_id: str) -> Optional[TripStopTimes]:
+        """Get the stop times of a trip as column views, without copying."""
+        if not self._loaded:
+            self.load_data()
+        
+        trip = self.trip_index.get(trip_id)
+        if trip is None or self.stop_times is None:
+            return None
+        return self.stop_times.for_trip(trip)
+    
+    def get_trip_schedule(self, trip_id: str) -> List[Dict]:
+        """Get the schedule for a specific trip."""
+        stop_times = self.get_trip_stop_times(trip_id)
+        if stop_times is None:
+            return []
+        
+        return [
+            {
+                'stop_id': self.stop_ids[stop],
+                'stop_sequence': sequence,
+                'arrival_time': format_gtfs_time(arrival),
+                'departure_time': format_gtfs_time(departure),
+                'arrival_seconds': arrival,
+                'departure_seconds': departure
+            }
+            for stop, sequence, arrival, departure in zip(
+                stop_times.stop.tolist(), stop_times.sequence.tolist(),
+                stop_times.arrival.tolist(), stop_times.departure.tolist()
+            )
+        ]
 
 # Singleton instance
 gtfs_service = GTFSService(
-    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'scripts', 'gtfs_data', 'extracted')
+    os.environ.get('WL_GTFS_DIR')
+    or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'scripts', 'gtfs_data', 'extracted')
 )
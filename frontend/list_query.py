@@ -0,0 +1,118 @@
+"""
+List Query Helpers for Wiener Linien Live Map
+
+This module implements `fields=` projection and cursor-based `limit`/`after`
+pagination for the list endpoints. Fields are described by getter functions,
+so a field that was not requested is never computed.
+"""
+
+import base64
+import binascii
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for limit= so a single page stays reasonably small
+MAX_PAGE_LIMIT = 1000
+
+FieldGetters = Mapping[str, Callable[[Any], Any]]
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor is malformed or no longer matches the list."""
+
+def encode_cursor(key: str, position: int) -> str:
+    """Encode the key and position of the last item of a page as an opaque cursor."""
+    raw = json.dumps([key, position], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Decode a cursor created by encode_cursor. Raises CursorError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key, position = json.loads(raw.decode('utf-8'))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise CursorError("malformed cursor")
+    if not isinstance(key, str) or not isinstance(position, int):
+        raise CursorError("malformed cursor")
+    return key, position
+
+@dataclass(frozen=True)
+class ListQuery:
+    """Projection and pagination parameters of a list request."""
+    fields: Optional[Tuple[str, ...]] = None
+    limit: Optional[int] = None
+    after: Optional[str] = None
+    
+    @classmethod
+    def from_args(cls, args: Mapping[str, str], available_fields: FieldGetters) -> 'ListQuery':
+        """Read fields, limit and after from query parameters. Raises ValueError if invalid."""
+        fields = None
+        if args.get('fields'):
+            fields = tuple(dict.fromkeys(f.strip() for f in args['fields'].split(',') if f.strip()))
+            unknown = [f for f in fields if f not in available_fields]
+            if unknown:
+                raise ValueError(f"unknown fields: {', '.join(unknown)}")
+        
+        limit = None
+        if args.get('limit'):
+            limit = int(args['limit'])
+            if not 1 <= limit <= MAX_PAGE_LIMIT:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_LIMIT}")
+        
+        after = args.get('after') or None
+        if after is not None:
+            decode_cursor(after)
+        
+        return cls(fields=fields, limit=limit, after=after)
+    
+    @property
+    def is_default(self) -> bool:
+        """Check whether the query asks for the full, unprojected list."""
+        return self.fields is None and self.limit is None and self.after is None
+    
+    def project(self, item: Any, getters: FieldGetters) -> Dict[str, Any]:
+        """Build the dict for an item, calling only the getters of requested fields."""
+        if self.fields is None:
+            return {name: getter(item) for name, getter in getters.items()}
+        return {name: getters[name](item) for name in self.fields}
+    
+    def paginate(self, items: Sequence[Any], key: Callable[[Any], str],
+                 key_index: Optional[Mapping[Hashable, int]] = None) -> Tuple[Sequence[Any], Optional[str]]:
+        """Get the page after the cursor and the cursor of the following page.
+        
+        The position stored in the cursor is tried first; if the list changed
+        since, the key is looked up in key_index (positions in items) or, without
+        an index, searched for. Raises CursorError if the key no longer exists.
+        """
+        start = 0
+        if self.after is not None:
+            after_key, position = decode_cursor(self.after)
+            if 0 <= position < len(items) and key(items[position]) == after_key:
+                start = position + 1
+            elif key_index is not None and after_key in key_index:
+                start = key_index[after_key] + 1
+            else:
+                start = next((i + 1 for i, item in enumerate(items) if key(item) == after_key), None)
+                if start is None:
+                    raise CursorError("cursor no longer matches the list")
+        
+        if self.limit is None:
+            return items[start:], None
+        
+        end = start + self.limit
+        page = items[start:end]
+        next_cursor = encode_cursor(key(items[end - 1]), end - 1) if end < len(items) else None
+        return page, next_cursor
+    
+    def apply(self, items: Sequence[Any], getters: FieldGetters, key: Callable[[Any], str],
+              key_index: Optional[Mapping[Hashable, int]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Paginate items and project the page."""
+        page, next_cursor = self.paginate(items, key, key_index)
+        return [self.project(item, getters) for item in page], next_cursor
+    
+    def cache_key(self) -> Tuple:
+        """Get a hashable key identifying this query."""
+        return (self.fields, self.limit, self.after)
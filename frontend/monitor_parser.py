@@ -0,0 +1,145 @@
+"""
+Monitor Response Parser for Wiener Linien Live Map
+
+This module turns a Wiener Linien monitor API payload
+(data.monitors[].lines[].departures.departure[]) into compact vehicle
+records in a single pass. It is the only place that knows the layout of
+the monitor response.
+"""
+
+import logging
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class VehicleRecord:
+    """Compact vehicle record derived from one monitor departure."""
+    
+    __slots__ = (
+        'id', 'type', 'line', 'lat', 'lng', 'direction', 'next_station',
+        'delay', 'timestamp', 'countdown', 'platform', 'barrier_free'
+    )
+    
+    def __init__(self, id: str, type: str, line: str, lat: float, lng: float,
+                 direction: str, next_station: str, delay: int, timestamp: str,
+                 countdown: int = 0, platform: str = '', barrier_free: bool = False):
+        self.id = id
+        self.type = type
+        self.line = line
+        self.lat = lat
+        self.lng = lng
+        self.direction = direction
+        self.next_station = next_station
+        self.delay = delay
+        self.timestamp = timestamp
+        self.countdown = countdown
+        self.platform = platform
+        self.barrier_free = barrier_free
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the record to the JSON shape used by the API."""
+        return {
+            'id': self.id,
+            'type': self.type,
+            'line': self.line,
+            'lat': self.lat,
+            'lng': self.lng,
+            'direction': self.direction,
+            'next_station': self.next_station,
+            'delay': self.delay,
+            'timestamp': self.timestamp,
+            'countdown': self.countdown,
+            'platform': self.platform,
+            'barrier_free': self.barrier_free
+        }
+    
+    def __repr__(self) -> str:
+        return f"VehicleRecord(id={self.id!r}, line={self.line!r}, delay={self.delay})"
+
+@lru_cache(maxsize=8192)
+def parse_timestamp(value: str) -> Optional[float]:
+    """Parse a monitor timestamp such as '2025-05-04T22:15:00.000+0200' to epoch seconds.
+    
+    Departures share many identical timestamps, so results are cached.
+    """
+    try:
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f%z').timestamp()
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+@lru_cache(maxsize=64)
+def normalize_vehicle_type(line_type: str) -> str:
+    """Convert a monitor line type such as 'ptTram' to 'tram'."""
+    return line_type.replace('pt', '').lower()
+
+def calculate_delay(departure_time: Dict[str, Any]) -> int:
+    """Calculate delay in minutes from the departureTime of a departure."""
+    planned_time = departure_time.get('timePlanned')
+    real_time = departure_time.get('timeReal')
+    if not planned_time or not real_time:
+        return 0
+    
+    planned = parse_timestamp(planned_time)
+    real = parse_timestamp(real_time)
+    if planned is None or real is None:
+        return 0
+    return int((real - planned) / 60)
+
+def parse_monitor_payload(payload: Optional[Dict[str, Any]], rbl: str,
+                          timestamp: Optional[str] = None) -> List[VehicleRecord]:
+    """Parse a monitor payload for one RBL into vehicle records in a single pass."""
+    records = []
+    if not payload:
+        return records
+    
+    monitors = (payload.get('data') or {}).get('monitors') or []
+    timestamp = timestamp or datetime.now().isoformat()
+    
+    for monitor in monitors:
+        lines = monitor.get('lines')
+        if not lines:
+            continue
+        
+        # Stop-level fields are the same for every departure of the monitor
+        location_stop = monitor.get('locationStop') or {}
+        coordinates = (location_stop.get('geometry') or {}).get('coordinates') or (0, 0)
+        lng, lat = coordinates[0], coordinates[1]
+        stop_title = (location_stop.get('properties') or {}).get('title', '')
+        
+        for line_data in lines:
+            line_name = line_data.get('name', '')
+            vehicle_type = normalize_vehicle_type(line_data.get('type', 'unknown'))
+            
+            departures = (line_data.get('departures') or {}).get('departure', [])
+            if not isinstance(departures, list):
+                departures = [departures] if departures else []
+            
+            for departure in departures:
+                vehicle_info = departure.get('vehicle')
+                if vehicle_info is None:
+                    continue
+                departure_time = departure.get('departureTime') or {}
+                
+                # Positional arguments keep the hot loop cheap
+                records.append(VehicleRecord(
+                    f"{line_name}_{rbl}_{len(records)}",
+                    vehicle_type,
+                    line_name,
+                    lat,
+                    lng,
+                    vehicle_info.get('towards', ''),
+                    stop_title,
+                    calculate_delay(departure_time),
+                    timestamp,
+                    departure_time.get('countdown', 0),
+                    vehicle_info.get('platform', ''),
+                    vehicle_info.get('barrierFree', False)
+                ))
+    
+    return records
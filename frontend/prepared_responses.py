@@ -0,0 +1,131 @@
+"""
+Prepared Responses for Wiener Linien Live Map
+
+This module serializes static API datasets once per dataset version and keeps
+the JSON body pre-compressed with gzip and brotli. Requests are answered from
+the stored bytes, and a matching If-None-Match returns 304 without any
+serialization at all.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+
+from flask import Request, Response
+
+try:
+    import brotli
+except ImportError:  # Optional dependency, gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class PreparedResponse:
+    """A serialized dataset with its compressed variants and strong ETag."""
+    version: Any
+    etag: str
+    body: bytes
+    gzip_body: bytes
+    brotli_body: Optional[bytes]
+    
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """Get the ETag of an encoded representation."""
+        return f"{self.etag}-{encoding}" if encoding else self.etag
+    
+    def matches(self, request: Request) -> bool:
+        """Check whether the client's If-None-Match covers any representation."""
+        etags = request.if_none_match
+        if not etags:
+            return False
+        return any(etags.contains_weak(self.etag_for(encoding)) for encoding in (None, 'gzip', 'br'))
+    
+    def to_response(self, request: Request) -> Response:
+        """Build a response for the request, choosing the best encoding the client accepts."""
+        encoding = None
+        body = self.body
+        accept_encodings = request.accept_encodings
+        if self.brotli_body is not None and accept_encodings['br']:
+            encoding, body = 'br', self.brotli_body
+        elif accept_encodings['gzip']:
+            encoding, body = 'gzip', self.gzip_body
+        
+        if self.matches(request):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        
+        response.set_etag(self.etag_for(encoding))
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+class PreparedResponseCache:
+    """Cache of prepared responses keyed by dataset and variant, invalidated by version."""
+    
+    def __init__(self, max_entries: int = 128, compression_level: int = 6, brotli_quality: int = 11):
+        """Initialize the cache."""
+        self.max_entries = max_entries
+        self.compression_level = compression_level
+        self.brotli_quality = brotli_quality
+        self._entries: 'OrderedDict[Hashable, PreparedResponse]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'builds': 0}
+    
+    def _prepare(self, version: Any, payload: Any) -> PreparedResponse:
+        """Serialize and compress a payload."""
+        body = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        return PreparedResponse(
+            version=version,
+            etag=hashlib.sha256(body).hexdigest()[:32],
+            body=body,
+            gzip_body=gzip.compress(body, compresslevel=self.compression_level),
+            brotli_body=brotli.compress(body, quality=self.brotli_quality) if brotli is not None else None
+        )
+    
+    def get(self, key: Hashable, version: Any, build: Callable[[], Any]) -> PreparedResponse:
+        """Get the prepared response for key, building it only when the version changed."""
+        with self._lock:
+            prepared = self._entries.get(key)
+            if prepared is not None and prepared.version == version:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return prepared
+        
+        prepared = self._prepare(version, build())
+        
+        with self._lock:
+            self._entries[key] = prepared
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.stats['builds'] += 1
+        
+        logger.info(f"Prepared response for {key} (version {version}): {len(prepared.body)} bytes, "
+                    f"gzip {len(prepared.gzip_body)}, "
+                    f"brotli {len(prepared.brotli_body) if prepared.brotli_body is not None else 'n/a'}")
+        return prepared
+    
+    def clear(self):
+        """Drop all prepared responses."""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_status(self) -> dict:
+        """Get cache counters."""
+        with self._lock:
+            return {'entries': len(self._entries), 'brotli_available': brotli is not None, **self.stats}
+
+# Global prepared response cache instance
+prepared_responses = PreparedResponseCache()
+
+# Query variants (viewport, projection, pagination) are far more numerous, so keep
+# more of them and use a cheaper brotli level since each is served fewer times
+variant_responses = PreparedResponseCache(max_entries=512, brotli_quality=5)
@@ -0,0 +1,171 @@
+"""
+Upstream Rate Limiter for Wiener Linien Live Map
+
+This module provides a non-blocking token-bucket rate limiter for calls
+to the Wiener Linien API. Each endpoint has its own budget; when it is
+used up, the most recent response for the same request is served with
+an age marker instead of putting the calling thread to sleep. Endpoints
+that keep their own fallback (monitor responses are cached per RBL) can
+opt out and get None instead.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from single_flight import make_call_key
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Thread-safe token bucket that never blocks."""
+    
+    def __init__(self, capacity: float, refill_rate: float):
+        """Initialize a full bucket refilling at `refill_rate` tokens per second."""
+        self.capacity = float(capacity)
+        self.refill_rate = float(refill_rate)
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float):
+        """Add the tokens accumulated since the last refill."""
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_rate)
+            self._last_refill = now
+    
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens from the bucket if available. Returns immediately."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+    
+    def available(self) -> float:
+        """Get the number of tokens currently available."""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+@dataclass
+class CachedResponse:
+    """Most recent upstream response for a request."""
+    data: Dict[str, Any]
+    fetched_at: datetime
+    fetched_monotonic: float
+
+class UpstreamRateLimiter:
+    """Per-endpoint token-bucket limiter with stale-response fallback."""
+    
+    def __init__(self, budgets: Dict[str, Dict[str, float]], max_cached_responses: int = 256):
+        """Initialize with budgets mapping endpoint to capacity and refill rate."""
+        self.buckets = {
+            endpoint: TokenBucket(budget['capacity'], budget['per_second'])
+            for endpoint, budget in budgets.items()
+        }
+        self.max_cached_responses = max_cached_responses
+        self._responses: 'OrderedDict[Hashable, CachedResponse]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            endpoint: {'allowed': 0, 'throttled': 0, 'stale_served': 0}
+            for endpoint in budgets
+        }
+    
+    def _count(self, endpoint: str, counter: str):
+        """Increment a per-endpoint counter."""
+        with self._lock:
+            self.stats[endpoint][counter] += 1
+    
+    def _store(self, key: Hashable, data: Dict[str, Any]):
+        """Remember the latest response for a request."""
+        with self._lock:
+            self._responses[key] = CachedResponse(
+                data=data,
+                fetched_at=datetime.now(),
+                fetched_monotonic=time.monotonic()
+            )
+            self._responses.move_to_end(key)
+            while len(self._responses) > self.max_cached_responses:
+                self._responses.popitem(last=False)
+    
+    def _get_stale(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Get the latest response for a request, marked with its age."""
+        with self._lock:
+            cached = self._responses.get(key)
+        if cached is None:
+            return None
+        
+        age_seconds = time.monotonic() - cached.fetched_monotonic
+        stale = dict(cached.data)
+        stale['cache'] = {
+            'stale': True,
+            'age_seconds': round(age_seconds, 1),
+            'fetched_at': cached.fetched_at.isoformat()
+        }
+        return stale
+    
+    def limit(self, endpoint: str, stale_fallback: bool = True) -> Callable:
+        """Decorator that applies the endpoint's budget to an upstream fetch function.
+        
+        Without stale_fallback, throttled calls return None and no responses are kept.
+        """
+        bucket = self.buckets[endpoint]
+        
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                key = make_call_key(endpoint, args, kwargs)
+                
+                if bucket.try_acquire():
+                    self._count(endpoint, 'allowed')
+                    result = func(*args, **kwargs)
+                    if result is not None and stale_fallback:
+                        self._store(key, result)
+                    return result
+                
+                self._count(endpoint, 'throttled')
+                if not stale_fallback:
+                    logger.debug(f"Rate limit reached for {endpoint}")
+                    return None
+                stale = self._get_stale(key)
+                if stale is not None:
+                    self._count(endpoint, 'stale_served')
+                    logger.debug(f"Rate limit reached for {endpoint}, serving response aged "
+                                 f"{stale['cache']['age_seconds']}s")
+                else:
+                    logger.warning(f"Rate limit reached for {endpoint} and no cached response available")
+                return stale
+            return wrapper
+        return decorator
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get budget and counter status for every endpoint."""
+        with self._lock:
+            stats = {endpoint: dict(counters) for endpoint, counters in self.stats.items()}
+        return {
+            endpoint: {
+                'tokens_available': round(bucket.available(), 2),
+                'capacity': bucket.capacity,
+                **stats[endpoint]
+            }
+            for endpoint, bucket in self.buckets.items()
+        }
+
+# Rate limiting - per-endpoint token buckets to avoid 403 errors.
+# 'capacity' is the burst size, 'per_second' the sustained request rate.
+UPSTREAM_BUDGETS = {
+    'monitor': {'capacity': 10, 'per_second': 1 / 3},
+    'trafficInfo': {'capacity': 2, 'per_second': 1 / 30},
+    'news': {'capacity': 2, 'per_second': 1 / 60}
+}
+
+# Global rate limiter instance for upstream API calls
+upstream_limiter = UpstreamRateLimiter(UPSTREAM_BUDGETS)
@@ -0,0 +1,194 @@
+"""
+Per-RBL Response Cache for Wiener Linien Live Map
+
+This module caches monitor API responses per RBL number with a TTL and a
+bounded LRU size. Entries can optionally be persisted to a local JSON file,
+so a restarted process serves warm data right away instead of refetching
+every station from upstream during a deploy.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from env_settings import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CachedRBLResponse:
+    """Monitor response for one RBL and when it was fetched."""
+    data: Dict[str, Any]
+    fetched_at: float
+    
+    def age_seconds(self, now: Optional[float] = None) -> float:
+        """Get the age of the response in seconds."""
+        return (now if now is not None else time.time()) - self.fetched_at
+
+class RBLResponseCache:
+    """Thread-safe TTL + LRU cache of monitor responses keyed by RBL."""
+    
+    def __init__(self, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None,
+                 max_stale: Optional[float] = None,
+                 persist_path: Optional[str] = None,
+                 persist_interval: Optional[float] = None):
+        """Initialize the cache. Unset settings are read from WL_RBL_CACHE_* environment variables."""
+        self.ttl = ttl if ttl is not None else env_float('WL_RBL_CACHE_TTL', 15.0)
+        self.max_entries = max_entries if max_entries is not None else env_int('WL_RBL_CACHE_SIZE', 1000)
+        self.max_stale = max_stale if max_stale is not None else env_float('WL_RBL_CACHE_MAX_STALE', 300.0)
+        self.persist_path = persist_path if persist_path is not None else os.environ.get('WL_RBL_CACHE_FILE') or None
+        self.persist_interval = (persist_interval if persist_interval is not None
+                                 else env_float('WL_RBL_CACHE_PERSIST_INTERVAL', 30.0))
+        
+        self._entries: 'OrderedDict[str, CachedRBLResponse]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_saved = time.monotonic()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'stale_served': 0, 'evictions': 0, 'stores': 0}
+    
+    def get(self, rbl: str) -> Optional[Dict[str, Any]]:
+        """Get the response for an RBL if it is younger than the TTL."""
+        with self._lock:
+            entry = self._entries.get(rbl)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if entry.age_seconds() > self.ttl:
+                self.stats['expired'] += 1
+                return None
+            self._entries.move_to_end(rbl)
+            self.stats['hits'] += 1
+            return entry.data
+    
+    def get_stale(self, rbl: str) -> Optional[Dict[str, Any]]:
+        """Get an expired response for an RBL, marked with its age, if younger than max_stale."""
+        with self._lock:
+            entry = self._entries.get(rbl)
+            if entry is None:
+                return None
+            age_seconds = entry.age_seconds()
+            if age_seconds > self.max_stale:
+                return None
+            self.stats['stale_served'] += 1
+        
+        stale = dict(entry.data)
+        stale['cache'] = {
+            'stale': True,
+            'age_seconds': round(age_seconds, 1),
+            'fetched_at': datetime.fromtimestamp(entry.fetched_at).isoformat()
+        }
+        return stale
+    
+    def put(self, rbl: str, data: Dict[str, Any]):
+        """Store a fresh response for an RBL. Stale (rate-limited) responses are ignored."""
+        if not data or 'cache' in data:
+            return
+        
+        with self._lock:
+            self._entries[rbl] = CachedRBLResponse(data=data, fetched_at=time.time())
+            self._entries.move_to_end(rbl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+            self.stats['stores'] += 1
+            self._dirty = True
+    
+    def clear(self):
+        """Drop all cached responses."""
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+    
+    def load(self) -> int:
+        """Load persisted responses, skipping ones older than max_stale. Returns the number loaded."""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return 0
+        
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read RBL cache file {self.persist_path}: {e}")
+            return 0
+        
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            # Oldest first so the LRU order is preserved
+            for item in sorted(stored.get('entries', []), key=lambda item: item.get('fetched_at', 0)):
+                try:
+                    entry = CachedRBLResponse(data=item['data'], fetched_at=float(item['fetched_at']))
+                    rbl = str(item['rbl'])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if entry.age_seconds(now) > self.max_stale:
+                    continue
+                self._entries[rbl] = entry
+                self._entries.move_to_end(rbl)
+                loaded += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        
+        logger.info(f"Loaded {loaded} cached RBL responses from {self.persist_path}")
+        return loaded
+    
+    def save(self) -> bool:
+        """Write the cache to the persistence file atomically."""
+        if not self.persist_path:
+            return False
+        
+        with self._lock:
+            entries = [
+                {'rbl': rbl, 'fetched_at': entry.fetched_at, 'data': entry.data}
+                for rbl, entry in self._entries.items()
+            ]
+            self._dirty = False
+            self._last_saved = time.monotonic()
+        
+        directory = os.path.dirname(os.path.abspath(self.persist_path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.rbl_cache_', suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'saved_at': time.time(), 'entries': entries}, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, self.persist_path)
+            logger.debug(f"Saved {len(entries)} RBL responses to {self.persist_path}")
+            return True
+        except OSError as e:
+            logger.warning(f"Could not write RBL cache file {self.persist_path}: {e}")
+            with self._lock:
+                self._dirty = True
+            return False
+    
+    def maybe_save(self) -> bool:
+        """Save if there are unsaved changes and the persist interval has passed."""
+        if not self.persist_path:
+            return False
+        with self._lock:
+            due = self._dirty and time.monotonic() - self._last_saved >= self.persist_interval
+        return self.save() if due else False
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get cache configuration and hit/miss counters."""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses'] + self.stats['expired']
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'max_stale_seconds': self.max_stale,
+                'persist_path': self.persist_path,
+                'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else None,
+                **self.stats
+            }
+
+# Global per-RBL response cache instance
+rbl_cache = RBLResponseCache()
@@ -0,0 +1,85 @@
+"""
+Route Geometry Encoding for Wiener Linien Live Map
+
+This module converts route polylines, stored as contiguous (n, 2) float
+arrays of lat/lng, into the wire formats offered by /api/routes:
+
+- coordinates: nested [[lat, lng], ...] JSON arrays (the default)
+- polyline: Google encoded polyline string, 5 decimal places (~1 m)
+- polyline6: Google encoded polyline string, 6 decimal places
+- e6: flat list of integer microdegrees, the first point absolute and every
+  following lat/lng as the difference to the previous point
+"""
+
+import logging
+from typing import List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY_COORDINATES = 'coordinates'
+GEOMETRY_POLYLINE = 'polyline'
+GEOMETRY_POLYLINE6 = 'polyline6'
+GEOMETRY_E6 = 'e6'
+
+GEOMETRY_FORMATS = (GEOMETRY_COORDINATES, GEOMETRY_POLYLINE, GEOMETRY_POLYLINE6, GEOMETRY_E6)
+
+def as_coordinate_array(coordinates) -> np.ndarray:
+    """Get coordinates as an (n, 2) float64 array without copying if they already are one."""
+    return np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+
+def _deltas(coordinates, precision: int) -> np.ndarray:
+    """Round coordinates to integers at a precision and difference them point to point."""
+    scaled = np.round(as_coordinate_array(coordinates) * 10 ** precision).astype(np.int64)
+    return np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+
+def encode_polyline(coordinates, precision: int = 5) -> str:
+    """Encode coordinates with the Google encoded polyline algorithm."""
+    chars = []
+    for value in _deltas(coordinates, precision).ravel().tolist():
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return ''.join(chars)
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[List[float]]:
+    """Decode a Google encoded polyline into [[lat, lng], ...]."""
+    values = []
+    value = shift = 0
+    for char in encoded:
+        chunk = ord(char) - 63
+        value |= (chunk & 0x1f) << shift
+        shift += 5
+        if chunk < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    
+    if len(values) % 2:
+        raise ValueError("encoded polyline has an odd number of values")
+    points = np.cumsum(np.array(values, dtype=np.int64).reshape(-1, 2), axis=0) / 10 ** precision
+    return points.tolist()
+
+def encode_e6_deltas(coordinates) -> List[int]:
+    """Encode coordinates as a flat list of delta-encoded integer microdegrees."""
+    return _deltas(coordinates, 6).ravel().tolist()
+
+def decode_e6_deltas(values: Sequence[int]) -> List[List[float]]:
+    """Decode delta-encoded integer microdegrees into [[lat, lng], ...]."""
+    if len(values) % 2:
+        raise ValueError("e6 geometry has an odd number of values")
+    return (np.cumsum(np.array(values, dtype=np.int64).reshape(-1, 2), axis=0) / 1e6).tolist()
+
+def encode_geometry(coordinates, geometry: str = GEOMETRY_COORDINATES):
+    """Encode coordinates in one of GEOMETRY_FORMATS."""
+    if geometry == GEOMETRY_POLYLINE:
+        return encode_polyline(coordinates, 5)
+    if geometry == GEOMETRY_POLYLINE6:
+        return encode_polyline(coordinates, 6)
+    if geometry == GEOMETRY_E6:
+        return encode_e6_deltas(coordinates)
+    if geometry == GEOMETRY_COORDINATES:
+        return as_coordinate_array(coordinates).tolist()
+    raise ValueError(f"unknown geometry format: {geometry}")
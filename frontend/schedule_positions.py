@@ -0,0 +1,279 @@
+"""
+Scheduled Vehicle Positions for Wiener Linien Live Map
+
+This module estimates where every vehicle should be according to the GTFS
+timetable, for use when realtime data is missing. For a moment in time it
+selects the trips of the current (and previous, for trips past midnight)
+service day that have started but not finished, finds the stop each trip
+last departed with one binary search over all stop times, and interpolates
+its position along the trip's shape by the elapsed fraction of the time to
+the next stop. Every step runs vectorized over all active trips at once.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from gtfs_service import GTFSService, gtfs_service
+from stop_times_table import MISSING_TIME
+
+logger = logging.getLogger(__name__)
+
+# Row keys are trip << TIME_BITS | departure seconds; 2**18 s covers the 72 h a GTFS day may span
+TIME_BITS = 18
+
+# Shape point keys are shape * SHAPE_KEY_STRIDE + meters along the shape
+SHAPE_KEY_STRIDE = 1e8
+
+# GTFS route_type -> vehicle type as reported by the monitor API
+ROUTE_TYPE_VEHICLE_TYPES = {0: 'tram', 1: 'metro', 2: 'train', 3: 'buscity', 11: 'buscity'}
+
+class ScheduledPositions(NamedTuple):
+    """Estimated positions of the active trips at one moment, one array element per trip."""
+    trip: np.ndarray
+    lat: np.ndarray
+    lng: np.ndarray
+    bearing: np.ndarray
+    next_stop: np.ndarray
+    service_day_offset: np.ndarray
+
+class SchedulePositionEstimator:
+    """Vectorized scheduled position estimator over a loaded GTFSService."""
+    
+    def __init__(self, gtfs: GTFSService):
+        """Initialize the estimator. Its arrays are built by build() once the GTFS data is loaded."""
+        self.gtfs = gtfs
+        self._lock = threading.Lock()
+        self._ready = False
+        self.build_ms = 0.0
+        self.last_estimate_ms = 0.0
+        self.last_count = 0
+    
+    def _build(self):
+        """Precompute the per-trip, per-row and per-shape arrays the estimate needs."""
+        started = datetime.now()
+        gtfs = self.gtfs
+        table = gtfs.stop_times
+        offsets = table.trip_offsets
+        lengths = np.diff(offsets)
+        # Trips need two stop times to move between, and every row timed (trips with fewer
+        # than two timepoints keep MISSING_TIME rows after StopTimesTable fills the others)
+        untimed = (table.departure == MISSING_TIME) | (table.arrival == MISSING_TIME)
+        moving = (lengths >= 2) & (np.bincount(table.trip[untimed], minlength=table.trip_count) == 0)
+        
+        self.trip_start = np.full(table.trip_count, np.iinfo(np.int32).max, dtype=np.int32)
+        self.trip_end = np.full(table.trip_count, -1, dtype=np.int32)
+        self.trip_start[moving] = table.departure[offsets[:-1][moving]]
+        self.trip_end[moving] = table.arrival[offsets[1:][moving] - 1]
+        # Missing times must not become key -1; the running maximum keeps keys sorted
+        # within each trip, and trips cannot overlap since the trip bits dominate
+        departure = np.clip(table.departure, 0, (1 << TIME_BITS) - 1).astype(np.int64)
+        self.row_key = np.maximum.accumulate((table.trip.astype(np.int64) << TIME_BITS) | departure)
+        
+        # Stop coordinates by stop position, NaN for stops missing from stops.txt
+        self.stop_lat = np.full(len(gtfs.stop_ids), np.nan)
+        self.stop_lon = np.full(len(gtfs.stop_ids), np.nan)
+        for stop_id, stop in gtfs.stops.items():
+            position = gtfs.stop_index[stop_id]
+            if stop.stop_lat is not None and stop.stop_lon is not None:
+                self.stop_lat[position], self.stop_lon[position] = stop.stop_lat, stop.stop_lon
+        
+        shape_lengths = np.diff(gtfs.shape_offsets)
+        shape_of_point = np.repeat(np.arange(len(gtfs.shape_ids)), shape_lengths)
+        self.shape_key = shape_of_point * SHAPE_KEY_STRIDE + gtfs.shape_dist
+        # Trips follow their shape only if it has a segment to interpolate along
+        # (the trailing False is what trips without a shape, at -1, look up)
+        usable = np.append(shape_lengths >= 2, False)
+        self.trip_shape = np.where(usable[gtfs.trip_shape], gtfs.trip_shape, -1).astype(np.int32)
+        self.stop_dist = self._project_stops()
+        
+        # Route attributes by route position, for filtering and output
+        routes = [gtfs.routes.get(route_id) for route_id in gtfs.route_ids]
+        self.route_lines = [route.route_short_name if route else route_id
+                            for route, route_id in zip(routes, gtfs.route_ids)]
+        self.route_types = [self._vehicle_type(route.route_type if route else None, line)
+                            for route, line in zip(routes, self.route_lines)]
+        
+        self.build_ms = (datetime.now() - started).total_seconds() * 1000
+        logger.info(f"Built schedule position estimator for {table.trip_count} trips and "
+                    f"{len(gtfs.shape_ids)} shapes in {self.build_ms:.0f} ms")
+    
+    @staticmethod
+    def _vehicle_type(route_type: Optional[int], line: str) -> str:
+        """Map a GTFS route_type to the vehicle type names the monitor API uses."""
+        if route_type in (3, 11) and line.startswith('N'):
+            return 'busnight'
+        return ROUTE_TYPE_VEHICLE_TYPES.get(route_type, 'unknown')
+    
+    def _project_stops(self) -> np.ndarray:
+        """Get the distance along its trip's shape of every stop time row.
+        
+        Each stop is matched to the nearest shape point at or after the point
+        matched to the previous stop, so loops and termini shared by both ends
+        of a shape resolve in travel order. Trips sharing a shape and stop
+        pattern are projected once.
+        """
+        gtfs = self.gtfs
+        table = gtfs.stop_times
+        stop_dist = np.zeros(len(table), dtype=np.float64)
+        patterns: Dict[Tuple[int, bytes], np.ndarray] = {}
+        
+        for trip in np.flatnonzero(self.trip_shape >= 0).tolist():
+            rows = table.trip_rows(trip)
+            stops = table.stop[rows]
+            key = (int(self.trip_shape[trip]), stops.tobytes())
+            distances = patterns.get(key)
+            if distances is None:
+                distances = patterns[key] = self._project_pattern(key[0], stops)
+            stop_dist[rows] = distances
+        
+        logger.debug(f"Projected {len(patterns)} stop patterns onto their shapes")
+        return stop_dist
+    
+    def _project_pattern(self, shape: int, stops: np.ndarray) -> np.ndarray:
+        """Project the stops of one trip pattern onto a shape, in order."""
+        gtfs = self.gtfs
+        points = slice(int(gtfs.shape_offsets[shape]), int(gtfs.shape_offsets[shape + 1]))
+        shape_lat, shape_lon = gtfs.shape_lat[points], gtfs.shape_lon[points]
+        cos_lat = np.cos(np.radians(np.nanmean(shape_lat)))
+        squared = ((self.stop_lat[stops][:, None] - shape_lat[None, :]) ** 2
+                   + ((self.stop_lon[stops][:, None] - shape_lon[None, :]) * cos_lat) ** 2)
+        squared = np.nan_to_num(squared, nan=np.inf)
+        
+        matched = np.zeros(len(stops), dtype=np.int64)
+        previous = 0
+        for i in range(len(stops)):
+            previous += int(np.argmin(squared[i, previous:]))
+            matched[i] = previous
+        return gtfs.shape_dist[points][matched]
+    
+    def build(self) -> bool:
+        """Build the arrays if the GTFS schedule is available. Returns whether they are built."""
+        if self._ready:
+            return True
+        if not self.gtfs.has_schedule():
+            return False
+        with self._lock:
+            if not self._ready:
+                self._build()
+                self._ready = True
+        return True
+    
+    def is_available(self) -> bool:
+        """Check whether scheduled positions can be estimated."""
+        return self.gtfs.has_schedule()
+    
+    def estimate(self, when: Optional[datetime] = None) -> Optional[ScheduledPositions]:
+        """Estimate the positions of all trips running at a moment. Returns None without a schedule."""
+        if not self.build():
+            return None
+        
+        started = datetime.now()
+        when = when or started
+        gtfs = self.gtfs
+        table = gtfs.stop_times
+        
+        trips, seconds, day_offsets = [], [], []
+        for days_back in (0, 1):
+            service_date = when.date() - timedelta(days=days_back)
+            midnight = datetime.combine(service_date, datetime.min.time(), tzinfo=when.tzinfo)
+            now_seconds = int((when - midnight).total_seconds())
+            running = np.flatnonzero(gtfs.get_active_trip_mask(service_date)
+                                     & (self.trip_start <= now_seconds) & (self.trip_end > now_seconds))
+            trips.append(running)
+            seconds.append(np.full(len(running), now_seconds, dtype=np.int64))
+            day_offsets.append(np.full(len(running), days_back, dtype=np.int8))
+        trip = np.concatenate(trips)
+        now = np.concatenate(seconds)
+        
+        # Last stop departed: the last row of the trip with departure <= now, leaving a next row
+        row = np.searchsorted(self.row_key, (trip.astype(np.int64) << TIME_BITS) | now, side='right') - 1
+        row = np.clip(row, table.trip_offsets[trip], table.trip_offsets[trip + 1] - 2)
+        next_row = row + 1
+        departed = table.departure[row].astype(np.int64)
+        span = np.maximum(table.arrival[next_row].astype(np.int64) - departed, 1)
+        fraction = np.clip((now - departed) / span, 0.0, 1.0)
+        
+        # Trips without a shape move in a straight line between their stops
+        from_stop, to_stop = table.stop[row], table.stop[next_row]
+        lat = self.stop_lat[from_stop] + fraction * (self.stop_lat[to_stop] - self.stop_lat[from_stop])
+        lng = self.stop_lon[from_stop] + fraction * (self.stop_lon[to_stop] - self.stop_lon[from_stop])
+        lat_a, lng_a = self.stop_lat[from_stop], self.stop_lon[from_stop]
+        lat_b, lng_b = self.stop_lat[to_stop], self.stop_lon[to_stop]
+        
+        shape = self.trip_shape[trip]
+        shaped = np.flatnonzero(shape >= 0)
+        if len(shaped):
+            s_shape, s_row, s_next = shape[shaped], row[shaped], next_row[shaped]
+            distance = self.stop_dist[s_row] + fraction[shaped] * (self.stop_dist[s_next] - self.stop_dist[s_row])
+            point = np.searchsorted(self.shape_key, s_shape * SHAPE_KEY_STRIDE + distance, side='right') - 1
+            point = np.clip(point, gtfs.shape_offsets[s_shape], gtfs.shape_offsets[s_shape + 1] - 2)
+            segment = np.maximum(gtfs.shape_dist[point + 1] - gtfs.shape_dist[point], 1e-9)
+            along = np.clip((distance - gtfs.shape_dist[point]) / segment, 0.0, 1.0)
+            lat_a[shaped], lng_a[shaped] = gtfs.shape_lat[point], gtfs.shape_lon[point]
+            lat_b[shaped], lng_b[shaped] = gtfs.shape_lat[point + 1], gtfs.shape_lon[point + 1]
+            lat[shaped] = lat_a[shaped] + along * (lat_b[shaped] - lat_a[shaped])
+            lng[shaped] = lng_a[shaped] + along * (lng_b[shaped] - lng_a[shaped])
+        
+        bearing = np.degrees(np.arctan2((lng_b - lng_a) * np.cos(np.radians(lat_a)), lat_b - lat_a)) % 360
+        located = ~(np.isnan(lat) | np.isnan(lng))
+        
+        self.last_estimate_ms = (datetime.now() - started).total_seconds() * 1000
+        self.last_count = int(located.sum())
+        return ScheduledPositions(trip[located], lat[located], lng[located], bearing[located],
+                                  to_stop[located], np.concatenate(day_offsets)[located])
+    
+    def get_vehicles(self, vehicle_type: Optional[str] = None, line: Optional[str] = None,
+                     when: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Get the scheduled vehicles at a moment in the /api/vehicles format, with source 'scheduled'."""
+        when = when or datetime.now()
+        positions = self.estimate(when)
+        if positions is None:
+            return []
+        
+        gtfs = self.gtfs
+        routes = gtfs.trip_route[positions.trip]
+        keep = np.ones(len(routes), dtype=bool)
+        if vehicle_type and vehicle_type != 'all':
+            keep &= np.isin(routes, [i for i, t in enumerate(self.route_types) if t == vehicle_type])
+        if line:
+            keep &= np.isin(routes, [i for i, name in enumerate(self.route_lines) if name == line])
+        
+        timestamp = when.isoformat()
+        vehicles = []
+        for trip, lat, lng, bearing, next_stop, route in zip(
+            positions.trip[keep].tolist(), positions.lat[keep].tolist(), positions.lng[keep].tolist(),
+            positions.bearing[keep].tolist(), positions.next_stop[keep].tolist(), routes[keep].tolist()
+        ):
+            trip_record = gtfs.trips[trip]
+            stop = gtfs.stops.get(gtfs.stop_ids[next_stop])
+            vehicles.append({
+                'id': f"scheduled_{trip_record.trip_id}",
+                'type': self.route_types[route],
+                'line': self.route_lines[route],
+                'lat': round(lat, 6),
+                'lng': round(lng, 6),
+                'bearing': round(bearing, 1),
+                'direction': trip_record.trip_headsign,
+                'next_station': stop.stop_name if stop else '',
+                'delay': 0,
+                'timestamp': timestamp,
+                'source': 'scheduled'
+            })
+        return vehicles
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get the estimator state and the cost of the last estimate."""
+        return {
+            'available': self.is_available(),
+            'built': self._ready,
+            'build_ms': round(self.build_ms, 1),
+            'last_estimate_ms': round(self.last_estimate_ms, 2),
+            'last_count': self.last_count
+        }
+
+# Global estimator instance
+schedule_positions = SchedulePositionEstimator(gtfs_service)
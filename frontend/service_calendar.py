@@ -0,0 +1,108 @@
+"""
+Service Calendar for Wiener Linien Live Map
+
+This module compiles the GTFS calendar.txt entries and calendar_dates.txt
+exceptions into one bitset per service over the date range of the feed.
+Exceptions are applied once at load time, so whether a service runs on a
+date is a single bit test, and the set of services active on a date is
+computed once per date and then served from a memo.
+"""
+
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# calendar_dates.txt exception_type values
+SERVICE_ADDED = 1
+SERVICE_REMOVED = 2
+
+# (service_id, date, exception_type) of a calendar_dates.txt row
+CalendarException = Tuple[str, date, int]
+
+class ServiceCalendar:
+    """Per-service bitsets of the days each service runs."""
+    
+    def __init__(self, entries: Mapping[str, Any], exceptions: Iterable[CalendarException] = ()):
+        """Compile calendar entries (with start_date, end_date and seven weekday flags in days) and exceptions."""
+        exceptions = list(exceptions)
+        service_ids = dict.fromkeys(entries)
+        service_ids.update(dict.fromkeys(service_id for service_id, _, _ in exceptions))
+        self.service_ids: Tuple[str, ...] = tuple(service_ids)
+        self.service_index: Dict[str, int] = {service_id: i for i, service_id in enumerate(self.service_ids)}
+        
+        dates = [d for entry in entries.values() for d in (entry.start_date, entry.end_date)]
+        dates.extend(day for _, day, _ in exceptions)
+        self.start_date: Optional[date] = min(dates) if dates else None
+        self.day_count = (max(dates) - self.start_date).days + 1 if dates else 0
+        
+        active = np.zeros((len(self.service_ids), self.day_count), dtype=bool)
+        if self.day_count:
+            weekdays = (self.start_date.weekday() + np.arange(self.day_count)) % 7
+            for service_id, entry in entries.items():
+                first = (entry.start_date - self.start_date).days
+                last = (entry.end_date - self.start_date).days
+                runs = np.asarray(entry.days, dtype=bool)[weekdays[first:last + 1]]
+                active[self.service_index[service_id], first:last + 1] = runs
+        for service_id, day, exception_type in exceptions:
+            if exception_type in (SERVICE_ADDED, SERVICE_REMOVED):
+                active[self.service_index[service_id], (day - self.start_date).days] = exception_type == SERVICE_ADDED
+        
+        # One bit per service and day, packed eight days to a byte
+        self.bits = np.packbits(active, axis=1)
+        self.bits.flags.writeable = False
+        # day -> (active mask over service_ids, active service ids)
+        self._active: Dict[int, Tuple[np.ndarray, FrozenSet[str]]] = {}
+        self._inactive = self._memo(np.zeros(len(self.service_ids), dtype=bool))
+        
+        logger.info(f"Compiled {len(self.service_ids)} services over {self.day_count} days "
+                    f"with {len(exceptions)} exceptions")
+    
+    def day_of(self, target: date) -> Optional[int]:
+        """Get the day index of a date, or None if it is outside the feed's date range."""
+        if self.start_date is None:
+            return None
+        day = (target - self.start_date).days
+        return day if 0 <= day < self.day_count else None
+    
+    def date_of(self, day: int) -> date:
+        """Get the date of a day index."""
+        return self.start_date + timedelta(days=day)
+    
+    def is_active(self, service_id: str, target: date) -> bool:
+        """Check whether a service runs on a date."""
+        service = self.service_index.get(service_id)
+        day = self.day_of(target)
+        if service is None or day is None:
+            return False
+        return bool(self.bits[service, day >> 3] & (0x80 >> (day & 7)))
+    
+    def _memo(self, mask: np.ndarray) -> Tuple[np.ndarray, FrozenSet[str]]:
+        """Freeze an active mask together with the service ids it selects."""
+        mask.flags.writeable = False
+        return mask, frozenset(self.service_ids[i] for i in np.flatnonzero(mask).tolist())
+    
+    def _get_active(self, target: date) -> Tuple[np.ndarray, FrozenSet[str]]:
+        """Get the active mask and service ids of a date, computing them on first use."""
+        day = self.day_of(target)
+        if day is None:
+            return self._inactive
+        cached = self._active.get(day)
+        if cached is None:
+            mask = (self.bits[:, day >> 3] & (0x80 >> (day & 7))).astype(bool)
+            cached = self._active[day] = self._memo(mask)
+        return cached
+    
+    def active_mask(self, target: date) -> np.ndarray:
+        """Get a read-only boolean array over service_ids of the services running on a date."""
+        return self._get_active(target)[0]
+    
+    def active_services(self, target: date) -> FrozenSet[str]:
+        """Get the ids of the services running on a date."""
+        return self._get_active(target)[1]
+    
+    def __len__(self) -> int:
+        return len(self.service_ids)
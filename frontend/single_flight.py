@@ -0,0 +1,107 @@
+"""
+Single-Flight Request Coalescing for Wiener Linien Live Map
+
+This module makes concurrent identical upstream fetches share one in-flight
+request. The first caller for a key runs the fetch; callers arriving while
+it is running wait for it and receive the same result.
+"""
+
+import logging
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+def make_call_key(endpoint: str, args: Tuple = (), kwargs: Dict[str, Any] = None) -> Hashable:
+    """Build a hashable key for an upstream call from its endpoint and arguments."""
+    def freeze(value):
+        if isinstance(value, (list, tuple)):
+            return tuple(freeze(v) for v in value)
+        if isinstance(value, (set, frozenset)):
+            return tuple(sorted(freeze(v) for v in value))
+        if isinstance(value, dict):
+            return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+        return value
+    return (endpoint, freeze(args), freeze(kwargs or {}))
+
+class _InFlightCall:
+    """A fetch that is currently running."""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into a single execution."""
+    
+    def __init__(self):
+        """Initialize with no calls in flight."""
+        self._calls: Dict[Hashable, _InFlightCall] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+    
+    def _count(self, endpoint: str, counter: str):
+        """Increment a per-endpoint counter. Must be called with the lock held."""
+        counters = self.stats.setdefault(endpoint, {'calls': 0, 'executions': 0, 'coalesced': 0, 'errors': 0})
+        counters[counter] += 1
+    
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """Run func unless a call with the same key is in flight, then share its result."""
+        endpoint = key[0] if isinstance(key, tuple) and key else str(key)
+        
+        with self._lock:
+            self._count(endpoint, 'calls')
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._count(endpoint, 'coalesced')
+                leader = False
+            else:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self._count(endpoint, 'executions')
+                leader = True
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._count(endpoint, 'errors')
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if call.waiters:
+                logger.debug(f"Shared {endpoint} result with {call.waiters} coalesced callers")
+            call.done.set()
+    
+    def coalesce(self, endpoint: str) -> Callable:
+        """Decorator that coalesces concurrent calls keyed by (endpoint, arguments)."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                return self.do(make_call_key(endpoint, args, kwargs), func, *args, **kwargs)
+            return wrapper
+        return decorator
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get per-endpoint counters and the number of calls in flight."""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'endpoints': {endpoint: dict(counters) for endpoint, counters in self.stats.items()}
+            }
+
+# Global single-flight group for upstream API calls
+upstream_flights = SingleFlight()
@@ -0,0 +1,245 @@
+"""
+Spatial Index for Wiener Linien Live Map
+
+This module provides a uniform lat/lng grid index used to answer viewport
+(bounding box) queries over route polylines without scanning the whole
+network, a metric grid for nearest-station queries, plus helpers
+for parsing viewports and thinning route geometry by zoom level.
+"""
+
+import logging
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# (min_lat, min_lng, max_lat, max_lng)
+BBox = Tuple[float, float, float, float]
+
+# Mean earth radius in meters
+EARTH_RADIUS_M = 6371008.8
+
+class GridIndex:
+    """Uniform grid over lat/lng mapping cells to the ids of items touching them."""
+    
+    def __init__(self, cell_size: float = 0.01):
+        """Initialize an empty grid. 0.01 degrees is roughly 1.1 km x 0.75 km in Vienna."""
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        self.bounds: Dict[int, BBox] = {}
+    
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        """Get the cell containing a coordinate."""
+        return (int(math.floor(lat / self.cell_size)), int(math.floor(lng / self.cell_size)))
+    
+    def _cells_in(self, bbox: BBox) -> Iterable[Tuple[int, int]]:
+        """Iterate over the cells covering a bounding box."""
+        min_row, min_col = self._cell(bbox[0], bbox[1])
+        max_row, max_col = self._cell(bbox[2], bbox[3])
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                yield (row, col)
+    
+    def insert_polyline(self, item_id: int, coordinates: Sequence[Sequence[float]]):
+        """Index a polyline in every cell touched by the bounding box of one of its segments."""
+        if len(coordinates) == 0:
+            return
+        if isinstance(coordinates, np.ndarray):
+            coordinates = coordinates.tolist()
+        
+        cells: Set[Tuple[int, int]] = set()
+        if len(coordinates) == 1:
+            cells.add(self._cell(coordinates[0][0], coordinates[0][1]))
+        for (lat1, lng1), (lat2, lng2) in zip(coordinates, coordinates[1:]):
+            segment = (min(lat1, lat2), min(lng1, lng2), max(lat1, lat2), max(lng1, lng2))
+            cells.update(self._cells_in(segment))
+        
+        for cell in cells:
+            self.cells.setdefault(cell, []).append(item_id)
+        
+        lats = [c[0] for c in coordinates]
+        lngs = [c[1] for c in coordinates]
+        self.bounds[item_id] = (min(lats), min(lngs), max(lats), max(lngs))
+    
+    def query(self, bbox: BBox) -> List[int]:
+        """Get the ids of items intersecting a bounding box, in insertion order."""
+        min_lat, min_lng, max_lat, max_lng = bbox
+        candidates: Set[int] = set()
+        for cell in self._cells_in(bbox):
+            items = self.cells.get(cell)
+            if items:
+                candidates.update(items)
+        
+        matches = []
+        for item_id in candidates:
+            b = self.bounds[item_id]
+            if b[0] <= max_lat and b[2] >= min_lat and b[1] <= max_lng and b[3] >= min_lng:
+                matches.append(item_id)
+        matches.sort()
+        return matches
+    
+    def __len__(self) -> int:
+        return len(self.bounds)
+
+def parse_bbox(value: Optional[str]) -> Optional[BBox]:
+    """Parse a 'west,south,east,north' (Leaflet toBBoxString) viewport.
+    
+    Returns (min_lat, min_lng, max_lat, max_lng), or None if not given.
+    Raises ValueError for malformed input.
+    """
+    if not value:
+        return None
+    
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError("bbox must have four values: west,south,east,north")
+    
+    west, south, east, north = parts
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= 90 and -90 <= north <= 90):
+        raise ValueError("bbox values out of range")
+    return (min(south, north), min(west, east), max(south, north), max(west, east))
+
+def zoom_tolerance(zoom: int, pixels: float = 1.0) -> float:
+    """Get the size in degrees of `pixels` screen pixels at a web map zoom level."""
+    return 360.0 / (256 * 2 ** zoom) * pixels
+
+def simplify_polyline(coordinates: Sequence[Sequence[float]], tolerance: float) -> List[Sequence[float]]:
+    """Drop points closer than `tolerance` degrees to the last kept point.
+    
+    The first and last points are always kept.
+    """
+    if isinstance(coordinates, np.ndarray):
+        coordinates = coordinates.tolist()
+    if tolerance <= 0 or len(coordinates) <= 2:
+        return list(coordinates)
+    
+    tolerance_sq = tolerance * tolerance
+    kept = [coordinates[0]]
+    last_lat, last_lng = coordinates[0][0], coordinates[0][1]
+    for point in coordinates[1:-1]:
+        d_lat = point[0] - last_lat
+        d_lng = point[1] - last_lng
+        if d_lat * d_lat + d_lng * d_lng >= tolerance_sq:
+            kept.append(point)
+            last_lat, last_lng = point[0], point[1]
+    kept.append(coordinates[-1])
+    return kept
+
+def build_route_index(routes: Sequence, cell_size: float = 0.01) -> GridIndex:
+    """Build a grid index over route polylines; ids are list positions."""
+    index = GridIndex(cell_size)
+    for position, route in enumerate(routes):
+        index.insert_polyline(position, route.coordinates)
+    logger.info(f"Built route grid index with {len(index)} routes in {len(index.cells)} cells")
+    return index
+
+class NearestNeighborIndex:
+    """Grid of points in projected meters for k-nearest and radius queries.
+    
+    Points are bucketed into square cells of an equirectangular projection
+    centered on the data and stored sorted by (row, col), so every grid row
+    of a search square is one contiguous slice. Searches grow a square of
+    cells around the query until the k-th distance is covered; candidate
+    distances are exact haversine distances. Meant for city-sized areas,
+    where the projection error is far below the cell size.
+    """
+    
+    def __init__(self, lat: Sequence[float], lng: Sequence[float], cell_size_m: float = 250.0):
+        """Build the index. NaN coordinates are skipped; ids are positions in lat/lng."""
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        positions = np.flatnonzero(~(np.isnan(lat) | np.isnan(lng)))
+        
+        self.cell_size_m = cell_size_m
+        lat0 = float(lat[positions].mean()) if len(positions) else 0.0
+        self._y_scale = EARTH_RADIUS_M * math.pi / 180 / cell_size_m
+        self._x_scale = self._y_scale * math.cos(math.radians(lat0))
+        
+        rows = np.floor(lat[positions] * self._y_scale).astype(np.int64)
+        cols = np.floor(lng[positions] * self._x_scale).astype(np.int64)
+        self._min_row = int(rows.min()) if len(rows) else 0
+        self._min_col = int(cols.min()) if len(cols) else 0
+        self._rows = int(rows.max()) - self._min_row + 1 if len(rows) else 0
+        self._cols = int(cols.max()) - self._min_col + 1 if len(cols) else 0
+        
+        keys = (rows - self._min_row) * self._cols + (cols - self._min_col)
+        order = np.argsort(keys, kind='stable')
+        self._keys = keys[order]
+        self.positions = positions[order]
+        self._lat_rad = np.radians(lat[self.positions])
+        self._lng_rad = np.radians(lng[self.positions])
+        self._cos_lat = np.cos(self._lat_rad)
+    
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        """Get the grid row and column of a coordinate, relative to the grid origin."""
+        return (math.floor(lat * self._y_scale) - self._min_row,
+                math.floor(lng * self._x_scale) - self._min_col)
+    
+    def _square(self, row: int, col: int, radius: int) -> np.ndarray:
+        """Get the sorted-array indexes of the points in the cells within radius cells of (row, col)."""
+        first_row, last_row = max(row - radius, 0), min(row + radius, self._rows - 1)
+        first_col, last_col = max(col - radius, 0), min(col + radius, self._cols - 1)
+        if first_row > last_row or first_col > last_col:
+            return np.empty(0, dtype=np.int64)
+        
+        grid_rows = np.arange(first_row, last_row + 1) * self._cols
+        starts = np.searchsorted(self._keys, grid_rows + first_col, side='left')
+        ends = np.searchsorted(self._keys, grid_rows + last_col, side='right')
+        slices = [np.arange(start, end) for start, end in zip(starts.tolist(), ends.tolist()) if end > start]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(slices) if len(slices) > 1 else slices[0]
+    
+    def _distances(self, lat: float, lng: float, candidates: np.ndarray) -> np.ndarray:
+        """Get the haversine distances in meters from a point to candidate points."""
+        lat_rad, lng_rad = math.radians(lat), math.radians(lng)
+        a = (np.sin((self._lat_rad[candidates] - lat_rad) / 2) ** 2
+             + math.cos(lat_rad) * self._cos_lat[candidates]
+             * np.sin((self._lng_rad[candidates] - lng_rad) / 2) ** 2)
+        return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    
+    def query(self, lat: float, lng: float, k: int = 10,
+              radius_m: Optional[float] = None) -> List[Tuple[int, float]]:
+        """Get up to k points closest to a coordinate as (id, distance in meters), closest first.
+        
+        With radius_m only points within that distance are returned.
+        """
+        if k <= 0 or not len(self.positions):
+            return []
+        
+        row, col = self._cell(lat, lng)
+        max_radius = max(row, self._rows - 1 - row, col, self._cols - 1 - col, 0)
+        if radius_m is not None:
+            max_radius = min(max_radius, math.ceil(radius_m / self.cell_size_m))
+        
+        radius = 1
+        while True:
+            radius = min(radius, max_radius)
+            candidates = self._square(row, col, radius)
+            distances = self._distances(lat, lng, candidates)
+            if radius_m is not None:
+                keep = distances <= radius_m
+                candidates, distances = candidates[keep], distances[keep]
+            # Everything within radius * cell size is inside the square; keep a
+            # small margin for the difference between projection and haversine
+            if radius >= max_radius or (len(distances) >= k and
+                                        np.partition(distances, k - 1)[k - 1] <= radius * self.cell_size_m * 0.99):
+                break
+            radius *= 2
+        
+        if len(distances) > k:
+            nearest = np.argpartition(distances, k - 1)[:k]
+            candidates, distances = candidates[nearest], distances[nearest]
+        order = np.argsort(distances, kind='stable')
+        return [(int(self.positions[c]), float(d)) for c, d in zip(candidates[order], distances[order])]
+    
+    def __len__(self) -> int:
+        return len(self.positions)
+
+def build_nearest_station_index(stations, cell_size_m: float = 250.0) -> NearestNeighborIndex:
+    """Build a nearest-neighbor index over the coordinate columns of a StationTable; ids are row positions."""
+    index = NearestNeighborIndex(stations.lat, stations.lng, cell_size_m)
+    logger.info(f"Built nearest station index with {len(index)} stations")
+    return index
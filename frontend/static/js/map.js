@@ -134,10 +134,15 @@ async function loadStations() {
 // Load routes
 async function loadRoutes() {
     try {
-        const response = await fetch('/api/routes');
+        const response = await fetch('/api/routes?geometry=polyline');
         const data = await response.json();
         
         if (data.routes) {
+            if (data.geometry === 'polyline') {
+                data.routes.forEach(route => {
+                    route.coordinates = decodePolyline(route.coordinates);
+                });
+            }
             displayRoutes(data.routes);
         }
     } catch (error) {
@@ -254,6 +259,30 @@ function getVehicleIcon(type, line) {
     });
 }
 
+// Decode a Google encoded polyline into [[lat, lng], ...]
+function decodePolyline(encoded, precision = 5) {
+    const factor = Math.pow(10, precision);
+    const points = [];
+    let index = 0, lat = 0, lng = 0;
+    
+    while (index < encoded.length) {
+        const deltas = [0, 0];
+        for (let i = 0; i < 2; i++) {
+            let result = 0, shift = 0, chunk;
+            do {
+                chunk = encoded.charCodeAt(index++) - 63;
+                result |= (chunk & 0x1f) << shift;
+                shift += 5;
+            } while (chunk >= 0x20);
+            deltas[i] = (result & 1) ? ~(result >> 1) : (result >> 1);
+        }
+        lat += deltas[0];
+        lng += deltas[1];
+        points.push([lat / factor, lng / factor]);
+    }
+    return points;
+}
+
 // Display routes on the map
 function displayRoutes(routes) {
     // Clear existing routes
@@ -0,0 +1,201 @@
+"""
+Station Search for Wiener Linien Live Map
+
+This module answers station name autocomplete queries. Names are normalized
+(case-folded, umlauts folded, punctuation removed) and indexed in a prefix
+trie whose nodes keep their best-ranked names, so a prefix lookup costs only
+the length of the query. When the trie does not fill the result list, a
+trigram index adds fuzzy matches for typos within a small time budget.
+"""
+
+import logging
+import re
+import time
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for limit=; trie nodes keep this many names each
+MAX_SEARCH_RESULTS = 50
+
+# Minimum trigram similarity (Jaccard) for a fuzzy match
+MIN_TRIGRAM_SIMILARITY = 0.3
+
+# Match kinds, best first
+MATCH_EXACT = 'exact'
+MATCH_PREFIX = 'prefix'
+MATCH_WORD = 'word'
+MATCH_FUZZY = 'fuzzy'
+
+UMLAUT_DIGRAPHS = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue'})
+NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+def fold_name(name: str, digraphs: bool = True) -> str:
+    """Normalize a station name for searching.
+    
+    Case-folds (which also turns ß into ss), folds umlauts to ae/oe/ue (or
+    to the plain vowel with digraphs=False), strips other accents and turns
+    punctuation into single spaces, so "Schönbrunn", "SCHOENBRUNN" and
+    "schoenbrunn" all fold to the same string.
+    """
+    name = name.casefold()
+    if digraphs:
+        name = name.translate(UMLAUT_DIGRAPHS)
+    name = ''.join(c for c in unicodedata.normalize('NFKD', name) if not unicodedata.combining(c))
+    return NON_ALNUM.sub(' ', name).strip()
+
+def trigrams(folded: str) -> Set[str]:
+    """Get the trigrams of a folded name, with every word padded like pg_trgm."""
+    grams = set()
+    for word in folded.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class _TrieNode:
+    """Trie node with the (match kind, name id) of the best-ranked names below it."""
+    
+    __slots__ = ('children', 'top')
+    
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.top: List[Tuple[int, int]] = []
+
+class StationSearchIndex:
+    """Prefix trie plus trigram index over the distinct names of a station list."""
+    
+    def __init__(self, stations: Sequence[Any]):
+        """Build the index. Stations sharing a name are grouped into one entry."""
+        positions_by_name: Dict[str, List[int]] = {}
+        for position, station in enumerate(stations):
+            if station.name:
+                positions_by_name.setdefault(station.name, []).append(position)
+        
+        self.stations = stations
+        self.names: List[str] = list(positions_by_name)
+        self.positions: List[List[int]] = list(positions_by_name.values())
+        self.folded: List[str] = [fold_name(name) for name in self.names]
+        
+        # Names are inserted best rank first - whole names before matches on
+        # one of their later words, then shorter names first - so every node
+        # keeps its first MAX_SEARCH_RESULTS names already in rank order.
+        keys = [{folded, fold_name(name, digraphs=False)} for name, folded in zip(self.names, self.folded)]
+        ranked = sorted(range(len(self.names)), key=lambda name_id: (len(self.folded[name_id]), self.folded[name_id]))
+        self._root = _TrieNode()
+        for name_id in ranked:
+            for key in keys[name_id]:
+                self._insert(key, name_id, 0)
+        for name_id in ranked:
+            for key in keys[name_id]:
+                words = key.split()
+                for start in range(1, len(words)):
+                    self._insert(' '.join(words[start:]), name_id, 1)
+        
+        self._trigrams: Dict[str, List[int]] = {}
+        self._trigram_counts: List[int] = []
+        for name_id, folded in enumerate(self.folded):
+            grams = trigrams(folded)
+            self._trigram_counts.append(len(grams))
+            for gram in grams:
+                self._trigrams.setdefault(gram, []).append(name_id)
+        
+        logger.info(f"Built station search index with {len(self.names)} names "
+                    f"and {len(self._trigrams)} trigrams")
+    
+    def _insert(self, key: str, name_id: int, kind: int):
+        """Add a name under every prefix of key, unless the node is full or already has it."""
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            top = node.top
+            if len(top) < MAX_SEARCH_RESULTS and (not top or top[-1][1] != name_id):
+                # Both spellings of a name are inserted back to back; word matches may repeat any entry
+                if kind == 0 or all(entry[1] != name_id for entry in top):
+                    top.append((kind, name_id))
+    
+    def _prefix_matches(self, folded_query: str) -> List[Tuple[int, str]]:
+        """Get (name id, match kind) of the names starting with the query, best first."""
+        node = self._root
+        for char in folded_query:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        
+        matches = []
+        for kind, name_id in node.top:
+            if self.folded[name_id] == folded_query:
+                matches.append((name_id, MATCH_EXACT))
+            else:
+                matches.append((name_id, MATCH_PREFIX if kind == 0 else MATCH_WORD))
+        return matches
+    
+    def _fuzzy_matches(self, folded_query: str, exclude: Set[int], limit: int,
+                       deadline: float) -> List[Tuple[int, float]]:
+        """Get (name id, similarity) of names sharing enough trigrams with the query, best first."""
+        query_grams = trigrams(folded_query)
+        if not query_grams:
+            return []
+        
+        shared: Counter = Counter()
+        # Rare trigrams first, so the most selective postings are counted before the deadline
+        for gram in sorted(query_grams, key=lambda g: len(self._trigrams.get(g, ()))):
+            shared.update(self._trigrams.get(gram, ()))
+            if time.perf_counter() > deadline:
+                break
+        
+        scored = []
+        for name_id, count in shared.items():
+            if name_id in exclude:
+                continue
+            similarity = count / (len(query_grams) + self._trigram_counts[name_id] - count)
+            if similarity >= MIN_TRIGRAM_SIMILARITY:
+                scored.append((name_id, similarity))
+        scored.sort(key=lambda match: (-match[1], len(self.folded[match[0]]), self.folded[match[0]]))
+        return scored[:limit]
+    
+    def search(self, query: str, limit: int = 10, budget_ms: float = 1.0) -> List[Dict[str, Any]]:
+        """Get up to limit ranked matches for a query.
+        
+        Each result describes one distinct name with the RBLs and types of all
+        stations that have it. Prefix matches come first; fuzzy trigram
+        matches fill the rest, looked up within budget_ms.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000
+        folded_query = fold_name(query)
+        if not folded_query or limit <= 0:
+            return []
+        
+        results = []
+        matched: Set[int] = set()
+        for name_id, match in self._prefix_matches(folded_query)[:limit]:
+            score = len(folded_query) / max(len(self.folded[name_id]), 1)
+            results.append(self._result(name_id, match, score))
+            matched.add(name_id)
+        
+        if len(results) < limit:
+            for name_id, similarity in self._fuzzy_matches(folded_query, matched, limit - len(results), deadline):
+                results.append(self._result(name_id, MATCH_FUZZY, similarity))
+        return results
+    
+    def _result(self, name_id: int, match: str, score: float) -> Dict[str, Any]:
+        """Build the result for a name."""
+        stations = [self.stations[position] for position in self.positions[name_id]]
+        located = next((s for s in stations if s.lat is not None and s.lng is not None), None)
+        return {
+            'name': self.names[name_id],
+            'match': match,
+            'score': round(score, 3),
+            'rbls': [s.rbl for s in stations if s.rbl],
+            'types': list(dict.fromkeys(s.type for s in stations)),
+            'lat': located.lat if located else None,
+            'lng': located.lng if located else None
+        }
+    
+    def __len__(self) -> int:
+        return len(self.names)
+
+def build_station_search_index(stations: Sequence[Any]) -> StationSearchIndex:
+    """Build the search index for a station list or StationTable."""
+    return StationSearchIndex(stations)
@@ -0,0 +1,204 @@
+"""
+Station Table for Wiener Linien Live Map
+
+This module stores stations column by column instead of as one object per
+station: coordinates live in NumPy float arrays, names and RBLs in tuples of
+interned strings, and the few distinct types and zones as small integer codes.
+Rows are exposed as lightweight StationRow views with the same attributes as
+data_loader.Station, so existing code can keep iterating over stations while
+distance, bounding box and nearest-station queries run vectorized over all
+stations at once.
+"""
+
+import logging
+import math
+import sys
+from typing import Any, Collection, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Mean earth radius in meters
+EARTH_RADIUS_M = 6371008.8
+
+# (name, rbl, type, zone, lat, lng) - same order as the fields of data_loader.Station
+StationTuple = Tuple[str, str, str, str, Optional[float], Optional[float]]
+
+def _intern(value: Any) -> str:
+    """Intern a string column value."""
+    return sys.intern(str(value) if value is not None else '')
+
+def _encode_categories(values: Sequence[str]) -> Tuple[np.ndarray, Tuple[str, ...]]:
+    """Encode a low-cardinality string column as integer codes and the distinct values."""
+    categories: Dict[str, int] = {}
+    codes = np.fromiter(
+        (categories.setdefault(value, len(categories)) for value in values),
+        dtype=np.uint16, count=len(values)
+    )
+    return codes, tuple(categories)
+
+class StationRow:
+    """Read-only view of one row of a StationTable."""
+    
+    __slots__ = ('_table', '_position')
+    
+    def __init__(self, table: 'StationTable', position: int):
+        """Initialize the view."""
+        self._table = table
+        self._position = position
+    
+    @property
+    def position(self) -> int:
+        """Get the row position in the table."""
+        return self._position
+    
+    @property
+    def name(self) -> str:
+        return self._table.names[self._position]
+    
+    @property
+    def rbl(self) -> str:
+        return self._table.rbls[self._position]
+    
+    @property
+    def type(self) -> str:
+        return self._table.type_names[self._table.type_codes[self._position]]
+    
+    @property
+    def zone(self) -> str:
+        return self._table.zone_names[self._table.zone_codes[self._position]]
+    
+    @property
+    def lat(self) -> Optional[float]:
+        value = self._table.lat[self._position]
+        return None if math.isnan(value) else float(value)
+    
+    @property
+    def lng(self) -> Optional[float]:
+        value = self._table.lng[self._position]
+        return None if math.isnan(value) else float(value)
+    
+    def as_tuple(self) -> StationTuple:
+        """Get the row as a (name, rbl, type, zone, lat, lng) tuple."""
+        return (self.name, self.rbl, self.type, self.zone, self.lat, self.lng)
+    
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, StationRow):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+    
+    def __hash__(self) -> int:
+        return hash(self.as_tuple())
+    
+    def __repr__(self) -> str:
+        return (f"StationRow(name={self.name!r}, rbl={self.rbl!r}, type={self.type!r}, "
+                f"zone={self.zone!r}, lat={self.lat!r}, lng={self.lng!r})")
+
+class StationTable:
+    """Immutable struct-of-arrays table of stations.
+    
+    Behaves like a sequence of StationRow views. Missing coordinates are
+    stored as NaN and never match a spatial query.
+    """
+    
+    def __init__(self, names: Sequence[str], rbls: Sequence[str], types: Sequence[str],
+                 zones: Sequence[str], lat: Sequence[Optional[float]], lng: Sequence[Optional[float]]):
+        """Build the table from its columns."""
+        count = len(names)
+        if not all(len(column) == count for column in (rbls, types, zones, lat, lng)):
+            raise ValueError("station columns must have the same length")
+        
+        self.names: Tuple[str, ...] = tuple(_intern(name) for name in names)
+        self.rbls: Tuple[str, ...] = tuple(_intern(rbl) for rbl in rbls)
+        self.type_codes, self.type_names = _encode_categories([_intern(t) for t in types])
+        self.zone_codes, self.zone_names = _encode_categories([_intern(z) for z in zones])
+        self.lat = np.array([np.nan if v is None else v for v in lat], dtype=np.float64)
+        self.lng = np.array([np.nan if v is None else v for v in lng], dtype=np.float64)
+        for column in (self.type_codes, self.zone_codes, self.lat, self.lng):
+            column.flags.writeable = False
+        
+        # Precomputed for the haversine distance
+        self._lat_rad = np.radians(self.lat)
+        self._lng_rad = np.radians(self.lng)
+        self._cos_lat = np.cos(self._lat_rad)
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]]) -> 'StationTable':
+        """Build a table from (name, rbl, type, zone, lat, lng) rows."""
+        rows = list(rows)
+        if not rows:
+            return cls((), (), (), (), (), ())
+        return cls(*zip(*rows))
+    
+    @classmethod
+    def from_stations(cls, stations: Iterable[Any]) -> 'StationTable':
+        """Build a table from objects with Station attributes."""
+        return cls.from_rows((s.name, s.rbl, s.type, s.zone, s.lat, s.lng) for s in stations)
+    
+    def rows(self) -> List[StationTuple]:
+        """Get all rows as (name, rbl, type, zone, lat, lng) tuples."""
+        return [StationRow(self, position).as_tuple() for position in range(len(self))]
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def __getitem__(self, key: Union[int, slice]) -> Union[StationRow, List[StationRow]]:
+        if isinstance(key, slice):
+            return [StationRow(self, position) for position in range(*key.indices(len(self)))]
+        position = range(len(self))[key]
+        return StationRow(self, position)
+    
+    def __iter__(self) -> Iterator[StationRow]:
+        for position in range(len(self)):
+            yield StationRow(self, position)
+    
+    def select(self, selection: np.ndarray) -> List[StationRow]:
+        """Get the rows at an array of positions or where a boolean mask is set."""
+        selection = np.asarray(selection)
+        positions = np.flatnonzero(selection) if selection.dtype == bool else selection
+        return [StationRow(self, int(position)) for position in positions]
+    
+    def distances_m(self, lat: float, lng: float) -> np.ndarray:
+        """Get the great-circle distance in meters from a point to every station (NaN without coordinates)."""
+        lat_rad, lng_rad = math.radians(lat), math.radians(lng)
+        a = (np.sin((self._lat_rad - lat_rad) / 2) ** 2
+             + math.cos(lat_rad) * self._cos_lat * np.sin((self._lng_rad - lng_rad) / 2) ** 2)
+        return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    
+    def bbox_mask(self, bbox: Tuple[float, float, float, float]) -> np.ndarray:
+        """Get a boolean mask of the stations inside a (min_lat, min_lng, max_lat, max_lng) box."""
+        min_lat, min_lng, max_lat, max_lng = bbox
+        return (self.lat >= min_lat) & (self.lat <= max_lat) & (self.lng >= min_lng) & (self.lng <= max_lng)
+    
+    def within_bbox(self, bbox: Tuple[float, float, float, float]) -> np.ndarray:
+        """Get the positions of the stations inside a bounding box, in table order."""
+        return np.flatnonzero(self.bbox_mask(bbox))
+    
+    def type_mask(self, types: Collection[str]) -> np.ndarray:
+        """Get a boolean mask of the stations whose type is in types (case-insensitive)."""
+        wanted = {t.lower() for t in types}
+        codes = [code for code, name in enumerate(self.type_names) if name.lower() in wanted]
+        return np.isin(self.type_codes, codes)
+    
+    def nearest(self, lat: float, lng: float, k: int = 1,
+                max_distance_m: Optional[float] = None) -> List[Tuple[int, float]]:
+        """Get the k stations closest to a point as (position, distance in meters), closest first."""
+        if k <= 0 or not len(self):
+            return []
+        
+        distances = self.distances_m(lat, lng)
+        distances = np.where(np.isnan(distances), np.inf, distances)
+        if max_distance_m is not None:
+            distances = np.where(distances <= max_distance_m, distances, np.inf)
+        
+        k = min(k, len(distances))
+        candidates = np.argpartition(distances, k - 1)[:k] if k < len(distances) else np.arange(len(distances))
+        candidates = candidates[np.argsort(distances[candidates], kind='stable')]
+        return [(int(position), float(distances[position])) for position in candidates
+                if np.isfinite(distances[position])]
+    
+    def nbytes(self) -> int:
+        """Get the approximate memory used by the coordinate and code columns."""
+        return sum(column.nbytes for column in (self.lat, self.lng, self.type_codes, self.zone_codes,
+                                                self._lat_rad, self._lng_rad, self._cos_lat))
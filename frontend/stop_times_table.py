@@ -0,0 +1,185 @@
+"""
+Stop Times Table for Wiener Linien Live Map
+
+This module stores GTFS stop_times column by column: one NumPy array each for
+the trip index, stop index, stop sequence and arrival/departure times in
+seconds after midnight of the service day. Rows are sorted by trip and stop
+sequence and an offset array maps every trip to its row range, so the
+schedule of a trip is a zero-copy slice of the columns. At 18 bytes per row
+a feed with millions of stop times stays in the tens of megabytes.
+
+StopDepartures regroups the same rows by stop, sorted by departure time, so
+the next departures at a stop are found by binary search.
+"""
+
+import logging
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Time value of a stop time without arrival/departure (non-timepoint rows)
+MISSING_TIME = -1
+
+def parse_gtfs_time(value: str) -> int:
+    """Parse a GTFS HH:MM:SS time into seconds after midnight. Hours may exceed 23; blank is MISSING_TIME."""
+    value = value.strip()
+    if not value:
+        return MISSING_TIME
+    hours, minutes, seconds = value.split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+def format_gtfs_time(seconds: int) -> Optional[str]:
+    """Format seconds after midnight as a GTFS HH:MM:SS time."""
+    if seconds < 0:
+        return None
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+class TripStopTimes(NamedTuple):
+    """Stop times of one trip, as read-only views into the StopTimesTable columns."""
+    stop: np.ndarray
+    sequence: np.ndarray
+    arrival: np.ndarray
+    departure: np.ndarray
+
+class StopTimesTable:
+    """Immutable struct-of-arrays table of GTFS stop times, grouped by trip."""
+    
+    def __init__(self, trip: Sequence[int], stop: Sequence[int], sequence: Sequence[int],
+                 arrival: Sequence[int], departure: Sequence[int], trip_count: int):
+        """Build the table from its columns. trip and stop are indexes into the caller's trip and stop lists."""
+        trip = np.asarray(trip, dtype=np.int32)
+        stop = np.asarray(stop, dtype=np.int32)
+        sequence = np.asarray(sequence, dtype=np.int64)
+        arrival = np.asarray(arrival, dtype=np.int32)
+        departure = np.asarray(departure, dtype=np.int32)
+        count = len(trip)
+        if not all(len(column) == count for column in (stop, sequence, arrival, departure)):
+            raise ValueError("stop time columns must have the same length")
+        
+        # stop_times.txt is usually already ordered; only sort when it is not
+        if count and not self._is_ordered(trip, sequence):
+            order = np.lexsort((sequence, trip))
+            trip, stop, sequence = trip[order], stop[order], sequence[order]
+            arrival, departure = arrival[order], departure[order]
+        
+        # trip_offsets[i]:trip_offsets[i + 1] are the rows of trip i
+        self.trip_offsets = np.zeros(trip_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(trip, minlength=trip_count), out=self.trip_offsets[1:])
+        
+        # Only the order of stop_sequence matters; renumber trips whose values do not fit 16 bits
+        if count and sequence.max() > np.iinfo(np.uint16).max:
+            trip_starts = np.repeat(self.trip_offsets[:-1], np.diff(self.trip_offsets))
+            sequence = np.arange(count, dtype=np.int64) - trip_starts + 1
+        
+        self.trip = trip
+        self.stop = stop
+        self.sequence = sequence.astype(np.uint16)
+        self.arrival = arrival
+        self.departure = departure
+        self._fill_missing_times()
+        for column in (self.trip, self.stop, self.sequence, self.arrival, self.departure, self.trip_offsets):
+            column.flags.writeable = False
+    
+    @staticmethod
+    def _is_ordered(trip: np.ndarray, sequence: np.ndarray) -> bool:
+        """Check whether rows are sorted by trip and then by stop sequence."""
+        trip_step = np.diff(trip)
+        return bool(np.all(trip_step >= 0) and np.all((trip_step > 0) | (np.diff(sequence) > 0)))
+    
+    def _fill_missing_times(self):
+        """Fill missing times: one from the other, then by interpolating between timepoints by stop position."""
+        arrival, departure = self.arrival, self.departure
+        only_departure = (arrival == MISSING_TIME) & (departure != MISSING_TIME)
+        arrival[only_departure] = departure[only_departure]
+        only_arrival = (departure == MISSING_TIME) & (arrival != MISSING_TIME)
+        departure[only_arrival] = arrival[only_arrival]
+        
+        missing = arrival == MISSING_TIME
+        if not missing.any():
+            return
+        for trip_index in np.unique(self.trip[missing]).tolist():
+            rows = self.trip_rows(trip_index)
+            known = np.flatnonzero(arrival[rows] != MISSING_TIME)
+            if len(known) < 2:
+                continue
+            positions = np.arange(rows.stop - rows.start)
+            filled = np.interp(positions, known, arrival[rows][known]).astype(np.int32)
+            gaps = arrival[rows] == MISSING_TIME
+            arrival[rows][gaps] = filled[gaps]
+            departure[rows][gaps] = filled[gaps]
+        logger.debug(f"Interpolated {int(missing.sum())} missing stop times")
+    
+    def trip_rows(self, trip_index: int) -> slice:
+        """Get the row range of a trip."""
+        return slice(int(self.trip_offsets[trip_index]), int(self.trip_offsets[trip_index + 1]))
+    
+    def for_trip(self, trip_index: int) -> TripStopTimes:
+        """Get the stop times of a trip without copying."""
+        rows = self.trip_rows(trip_index)
+        return TripStopTimes(self.stop[rows], self.sequence[rows], self.arrival[rows], self.departure[rows])
+    
+    @property
+    def trip_count(self) -> int:
+        return len(self.trip_offsets) - 1
+    
+    @property
+    def nbytes(self) -> int:
+        """Get the memory used by the columns."""
+        return sum(column.nbytes for column in
+                   (self.trip, self.stop, self.sequence, self.arrival, self.departure, self.trip_offsets))
+    
+    def __len__(self) -> int:
+        return len(self.trip)
+
+class StopDepartures:
+    """Per-stop timetables: the departures of every stop sorted by time, for binary search.
+    
+    The last stop of a trip is left out, since nothing departs there.
+    """
+    
+    def __init__(self, table: StopTimesTable, stop_count: int):
+        """Build the timetables of stops 0..stop_count-1 from a stop times table."""
+        departs = np.ones(len(table), dtype=bool)
+        trip_lengths = np.diff(table.trip_offsets)
+        departs[table.trip_offsets[1:][trip_lengths > 0] - 1] = False
+        rows = np.flatnonzero(departs)
+        rows = rows[np.lexsort((table.departure[rows], table.stop[rows]))].astype(np.int32)
+        
+        # Table rows of stop s, by departure time, are rows[offsets[s]:offsets[s + 1]]
+        self.rows = rows
+        self.times = table.departure[rows]
+        self.trips = table.trip[rows]
+        self.offsets = np.zeros(stop_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(table.stop[rows], minlength=stop_count), out=self.offsets[1:])
+        for column in (self.rows, self.times, self.trips, self.offsets):
+            column.flags.writeable = False
+    
+    def next_departures(self, stop: int, after: int, trip_mask: np.ndarray, limit: int) -> np.ndarray:
+        """Get the positions of the first limit departures of a stop at or after a time, of trips in trip_mask.
+        
+        The start is found by binary search; from there departures are
+        filtered in growing windows until enough are found.
+        """
+        start, end = int(self.offsets[stop]), int(self.offsets[stop + 1])
+        start += int(np.searchsorted(self.times[start:end], after, side='left'))
+        found = []
+        count = 0
+        window = max(limit * 4, 16)
+        while start < end and count < limit:
+            window_end = min(end, start + window)
+            positions = start + np.flatnonzero(trip_mask[self.trips[start:window_end]])
+            found.append(positions[:limit - count])
+            count += len(found[-1])
+            start = window_end
+            window *= 4
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+    
+    @property
+    def nbytes(self) -> int:
+        """Get the memory used by the timetables."""
+        return sum(column.nbytes for column in (self.rows, self.times, self.trips, self.offsets))
+    
+    def __len__(self) -> int:
+        return len(self.rows)
@@ -0,0 +1,57 @@
+"""
+Test script to verify that a pagination cursor survives a dataset reload.
+"""
+from list_query import CursorError, ListQuery
+
+def key(item):
+    """Pagination key of a test item."""
+    return item['id']
+
+def key_index(items):
+    """Key -> position index of a test list."""
+    return {key(item): position for position, item in enumerate(items)}
+
+def make_items(ids):
+    """Build test items with the given ids."""
+    return [{'id': item_id, 'name': f'Stop {item_id}'} for item_id in ids]
+
+def first_page():
+    """Get the first page of the original list and its cursor."""
+    items = make_items(['a', 'b', 'c', 'd', 'e'])
+    page, cursor = ListQuery(limit=2).paginate(items, key)
+    assert [key(item) for item in page] == ['a', 'b']
+    return cursor
+
+def test_unchanged_list():
+    """The cursor continues where the first page ended."""
+    items = make_items(['a', 'b', 'c', 'd', 'e'])
+    page, _ = ListQuery(limit=2, after=first_page()).paginate(items, key)
+    assert [key(item) for item in page] == ['c', 'd']
+
+def test_reload_with_inserted_items():
+    """After a reload shifts the positions, the cursor still continues after its key."""
+    reloaded = make_items(['0', 'a', 'a2', 'b', 'c', 'd', 'e'])
+    cursor = first_page()
+    page, _ = ListQuery(limit=2, after=cursor).paginate(reloaded, key, key_index(reloaded))
+    assert [key(item) for item in page] == ['c', 'd']
+    # Without an index the key is searched for
+    page, _ = ListQuery(limit=2, after=cursor).paginate(reloaded, key)
+    assert [key(item) for item in page] == ['c', 'd']
+
+def test_reload_without_cursor_key():
+    """If the reload removed the cursor's item, the cursor is rejected."""
+    reloaded = make_items(['a', 'c', 'd', 'e'])
+    try:
+        ListQuery(limit=2, after=first_page()).paginate(reloaded, key, key_index(reloaded))
+    except CursorError:
+        return
+    raise AssertionError("expected CursorError")
+
+def main():
+    """Run the pagination cursor checks."""
+    for check in (test_unchanged_list, test_reload_with_inserted_items, test_reload_without_cursor_key):
+        check()
+        print(f"{check.__name__}: OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Test script to verify the encoded polyline functions against Google's reference example.
+"""
+from route_geometry import decode_polyline, encode_polyline
+
+# Example from Google's encoded polyline algorithm format documentation
+GOOGLE_POINTS = [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]
+GOOGLE_ENCODED = '_p~iF~ps|U_ulLnnqC_mqNvxq`@'
+
+def test_encode_google_example():
+    """Encoding the reference points gives the reference string."""
+    assert encode_polyline(GOOGLE_POINTS) == GOOGLE_ENCODED
+
+def test_decode_google_example():
+    """Decoding the reference string gives the reference points."""
+    decoded = decode_polyline(GOOGLE_ENCODED)
+    assert len(decoded) == len(GOOGLE_POINTS)
+    for (lat, lng), (expected_lat, expected_lng) in zip(decoded, GOOGLE_POINTS):
+        assert abs(lat - expected_lat) < 1e-9 and abs(lng - expected_lng) < 1e-9
+
+def test_polyline6_round_trip():
+    """Six decimal places survive an encode/decode round trip."""
+    points = [[48.208176, 16.373819], [48.210033, 16.363449]]
+    assert decode_polyline(encode_polyline(points, precision=6), precision=6) == points
+
+def main():
+    """Run the polyline checks."""
+    for check in (test_encode_google_example, test_decode_google_example, test_polyline6_round_trip):
+        check()
+        print(f"{check.__name__}: OK")
+
+if __name__ == "__main__":
+    main()
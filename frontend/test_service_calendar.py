@@ -0,0 +1,55 @@
+"""
+Test script to verify that calendar_dates exceptions override the weekly calendar.
+"""
+from datetime import date
+
+from gtfs_service import GTFSDateRange
+from service_calendar import SERVICE_ADDED, SERVICE_REMOVED, ServiceCalendar
+
+WEEKDAYS = [True, True, True, True, True, False, False]
+
+# Monday 2025-06-02 to Sunday 2025-06-15
+ENTRIES = {
+    'weekday': GTFSDateRange(date(2025, 6, 2), date(2025, 6, 15), WEEKDAYS, 'weekday')
+}
+
+def build_calendar() -> ServiceCalendar:
+    """Build a calendar with one weekday service and one removed and one added date."""
+    return ServiceCalendar(ENTRIES, [
+        ('weekday', date(2025, 6, 9), SERVICE_REMOVED),   # Whit Monday
+        ('weekday', date(2025, 6, 14), SERVICE_ADDED),    # Saturday
+        ('special', date(2025, 6, 20), SERVICE_ADDED)     # service only in calendar_dates
+    ])
+
+def test_weekly_pattern():
+    """Without an exception the weekday flags decide."""
+    calendar = build_calendar()
+    assert calendar.is_active('weekday', date(2025, 6, 3))
+    assert not calendar.is_active('weekday', date(2025, 6, 7))
+
+def test_removed_date():
+    """A removal switches off a day the weekly pattern would run."""
+    calendar = build_calendar()
+    assert not calendar.is_active('weekday', date(2025, 6, 9))
+    assert 'weekday' not in calendar.active_services(date(2025, 6, 9))
+
+def test_added_date():
+    """An addition switches on a day the weekly pattern would not run."""
+    calendar = build_calendar()
+    assert calendar.is_active('weekday', date(2025, 6, 14))
+    assert 'weekday' in calendar.active_services(date(2025, 6, 14))
+
+def test_calendar_dates_only_service():
+    """A service without a calendar entry runs exactly on its added dates."""
+    calendar = build_calendar()
+    assert calendar.active_services(date(2025, 6, 20)) == frozenset({'special'})
+    assert not calendar.is_active('special', date(2025, 6, 13))
+
+def main():
+    """Run the service calendar checks."""
+    for check in (test_weekly_pattern, test_removed_date, test_added_date, test_calendar_dates_only_service):
+        check()
+        print(f"{check.__name__}: OK")
+
+if __name__ == "__main__":
+    main()
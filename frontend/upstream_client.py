@@ -0,0 +1,139 @@
+"""
+Upstream Client for Wiener Linien Live Map
+
+This module provides a shared HTTP client for all calls to the Wiener Linien
+realtime API. It keeps a pooled keep-alive session so that repeated calls
+reuse TCP/TLS connections instead of opening a new one every time.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+from env_settings import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+API_BASE_URL = "https://www.wienerlinien.at/ogd_realtime"
+
+# API headers to avoid 403 errors. ACCEPT_ENCODING lists the encodings urllib3
+# can decode here: gzip and deflate, plus br when Brotli is installed.
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Connection': 'keep-alive'
+}
+
+# Server errors worth retrying. 403/429 are not retried: they mean we are
+# already over the fair use limit and retrying would only make it worse.
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+Params = Union[Dict[str, Any], Sequence[Tuple[str, Any]], None]
+
+class UpstreamClient:
+    """Pooled keep-alive HTTP client for the Wiener Linien API."""
+    
+    def __init__(self, base_url: str = API_BASE_URL,
+                 pool_size: Optional[int] = None,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None,
+                 backoff_factor: Optional[float] = None,
+                 backoff_jitter: Optional[float] = None):
+        """Initialize the client. Unset options are read from WL_HTTP_* environment variables."""
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size if pool_size is not None else env_int('WL_HTTP_POOL_SIZE', 10)
+        self.connect_timeout = connect_timeout if connect_timeout is not None else env_float('WL_HTTP_CONNECT_TIMEOUT', 3.05)
+        self.read_timeout = read_timeout if read_timeout is not None else env_float('WL_HTTP_READ_TIMEOUT', 10)
+        self.max_retries = max_retries if max_retries is not None else env_int('WL_HTTP_MAX_RETRIES', 2)
+        self.backoff_factor = backoff_factor if backoff_factor is not None else env_float('WL_HTTP_BACKOFF_FACTOR', 0.5)
+        self.backoff_jitter = backoff_jitter if backoff_jitter is not None else env_float('WL_HTTP_BACKOFF_JITTER', 0.5)
+        
+        self._session = None
+        self._lock = threading.Lock()
+    
+    def _create_session(self) -> requests.Session:
+        """Create a session with a connection pool and retry policy."""
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=self.max_retries,
+            status=self.max_retries,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset({'GET'}),
+            backoff_factor=self.backoff_factor,
+            backoff_jitter=self.backoff_jitter,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=retry
+        )
+        
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    @property
+    def session(self) -> requests.Session:
+        """Get the shared session, creating it on first use."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+    
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """Get the (connect, read) timeout pair."""
+        return (self.connect_timeout, self.read_timeout)
+    
+    def get(self, endpoint: str, params: Params = None) -> requests.Response:
+        """Send a GET request to an API endpoint such as 'monitor' or 'trafficInfo'."""
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        return self.session.get(url, params=params, timeout=self.timeout)
+    
+    def get_json(self, endpoint: str, params: Params = None) -> Optional[Dict[str, Any]]:
+        """Fetch an API endpoint and return the decoded JSON, or None on failure."""
+        try:
+            response = self.get(endpoint, params)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API request to {endpoint} failed: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error processing API response from {endpoint}: {e}")
+            return None
+    
+    def close(self):
+        """Close the session and release pooled connections."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get the client configuration."""
+        return {
+            'base_url': self.base_url,
+            'pool_size': self.pool_size,
+            'connect_timeout': self.connect_timeout,
+            'read_timeout': self.read_timeout,
+            'max_retries': self.max_retries,
+            'session_open': self._session is not None
+        }
+
+# Global upstream client instance
+upstream_client = UpstreamClient()
@@ -0,0 +1,308 @@
+"""
+Vehicle Snapshot Poller for Wiener Linien Live Map
+
+This module polls the Wiener Linien monitor API in the background and keeps
+an in-memory, versioned snapshot of departures per RBL. Request handlers and
+the WebSocket broadcast read from the snapshot instead of calling upstream,
+so their latency no longer depends on the API.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from monitor_parser import VehicleRecord
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class RBLDepartures:
+    """Vehicles derived from the last successful monitor fetch of one RBL."""
+    rbl: str
+    vehicles: Tuple[VehicleRecord, ...]
+    fetched_at: datetime
+    fetched_monotonic: float
+    stale_upstream: bool = False
+    
+    def age_seconds(self) -> float:
+        """Get the age of this entry in seconds."""
+        return time.monotonic() - self.fetched_monotonic
+
+@dataclass(frozen=True)
+class VehicleSnapshot:
+    """Immutable snapshot of departures for all polled RBLs."""
+    version: int
+    created_at: datetime
+    entries: Dict[str, RBLDepartures] = field(default_factory=dict)
+    failed_rbls: frozenset = frozenset()
+    by_line: Dict[str, Tuple[VehicleRecord, ...]] = field(default_factory=dict)
+    by_type: Dict[str, Tuple[VehicleRecord, ...]] = field(default_factory=dict)
+    vehicles: Tuple[VehicleRecord, ...] = ()
+    
+    @classmethod
+    def build(cls, version: int, entries: Dict[str, RBLDepartures], failed_rbls: Iterable[str]) -> 'VehicleSnapshot':
+        """Build a snapshot and its line/type indexes from per-RBL entries."""
+        vehicles = []
+        by_line: Dict[str, List[VehicleRecord]] = {}
+        by_type: Dict[str, List[VehicleRecord]] = {}
+        
+        for entry in entries.values():
+            for vehicle in entry.vehicles:
+                vehicles.append(vehicle)
+                by_line.setdefault(vehicle.line, []).append(vehicle)
+                by_type.setdefault(vehicle.type, []).append(vehicle)
+        
+        return cls(
+            version=version,
+            created_at=datetime.now(),
+            entries=entries,
+            failed_rbls=frozenset(failed_rbls),
+            by_line={key: tuple(value) for key, value in by_line.items()},
+            by_type={key: tuple(value) for key, value in by_type.items()},
+            vehicles=tuple(vehicles)
+        )
+    
+    def query(self, vehicle_type: Optional[str] = None, line: Optional[str] = None,
+              rbls: Optional[Iterable[str]] = None) -> List[VehicleRecord]:
+        """Get vehicles matching the filters, starting from the smallest index."""
+        if vehicle_type == 'all':
+            vehicle_type = None
+        
+        if rbls is not None:
+            candidates = [
+                vehicle
+                for rbl in rbls if rbl in self.entries
+                for vehicle in self.entries[rbl].vehicles
+            ]
+        elif line is not None and vehicle_type is not None:
+            by_line = self.by_line.get(line, ())
+            by_type = self.by_type.get(vehicle_type, ())
+            candidates = by_line if len(by_line) <= len(by_type) else by_type
+        elif line is not None:
+            return list(self.by_line.get(line, ()))
+        elif vehicle_type is not None:
+            return list(self.by_type.get(vehicle_type, ()))
+        else:
+            return list(self.vehicles)
+        
+        return [
+            vehicle for vehicle in candidates
+            if (vehicle_type is None or vehicle.type == vehicle_type)
+            and (line is None or vehicle.line == line)
+        ]
+
+class VehicleSnapshotPoller:
+    """Background poller that keeps a vehicle snapshot fresh on a rotating schedule."""
+    
+    def __init__(self,
+                 fetch_batch: Callable[[List[str]], Dict[str, Dict[str, Any]]],
+                 build_vehicles: Callable[[str, Dict[str, Any]], List[VehicleRecord]],
+                 rbls_provider: Callable[[], List[str]],
+                 rbls_per_tick: int = 20,
+                 poll_interval: float = 5.0,
+                 max_age: float = 30.0,
+                 min_interval: float = 1.0,
+                 max_watched: int = 200):
+        """Initialize the poller.
+        
+        `fetch_batch` fetches monitor data for several RBLs, `build_vehicles`
+        turns one RBL's monitor response into vehicle records and `rbls_provider`
+        returns the RBLs to keep in the rotation.
+        """
+        self.fetch_batch = fetch_batch
+        self.build_vehicles = build_vehicles
+        self.rbls_provider = rbls_provider
+        self.rbls_per_tick = rbls_per_tick
+        self.poll_interval = poll_interval
+        self.max_age = max_age
+        self.min_interval = min_interval
+        self.max_watched = max_watched
+        
+        self._snapshot = VehicleSnapshot.build(0, {}, ())
+        self._publish_lock = threading.Lock()
+        self._queue_lock = threading.Lock()
+        self._priority = deque()
+        self._watched: 'OrderedDict[str, None]' = OrderedDict()
+        self._rotation_position = 0
+        self._wake = threading.Event()
+        
+        self.running = False
+        self.poll_thread = None
+        self.stats = {'polls': 0, 'rbls_fetched': 0, 'rbls_failed': 0, 'revalidations_requested': 0}
+    
+    def start(self):
+        """Start polling in the background."""
+        if not self.running:
+            self.running = True
+            self.poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
+            self.poll_thread.start()
+            logger.info("Vehicle snapshot poller started")
+    
+    def stop(self):
+        """Stop polling."""
+        self.running = False
+        self._wake.set()
+        if self.poll_thread:
+            self.poll_thread.join(timeout=5)
+        logger.info("Vehicle snapshot poller stopped")
+    
+    def get_snapshot(self) -> VehicleSnapshot:
+        """Get the current snapshot. Never blocks."""
+        return self._snapshot
+    
+    def watch(self, rbl: str):
+        """Add an RBL to the rotation, e.g. when a client asks for a specific station."""
+        with self._queue_lock:
+            if rbl in self._watched:
+                self._watched.move_to_end(rbl)
+                return
+            self._watched[rbl] = None
+            while len(self._watched) > self.max_watched:
+                self._watched.popitem(last=False)
+        self.request_refresh([rbl])
+    
+    def request_refresh(self, rbls: Iterable[str]):
+        """Ask the poller to refresh RBLs on its next tick, without waiting for it."""
+        with self._queue_lock:
+            queued = set(self._priority)
+            for rbl in rbls:
+                if rbl not in queued:
+                    self._priority.append(rbl)
+                    queued.add(rbl)
+                    self.stats['revalidations_requested'] += 1
+        self._wake.set()
+    
+    def revalidate_stale(self, rbls: Optional[Iterable[str]] = None):
+        """Request a refresh for missing or expired RBLs (stale-while-revalidate)."""
+        snapshot = self._snapshot
+        candidates = rbls if rbls is not None else snapshot.entries.keys()
+        stale = [
+            rbl for rbl in candidates
+            if rbl not in snapshot.entries or snapshot.entries[rbl].age_seconds() > self.max_age
+        ]
+        if stale:
+            self.request_refresh(stale)
+    
+    def _rotation(self) -> List[str]:
+        """Get the full list of RBLs in the rotation."""
+        try:
+            rbls = list(self.rbls_provider())
+        except Exception as e:
+            logger.error(f"Error getting RBLs for vehicle polling: {e}")
+            rbls = []
+        with self._queue_lock:
+            rbls.extend(self._watched)
+        return list(dict.fromkeys(rbls))
+    
+    def _next_batch(self) -> List[str]:
+        """Take priority RBLs first, then continue the rotation."""
+        batch = []
+        with self._queue_lock:
+            while self._priority and len(batch) < self.rbls_per_tick:
+                batch.append(self._priority.popleft())
+        
+        rotation = self._rotation()
+        if rotation:
+            start = self._rotation_position % len(rotation)
+            for offset in range(len(rotation)):
+                if len(batch) >= self.rbls_per_tick:
+                    break
+                rbl = rotation[(start + offset) % len(rotation)]
+                if rbl not in batch:
+                    batch.append(rbl)
+                self._rotation_position = start + offset + 1
+        
+        return batch
+    
+    def refresh(self, rbls: List[str]) -> VehicleSnapshot:
+        """Fetch the given RBLs and publish a new snapshot version."""
+        if not rbls:
+            return self._snapshot
+        
+        results = self.fetch_batch(rbls)
+        fetched_at = datetime.now()
+        fetched_monotonic = time.monotonic()
+        
+        updated = {}
+        failed = []
+        for rbl in rbls:
+            data = results.get(rbl)
+            if not data:
+                failed.append(rbl)
+                continue
+            try:
+                vehicles = tuple(self.build_vehicles(rbl, data))
+            except Exception as e:
+                logger.error(f"Error building vehicles for RBL {rbl}: {e}")
+                failed.append(rbl)
+                continue
+            updated[rbl] = RBLDepartures(
+                rbl=rbl,
+                vehicles=vehicles,
+                fetched_at=fetched_at,
+                fetched_monotonic=fetched_monotonic,
+                stale_upstream=bool(data.get('cache', {}).get('stale'))
+            )
+        
+        # Copy-on-write: readers keep using the old snapshot until the swap
+        with self._publish_lock:
+            current = self._snapshot
+            entries = dict(current.entries)
+            entries.update(updated)
+            failed_rbls = (set(current.failed_rbls) - set(updated)) | set(failed)
+            self._snapshot = VehicleSnapshot.build(current.version + 1, entries, failed_rbls)
+        
+        self.stats['rbls_fetched'] += len(updated)
+        self.stats['rbls_failed'] += len(failed)
+        logger.debug(f"Published vehicle snapshot v{self._snapshot.version} "
+                     f"({len(updated)} RBLs updated, {len(failed)} failed)")
+        return self._snapshot
+    
+    def _poll_loop(self):
+        """Main polling loop."""
+        while self.running:
+            tick_started = time.monotonic()
+            self._wake.clear()
+            try:
+                self.stats['polls'] += 1
+                self.refresh(self._next_batch())
+            except Exception as e:
+                logger.error(f"Error in vehicle poller loop: {e}")
+            
+            # Wake early for revalidation requests, but never poll faster than min_interval
+            self._wake.wait(self.poll_interval)
+            remaining = self.min_interval - (time.monotonic() - tick_started)
+            if remaining > 0 and self.running:
+                time.sleep(remaining)
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get poller and snapshot status."""
+        snapshot = self._snapshot
+        return {
+            'running': self.running,
+            'snapshot_version': snapshot.version,
+            'snapshot_created_at': snapshot.created_at.isoformat(),
+            'rbls_in_snapshot': len(snapshot.entries),
+            'failed_rbls': len(snapshot.failed_rbls),
+            'vehicle_count': len(snapshot.vehicles),
+            'watched_rbls': len(self._watched),
+            **self.stats
+        }
+
+# Global vehicle poller instance
+vehicle_poller = None
+
+def init_vehicle_poller(**kwargs) -> VehicleSnapshotPoller:
+    """Initialize and start the global vehicle poller."""
+    global vehicle_poller
+    vehicle_poller = VehicleSnapshotPoller(**kwargs)
+    vehicle_poller.start()
+    return vehicle_poller
+
+def get_vehicle_poller() -> Optional[VehicleSnapshotPoller]:
+    """Get the global vehicle poller instance."""
+    return vehicle_poller
@@ -46,6 +46,7 @@ class VehicleUpdate:
     next_station: str
     delay: int
     timestamp: datetime
+    source: str = 'realtime'
 
 class WebSocketManager:
     """Manages WebSocket connections and real-time updates."""
@@ -56,6 +57,7 @@ class WebSocketManager:
         self.connected_clients = {}
         self.disruption_alerts = {}
         self.vehicle_updates = {}
+        self.snapshot_version = None
         self.update_callbacks = []
         self.alert_callbacks = []
         self.running = False
@@ -170,46 +172,31 @@ class WebSocketManager:
                 time.sleep(5)
     
     def _update_vehicle_positions(self):
-        """Update vehicle positions from API."""
+        """Update vehicle positions from the background vehicle snapshot."""
         try:
-            # This would integrate with the actual Wiener Linien API
-            # For now, we'll simulate updates
-            from app import fetch_vehicle_data, get_dummy_vehicles
+            from app import get_fallback_vehicles
+            from vehicle_poller import get_vehicle_poller
             
-            # Get vehicle data for major stations
-            major_stations = ['3052', '3058', '3062', '3071', '3080']  # Sample RBL numbers
+            poller = get_vehicle_poller()
+            snapshot = poller.get_snapshot() if poller else None
             
-            for rbl in major_stations:
-                try:
-                    vehicles_data = fetch_vehicle_data(rbl)
-                    if vehicles_data and isinstance(vehicles_data, dict):
-                        # Handle the API response structure
-                        if 'data' in vehicles_data and 'monitors' in vehicles_data['data']:
-                            for monitor in vehicles_data['data']['monitors']:
-                                if 'lines' in monitor:
-                                    for line_data in monitor['lines']:
-                                        for vehicle in line_data.get('departures', {}).get('departure', []):
-                                            if 'vehicle' in vehicle:
-                                                vehicle_info = vehicle['vehicle']
-                                                vehicle_data = {
-                                                    'id': vehicle_info.get('name', f'vehicle_{rbl}_{len(self.vehicle_updates)}'),
-                                                    'line': line_data.get('name', ''),
-                                                    'type': line_data.get('type', 'unknown'),
-                                                    'lat': vehicle_info.get('location', {}).get('latitude', 0),
-                                                    'lng': vehicle_info.get('location', {}).get('longitude', 0),
-                                                    'direction': vehicle_info.get('direction', ''),
-                                                    'next_station': vehicle.get('departure', {}).get('locationStop', {}).get('name', ''),
-                                                    'delay': vehicle.get('departure', {}).get('departureTime', {}).get('timeReal', 0)
-                                                }
-                                                self._process_vehicle_update(vehicle_data)
-                except Exception as e:
-                    logger.error(f"Error fetching vehicle data for RBL {rbl}: {e}")
-                    continue
-                    
-            # If no real vehicles found, add some dummy vehicles for demonstration
-            if len(self.vehicle_updates) == 0:
-                dummy_vehicles = get_dummy_vehicles()
-                for vehicle in dummy_vehicles:
+            if snapshot and snapshot.vehicles:
+                # Nothing to do until the poller publishes a new snapshot
+                if snapshot.version == self.snapshot_version:
+                    return
+                
+                self.snapshot_version = snapshot.version
+                self.vehicle_updates = {}
+                for vehicle in snapshot.vehicles:
+                    self._process_vehicle_update(vehicle.to_dict())
+                return
+            
+            # Without real vehicles, scheduled positions move every tick; dummy vehicles are added once
+            self.snapshot_version = None
+            vehicles, source = get_fallback_vehicles()
+            if source == 'scheduled' or len(self.vehicle_updates) == 0:
+                self.vehicle_updates = {}
+                for vehicle in vehicles:
                     if isinstance(vehicle, dict):
                         self._process_vehicle_update(vehicle)
                         
@@ -239,7 +226,8 @@ class WebSocketManager:
                 direction=vehicle_data.get('direction', ''),
                 next_station=vehicle_data.get('next_station', ''),
                 delay=int(vehicle_data.get('delay', 0)),
-                timestamp=datetime.now()
+                timestamp=datetime.now(),
+                source=vehicle_data.get('source', 'realtime')
             )
             
             self.vehicle_updates[vehicle_id] = update